@@ -1,7 +1,13 @@
+from functools import lru_cache
+
 from fastapi import Depends, Header, HTTPException
 
+from buisness.app_token_cache import get_app_token_cache
+from buisness.broadcaster_id_cache import get_broadcaster_id_cache
 from buisness.db.twitch_token_business import TwitchTokensBusiness
 from buisness.db.user_business import UserBusiness
+from buisness.game_info_cache import get_game_info_cache
+from buisness.token_validation_cache import get_token_validation_cache
 from config.logger_conf import setup_logger
 from config.settings import settings
 from repositories.twitch_token_repository import TwitchTokenRepository
@@ -18,8 +24,17 @@ def get_supabase_service() -> SupaBase:
     return supabase
 
 
+@lru_cache
 def get_twitch_service() -> TwitchApi:
-    twitch_api = TwitchApi(settings.TWITCH_CLIENT_ID, settings.TWITCH_CLIENT_SECRET)
+    """One TwitchApi per process so its pooled connections are reused, closed on shutdown."""
+    twitch_api = TwitchApi(
+        settings.TWITCH_CLIENT_ID,
+        settings.TWITCH_CLIENT_SECRET,
+        game_info_cache=get_game_info_cache(),
+        broadcaster_id_cache=get_broadcaster_id_cache(),
+        app_token_cache=get_app_token_cache(),
+        token_validation_cache=get_token_validation_cache(),
+    )
     return twitch_api
 
 
@@ -31,7 +31,7 @@ async def sync_user(
         raise HTTPException(status_code=401, detail="Unable to sync user")
 
     if tokens is not None:
-        ok = twitch_token_business.asign_access_token(
+        ok = await twitch_token_business.asign_access_token(
             twitch_api,
             tokens,
             current_user,
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import weakref
+from functools import lru_cache
+from pathlib import Path
+
+from config.settings import settings
+
+logger = logging.getLogger("HiLiteLogger")
+
+
+class AppTokenCache:
+    """
+    Twitch app access tokens shared by every TwitchApi of the process.
+
+    Entries are (access_token, expires_at) keyed by client_id, expires_at
+    being a Unix timestamp. With a path, entries are also saved to a JSON
+    file (mode 0600) so other processes reuse the token instead of asking
+    for their own; the file is read again on every lookup to see their
+    refreshes.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: JSON file shared between processes
+                (default: TWITCH_APP_TOKEN_CACHE_PATH, empty = memory only)
+        """
+        path = path or settings.TWITCH_APP_TOKEN_CACHE_PATH
+        self.path = Path(path) if path else None
+
+        self._lock = threading.Lock()
+        self._tokens = {}
+        # One asyncio.Lock per (event loop, client_id): asyncio locks are loop-bound
+        self._refresh_locks = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self, client_id):
+        """Return the newest (access_token, expires_at) known for client_id, or None."""
+        entry = self._read_file().get(client_id)
+        with self._lock:
+            memory = self._tokens.get(client_id)
+            if memory is not None and (entry is None or memory[1] >= entry[1]):
+                entry = memory
+            elif entry is not None:
+                self._tokens[client_id] = entry
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, client_id, access_token, expires_at):
+        """Store a fresh token. Disk failures are logged, never raised."""
+        entry = (access_token, float(expires_at))
+        with self._lock:
+            self._tokens[client_id] = entry
+            self.refreshes += 1
+        if self.path is None:
+            return
+
+        stored = self._read_file()
+        stored[client_id] = entry
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        key: {"access_token": token, "expires_at": expires}
+                        for key, (token, expires) in stored.items()
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to write app token cache {self.path}: {e}")
+
+    def refresh_lock(self, client_id):
+        """asyncio.Lock serializing refreshes of client_id on the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            locks = self._refresh_locks.setdefault(loop, {})
+            if client_id not in locks:
+                locks[client_id] = asyncio.Lock()
+            return locks[client_id]
+
+    def stats(self):
+        """Return lookup and refresh counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _read_file(self):
+        if self.path is None:
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return {
+                key: (value["access_token"], float(value["expires_at"]))
+                for key, value in data.items()
+            }
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable app token cache {self.path}: {e}")
+            return {}
+
+
+@lru_cache
+def get_app_token_cache() -> AppTokenCache:
+    """Process-wide app token cache, created once then shared."""
+    return AppTokenCache()
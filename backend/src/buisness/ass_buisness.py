@@ -0,0 +1,111 @@
+from PIL import ImageColor, ImageFont
+
+
+class AssBuisness:
+    @staticmethod
+    def seconds_to_ass_time(seconds: float) -> str:
+        """Format seconds as an ASS timestamp (H:MM:SS.cc)."""
+        centis = max(int(round(seconds * 100)), 0)
+        hours, centis = divmod(centis, 360000)
+        minutes, centis = divmod(centis, 6000)
+        secs, centis = divmod(centis, 100)
+        return f"{hours:d}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+    @staticmethod
+    def color_to_ass(color) -> str:
+        """
+        Convert a PIL color (RGB/RGBA tuple or color name) to &HAABBGGRR.
+        ASS alpha is inverted: 00 is opaque, FF is transparent.
+        """
+        if isinstance(color, str):
+            color = ImageColor.getcolor(color, "RGBA")
+        r, g, b = (int(c) for c in color[:3])
+        a = int(color[3]) if len(color) > 3 else 255
+        return f"&H{255 - a:02X}{b:02X}{g:02X}{r:02X}"
+
+    @staticmethod
+    def escape_text(text: str) -> str:
+        """Keep words from being read as override tags or line breaks."""
+        # A zero-width space after a backslash stops sequences like \N or \h
+        return (
+            text.replace("\\", "\\\u200b")
+            .replace("{", "\\{")
+            .replace("}", "\\}")
+            .replace("\n", " ")
+        )
+
+    @staticmethod
+    def font_style(font_path, font_size):
+        """
+        Return (family_name, bold, ass_font_size) for a font file.
+
+        PIL sizes fonts by em; libass sizes them by ascent + descent, so the
+        ASS size is the line height PIL reports at font_size.
+        """
+        font = ImageFont.truetype(font_path, font_size)
+        family, style = font.getname()
+        ascent, descent = font.getmetrics()
+        return family, "bold" in (style or "").lower(), ascent + descent
+
+    @staticmethod
+    def build_ass_script(
+        word_timings,
+        video_size,
+        font_path,
+        font_size,
+        text_color,
+        stroke_color,
+        stroke_width,
+        position_y,
+        fade_duration=0.1,
+    ):
+        """
+        Build an ASS script showing each word centred with its top at position_y.
+
+        Args:
+            word_timings: List of (word, start, end) in seconds
+            video_size: (width, height) of the video, used as script resolution
+            position_y: Top of the words on the frame, in pixels
+
+        Returns:
+            str: Script content
+        """
+        width, height = video_size
+        family, bold, ass_size = AssBuisness.font_style(font_path, font_size)
+        primary = AssBuisness.color_to_ass(text_color)
+        outline = AssBuisness.color_to_ass(stroke_color)
+        fade_ms = int(round(fade_duration * 1000))
+
+        lines = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {width}",
+            f"PlayResY: {height}",
+            "ScaledBorderAndShadow: yes",
+            "WrapStyle: 2",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, "
+            "OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, "
+            "ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+            f"Style: Word,{family},{ass_size},{primary},{primary},{outline},"
+            f"&H00000000,{-1 if bold else 0},0,0,0,100,100,0,0,1,"
+            f"{stroke_width},0,8,0,0,0,1",
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, "
+            "Effect, Text",
+        ]
+
+        for word, start, end in word_timings:
+            if not word or not word.strip() or end <= start:
+                continue
+            lines.append(
+                f"Dialogue: 0,{AssBuisness.seconds_to_ass_time(start)},"
+                f"{AssBuisness.seconds_to_ass_time(end)},Word,,0,0,0,,"
+                f"{{\\an8\\pos({width // 2},{position_y})\\fad({fade_ms},0)}}"
+                f"{AssBuisness.escape_text(word.strip())}"
+            )
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from config.settings import settings
+
+logger = logging.getLogger("HiLiteLogger")
+
+
+class BroadcasterIdCache:
+    """
+    Persistent login -> broadcaster ID map.
+
+    Twitch user IDs never change, so entries do not expire. The map lives in
+    memory and is saved as one JSON file, rewritten atomically whenever new
+    logins are resolved.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: JSON file of the cache (default: BROADCASTER_ID_CACHE_PATH)
+        """
+        self.path = Path(path or settings.BROADCASTER_ID_CACHE_PATH)
+        self._lock = threading.Lock()
+        self._ids = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(login):
+        """Twitch logins are case-insensitive and stored lowercase."""
+        return login.strip().lower()
+
+    def get(self, login):
+        """Return the broadcaster ID of login, or None on a miss."""
+        login = self.normalize(login)
+        with self._lock:
+            broadcaster_id = self._load().get(login)
+            if broadcaster_id is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return broadcaster_id
+
+    def put_many(self, ids):
+        """Add login -> ID pairs and save the file. Disk failures are logged, never raised."""
+        if not ids:
+            return
+        with self._lock:
+            known = self._load()
+            known.update({self.normalize(login): str(i) for login, i in ids.items()})
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                tmp_path.write_text(json.dumps(known, sort_keys=True), encoding="utf-8")
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.warning(f"Failed to write broadcaster ID cache {self.path}: {e}")
+
+    def stats(self):
+        """Return hit/miss counters and the number of known logins."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "items": len(self._load()),
+            }
+
+    def _load(self):
+        """Read the file on first use. Lock held."""
+        if self._ids is None:
+            try:
+                self._ids = json.loads(self.path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                self._ids = {}
+            except Exception as e:
+                logger.warning(
+                    f"Ignoring unreadable broadcaster ID cache {self.path}: {e}"
+                )
+                self._ids = {}
+        return self._ids
+
+
+@lru_cache
+def get_broadcaster_id_cache() -> BroadcasterIdCache:
+    """Process-wide broadcaster ID cache, created once then shared."""
+    return BroadcasterIdCache()
@@ -0,0 +1,151 @@
+import bisect
+import logging
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger("HiLiteLogger")
+
+
+class CaptionLayer:
+    """A caption sprite cropped to its visible bounding box and placed on the frame."""
+
+    __slots__ = ("x0", "y0", "x1", "y1", "inv_alpha", "premult", "fade_ramp")
+
+    def __init__(self, x0, y0, rgba, fade_frames=0):
+        self.x0 = x0
+        self.y0 = y0
+        self.y1 = y0 + rgba.shape[0]
+        self.x1 = x0 + rgba.shape[1]
+
+        # Blend terms computed once: out = region * inv_alpha + premult
+        alpha = rgba[:, :, 3:4].astype(np.float32) / 255.0
+        self.inv_alpha = 1.0 - alpha
+        self.premult = rgba[:, :, :3].astype(np.float32) * alpha
+
+        # Same terms for each frame of the fade-in, alpha scaled by k / fade_frames
+        self.fade_ramp = []
+        for k in range(fade_frames):
+            fade = k / fade_frames
+            self.fade_ramp.append((1.0 - fade * alpha, fade * self.premult))
+
+
+class CaptionCompositor:
+    """
+    Draw word-by-word captions on video frames with a single overlay pass.
+
+    The word schedule is compiled once into layers sorted by start time; each
+    frame looks up the active layers with a binary search and blends only
+    their bounding boxes into the frame.
+    """
+
+    def __init__(self, img_infos, frame_size, position_y, fade_duration=0.1, fps=30):
+        """
+        Args:
+            img_infos: List of (sprite, start, end). A sprite is an RGBA numpy
+                array or the path of an RGBA image, horizontally centred on the
+                frame with its top edge at position_y.
+            frame_size: (width, height) of the video frames
+            position_y: Top of the sprites on the frame, in pixels
+            fade_duration: Length of the fade-in ramp, in seconds
+            fps: Frame rate of the video, sets the steps of the fade-in ramp
+        """
+        self.frame_width, self.frame_height = frame_size
+        self.position_y = position_y
+        self.fade_duration = fade_duration
+        self.fps = fps
+        self._fade_frames = max(int(round(fade_duration * fps)), 0)
+
+        layers_by_sprite = {}
+        schedule = []
+        for sprite, start, end in img_infos:
+            if end <= start:
+                continue
+            sprite_key = sprite if isinstance(sprite, str) else id(sprite)
+            if sprite_key not in layers_by_sprite:
+                layers_by_sprite[sprite_key] = self._build_layer(sprite)
+            layer = layers_by_sprite[sprite_key]
+            if layer is not None:
+                schedule.append((start, end, layer))
+
+        schedule.sort(key=lambda entry: entry[0])
+        self._starts = [start for start, _, _ in schedule]
+        self._ends = [end for _, end, _ in schedule]
+        self._layers = [layer for _, _, layer in schedule]
+        self._max_duration = max(
+            (end - start for start, end, _ in schedule), default=0.0
+        )
+        logger.info(
+            f"Caption compositor compiled {len(schedule)} captions "
+            f"from {len(layers_by_sprite)} distinct sprites"
+        )
+
+    def __len__(self):
+        return len(self._layers)
+
+    def active_indices(self, t):
+        """Indices of the captions visible at time t (start <= t < end), in start order."""
+        # Only captions that started less than the longest duration ago can
+        # still be playing, so the scan stops there.
+        i = bisect.bisect_right(self._starts, t) - 1
+        earliest_start = t - self._max_duration
+        active = []
+        while i >= 0 and self._starts[i] >= earliest_start:
+            if t < self._ends[i]:
+                active.append(i)
+            i -= 1
+        active.reverse()
+        return active
+
+    def composite(self, frame, t):
+        """Return frame with the captions active at time t blended in."""
+        active = self.active_indices(t)
+        if not active:
+            return frame
+
+        # Frames read by MoviePy are read-only views on the decoder buffer
+        frame = np.array(frame)
+        for i in active:
+            layer = self._layers[i]
+            region = frame[layer.y0 : layer.y1, layer.x0 : layer.x1].astype(np.float32)
+
+            step = int((t - self._starts[i]) * self.fps)
+            if step < self._fade_frames:
+                inv_alpha, premult = layer.fade_ramp[step]
+            else:
+                inv_alpha, premult = layer.inv_alpha, layer.premult
+            blended = region * inv_alpha + premult
+
+            frame[layer.y0 : layer.y1, layer.x0 : layer.x1] = blended.astype(np.uint8)
+        return frame
+
+    def apply(self, get_frame, t):
+        """Frame filter with the signature expected by MoviePy's clip.fl()."""
+        return self.composite(get_frame(t), t)
+
+    def _build_layer(self, sprite):
+        """Crop a sprite to its visible pixels and clip it to the frame."""
+        if isinstance(sprite, str):
+            with Image.open(sprite) as img:
+                sprite = np.asarray(img.convert("RGBA"))
+
+        sprite_height, sprite_width = sprite.shape[:2]
+        visible = sprite[:, :, 3] > 0
+        rows = np.flatnonzero(visible.any(axis=1))
+        cols = np.flatnonzero(visible.any(axis=0))
+        if rows.size == 0:
+            return None
+
+        # Same placement as MoviePy's ("center", position_y)
+        left = int((self.frame_width - sprite_width) / 2)
+        top = self.position_y
+
+        x0 = max(left + cols[0], 0)
+        x1 = min(left + cols[-1] + 1, self.frame_width)
+        y0 = max(top + rows[0], 0)
+        y1 = min(top + rows[-1] + 1, self.frame_height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+
+        crop = sprite[y0 - top : y1 - top, x0 - left : x1 - left]
+        return CaptionLayer(x0, y0, crop, self._fade_frames)
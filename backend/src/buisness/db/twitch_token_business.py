@@ -18,7 +18,7 @@ class TwitchTokensBusiness:
         self.supabase = supabase
         self.twitch_token_repository = twitch_token_repository
 
-    def asign_access_token(
+    async def asign_access_token(
         self,
         twitch_api: TwitchApi,
         twitch_tokens_request: TwitchTokensRequest,
@@ -28,7 +28,7 @@ class TwitchTokensBusiness:
         refresh_token = twitch_tokens_request.twitch_refresh_token
         user_id = current_user.id
 
-        is_token_valid_response = twitch_api.is_token_valid(access_token)
+        is_token_valid_response = await twitch_api.ais_token_valid(access_token)
         valid = is_token_valid_response["valid"]
         expires_in = is_token_valid_response["expires_in"]
 
@@ -1,92 +1,447 @@
+import bisect
 import logging
 import os
-import tempfile
+import time
 
-from moviepy.editor import VideoFileClip
+import numpy as np
+
+from buisness.transcription_cache import TranscriptionCache
+from models.transcription_model import Transcription
+from services.ffmpeg_service import FfmpegService
 
 logger = logging.getLogger("HiLiteLogger")
 
+# ffmpeg output arguments per audio format sent to ElevenLabs
+AUDIO_FORMAT_ARGS = {
+    # The container-less AAC stream, copied without re-encoding
+    "aac": ["-c:a", "copy", "-f", "adts"],
+    "mp3": ["-c:a", "libmp3lame", "-q:a", "4", "-f", "mp3"],
+    # Speech only needs a narrow band: mono 16 kHz Opus at 16 kb/s
+    "opus": [
+        "-ac",
+        "1",
+        "-ar",
+        "16000",
+        "-c:a",
+        "libopus",
+        "-b:a",
+        "16k",
+        "-application",
+        "voip",
+        "-f",
+        "ogg",
+    ],
+}
+AUDIO_FORMATS = ("auto", "mp3", "opus")
+
+# Voice activity detection works on 16 kHz mono PCM
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+# Energy is measured in the speech band only, so rumble and hiss count less
+VAD_SPEECH_BAND_HZ = (300, 3400)
+# Frames louder than the noise floor plus this margin are speech; the
+# threshold is kept between the two bounds so a clip that talks throughout
+# (no quiet frames to learn the floor from) is never dropped entirely
+VAD_MARGIN_DB = 10.0
+VAD_THRESHOLD_BOUNDS_DB = (-50.0, -35.0)
+VAD_MIN_SPEECH_MS = 150
+VAD_MIN_SILENCE_MS = 400
+VAD_PADDING_MS = 200
+# Silence kept between condensed regions so words are not glued together
+VAD_GAP_MS = 250
+
 
 class ElevenLabsBuisness:
     @staticmethod
-    def extract_audio_bytes_from_video(video_path):
+    def extract_audio_bytes_ffmpeg(video_path, audio_format="auto"):
         """
-        Extract audio from video file and return as bytes.
+        Extract the audio track with ffmpeg, piped straight into memory.
+
+        No temporary file is written and no video frame is decoded.
 
         Args:
             video_path: Path to the video file
+            audio_format: "auto" stream-copies an AAC track and encodes
+                anything else to MP3; "mp3" always encodes to MP3; "opus"
+                encodes mono 16 kHz Opus in an Ogg container
 
         Returns:
-            bytes: Audio data in MP3 format
+            bytes: Audio data in the selected format
 
         Raises:
             FileNotFoundError: If video file doesn't exist
-            ValueError: If video has no audio track
+            ValueError: If video has no audio track or the format is unknown
             Exception: For other processing errors
         """
-        logger.info(f"Starting audio extraction from: {video_path}")
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(
+                f"Unknown audio format '{audio_format}', expected one of {AUDIO_FORMATS}"
+            )
 
-        # Verify file exists
         if not os.path.exists(video_path):
             logger.error(f"Video file not found: {video_path}")
             raise FileNotFoundError(f"Video file not found: {video_path}")
 
-        video = None
-        tmp = None
+        started = time.perf_counter()
+        ffmpeg = FfmpegService()
+        codec = ffmpeg.audio_codec(video_path)
+        if codec is None:
+            logger.error(f"Video has no audio track: {video_path}")
+            raise ValueError(f"Video has no audio track: {video_path}")
+
+        output_format = audio_format
+        if audio_format == "auto":
+            output_format = "aac" if codec == "aac" else "mp3"
 
         try:
-            # Load video
-            video = VideoFileClip(video_path)
-            logger.info(f"Video loaded successfully, duration: {video.duration}s")
-
-            # Check if video has audio
-            if video.audio is None:
-                logger.error(f"Video has no audio track: {video_path}")
-                raise ValueError(f"Video has no audio track: {video_path}")
-
-            # Create temporary file
-            tmp = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-            tmp_path = tmp.name
-            tmp.close()
-            logger.info(f"Created temporary audio file: {tmp_path}")
-
-            # Extract audio
-            video.audio.write_audiofile(tmp_path, logger=None)
-            logger.info("Audio extraction completed")
-
-            # Read audio bytes
-            with open(tmp_path, "rb") as f:
-                audio_bytes = f.read()
-
-            logger.info(
-                f"Audio bytes read successfully, size: {len(audio_bytes)} bytes"
+            audio_bytes = ffmpeg.run(
+                [
+                    "-i",
+                    video_path,
+                    "-vn",
+                    "-map",
+                    "0:a:0",
+                    *AUDIO_FORMAT_ARGS[output_format],
+                    "pipe:1",
+                ]
             )
-            return audio_bytes
-
-        except FileNotFoundError:
-            raise
-        except ValueError:
-            raise
         except Exception as e:
             logger.error(f"Failed to extract audio from video: {e}")
             raise Exception(f"Failed to extract audio: {e}") from e
 
-        finally:
-            # Cleanup resources
-            try:
-                if video:
-                    if video.audio:
-                        video.audio.close()
-                    video.close()
-                    logger.info("Video resources closed")
-            except Exception as e:
-                logger.warning(f"Error closing video resources: {e}")
-
-            # Remove temporary file
-            if tmp:
-                try:
-                    if os.path.exists(tmp_path):
-                        os.remove(tmp_path)
-                        logger.info("Temporary audio file removed")
-                except Exception as e:
-                    logger.warning(f"Error removing temporary file: {e}")
+        logger.info(
+            f"Extracted {codec} audio as {output_format} from {video_path}: "
+            f"{len(audio_bytes)} bytes in {time.perf_counter() - started:.2f}s"
+        )
+        return audio_bytes
+
+    @staticmethod
+    def decode_pcm(video_path, sample_rate=VAD_SAMPLE_RATE):
+        """Decode the first audio track to mono float32 samples in [-1, 1]."""
+        raw = FfmpegService().run(
+            [
+                "-i",
+                video_path,
+                "-vn",
+                "-map",
+                "0:a:0",
+                "-ac",
+                "1",
+                "-ar",
+                str(sample_rate),
+                "-f",
+                "s16le",
+                "pipe:1",
+            ]
+        )
+        return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+
+    @staticmethod
+    def speech_band_levels(samples, sample_rate=VAD_SAMPLE_RATE):
+        """Level in dBFS of each VAD_FRAME_MS frame, measured in the speech band."""
+        frame_len = int(sample_rate * VAD_FRAME_MS / 1000)
+        n_frames = len(samples) // frame_len
+        if n_frames == 0:
+            return np.empty(0, dtype=np.float32)
+
+        frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len)
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame_len), axis=1)) ** 2
+        freqs = np.fft.rfftfreq(frame_len, 1 / sample_rate)
+        low, high = VAD_SPEECH_BAND_HZ
+        band = (freqs >= low) & (freqs <= high)
+        band_ratio = spectrum[:, band].sum(axis=1) / np.maximum(
+            spectrum.sum(axis=1), 1e-12
+        )
+        power = (frames**2).mean(axis=1) * band_ratio
+        return 10 * np.log10(power + 1e-12)
+
+    @staticmethod
+    def detect_speech_regions(samples, sample_rate=VAD_SAMPLE_RATE):
+        """
+        Find speech with a speech-band energy detector.
+
+        Returns:
+            list: (start, end) regions in seconds, padded and merged
+        """
+        level_db = ElevenLabsBuisness.speech_band_levels(samples, sample_rate)
+        if level_db.size == 0:
+            return []
+
+        threshold = np.clip(
+            np.percentile(level_db, 10) + VAD_MARGIN_DB, *VAD_THRESHOLD_BOUNDS_DB
+        )
+        speech = level_db > threshold
+
+        # Runs of speech frames, as [start_frame, end_frame)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], speech, [0]))))
+        runs = edges.reshape(-1, 2).tolist()
+
+        frame_s = VAD_FRAME_MS / 1000
+        merged = []
+        for start, end in runs:
+            if merged and (start - merged[-1][1]) * frame_s < VAD_MIN_SILENCE_MS / 1000:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+
+        duration = len(samples) / sample_rate
+        padding = VAD_PADDING_MS / 1000
+        regions = []
+        for start, end in merged:
+            if (end - start) * frame_s < VAD_MIN_SPEECH_MS / 1000:
+                continue
+            region_start = max(start * frame_s - padding, 0.0)
+            region_end = min(end * frame_s + padding, duration)
+            if regions and region_start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], region_end)
+            else:
+                regions.append((region_start, region_end))
+        return regions
+
+    @staticmethod
+    def condense_regions(samples, regions, sample_rate=VAD_SAMPLE_RATE):
+        """
+        Concatenate the speech regions with a short silence between them.
+
+        Returns:
+            tuple: (condensed samples, offset map). The offset map is a list
+            of (condensed_start, original_start, duration) in seconds.
+        """
+        gap = np.zeros(int(sample_rate * VAD_GAP_MS / 1000), dtype=samples.dtype)
+        parts = []
+        offset_map = []
+        position = 0
+        for index, (start, end) in enumerate(regions):
+            if index:
+                parts.append(gap)
+                position += len(gap)
+            chunk = samples[int(start * sample_rate) : int(end * sample_rate)]
+            offset_map.append(
+                (
+                    position / sample_rate,
+                    int(start * sample_rate) / sample_rate,
+                    len(chunk) / sample_rate,
+                )
+            )
+            parts.append(chunk)
+            position += len(chunk)
+
+        condensed = np.concatenate(parts) if parts else samples[:0]
+        return condensed, offset_map
+
+    @staticmethod
+    def remap_timestamp(t, offset_map):
+        """Map a time of the condensed audio back onto the original timeline."""
+        if not offset_map:
+            return t
+        starts = [condensed_start for condensed_start, _, _ in offset_map]
+        index = max(bisect.bisect_right(starts, t) - 1, 0)
+        condensed_start, original_start, duration = offset_map[index]
+        # Times inside an inserted gap stick to the end of the previous region
+        return original_start + min(max(t - condensed_start, 0.0), duration)
+
+    @staticmethod
+    def remap_transcription(transcription, offset_map):
+        """Return a Transcription with word times on the original timeline."""
+        transcription = TranscriptionCache.to_model(transcription)
+        words = [
+            word.model_copy(
+                update={
+                    "start": ElevenLabsBuisness.remap_timestamp(word.start, offset_map),
+                    "end": ElevenLabsBuisness.remap_timestamp(word.end, offset_map),
+                }
+            )
+            for word in transcription.words
+        ]
+        return transcription.model_copy(update={"words": words})
+
+    @staticmethod
+    def encode_pcm(samples, audio_format="opus", sample_rate=VAD_SAMPLE_RATE):
+        """Encode mono float samples to "opus" or "mp3" bytes through an ffmpeg pipe."""
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        return FfmpegService().run(
+            [
+                "-f",
+                "s16le",
+                "-ar",
+                str(sample_rate),
+                "-ac",
+                "1",
+                "-i",
+                "pipe:0",
+                *AUDIO_FORMAT_ARGS[audio_format],
+                "pipe:1",
+            ],
+            input_bytes=pcm,
+        )
+
+    @staticmethod
+    def plan_chunks(
+        samples, chunk_seconds, overlap_seconds, sample_rate=VAD_SAMPLE_RATE
+    ):
+        """
+        Split long audio into overlapping chunks cut at quiet frames.
+
+        Each cut is placed on the quietest frame of the last quarter before
+        the chunk_seconds mark. A chunk owns the audio between its two cuts
+        and is extended by overlap_seconds on both sides, so a word cut at a
+        boundary is heard whole by at least one chunk.
+
+        Returns:
+            list: (start, end, own_start, own_end) in seconds
+
+        Raises:
+            ValueError: If chunk_seconds is shorter than one VAD frame
+        """
+        frame_s = VAD_FRAME_MS / 1000
+        if chunk_seconds < frame_s:
+            raise ValueError(
+                f"chunk_seconds must be at least one {VAD_FRAME_MS} ms frame, "
+                f"got {chunk_seconds}"
+            )
+        duration = len(samples) / sample_rate
+        if duration <= chunk_seconds:
+            return [(0.0, duration, 0.0, duration)]
+
+        level_db = ElevenLabsBuisness.speech_band_levels(samples, sample_rate)
+        chunk_frames = int(chunk_seconds / frame_s)
+        cut_frames = [0]
+        while duration - cut_frames[-1] * frame_s > chunk_seconds:
+            # At least one frame, always past the previous cut
+            window_start = cut_frames[-1] + max(int(chunk_frames * 0.75), 1)
+            if window_start >= len(level_db):
+                break
+            window_end = min(cut_frames[-1] + chunk_frames, len(level_db))
+            window_end = max(window_end, window_start + 1)
+            quietest = window_start + int(np.argmin(level_db[window_start:window_end]))
+            cut_frames.append(quietest)
+        cuts = [cut * frame_s for cut in cut_frames] + [duration]
+
+        return [
+            (
+                max(own_start - overlap_seconds, 0.0),
+                min(own_end + overlap_seconds, duration),
+                own_start,
+                own_end,
+            )
+            for own_start, own_end in zip(cuts, cuts[1:])
+        ]
+
+    @staticmethod
+    def merge_chunk_transcriptions(chunk_results):
+        """
+        Merge per-chunk transcriptions into one on the source timeline.
+
+        Args:
+            chunk_results: List of ((start, end, own_start, own_end), transcription)
+                as planned by plan_chunks, in order
+
+        Returns:
+            Transcription: Words shifted by their chunk start; a word is kept by
+            the chunk owning its midpoint, and a repeated word overlapping the
+            previous one is dropped.
+        """
+        words = []
+        language_code = None
+        last_index = len(chunk_results) - 1
+        for index, ((start, _, own_start, own_end), transcription) in enumerate(
+            chunk_results
+        ):
+            transcription = TranscriptionCache.to_model(transcription)
+            language_code = language_code or transcription.language_code
+            for word in transcription.words:
+                word = word.model_copy(
+                    update={"start": word.start + start, "end": word.end + start}
+                )
+                middle = (word.start + word.end) / 2
+                if middle < own_start and index > 0:
+                    continue
+                if middle >= own_end and index < last_index:
+                    continue
+                words.append(word)
+
+        words.sort(key=lambda word: word.start)
+        merged = []
+        previous = None
+        for word in words:
+            if word.type == "spacing":
+                merged.append(word)
+                continue
+            if (
+                previous is not None
+                and word.text.casefold() == previous.text.casefold()
+                and word.start < previous.end
+            ):
+                continue
+            merged.append(word)
+            previous = word
+
+        # Drop spacing left without a word on one side
+        while merged and merged[-1].type == "spacing":
+            merged.pop()
+        merged = [
+            word
+            for index, word in enumerate(merged)
+            if word.type != "spacing"
+            or (index > 0 and merged[index - 1].type != "spacing")
+        ]
+        while merged and merged[0].type == "spacing":
+            merged.pop(0)
+
+        separator = "" if any(word.type == "spacing" for word in merged) else " "
+        return Transcription(
+            language_code=language_code,
+            text=separator.join(word.text for word in merged),
+            words=merged,
+        )
+
+    @staticmethod
+    def extract_speech_audio_bytes(video_path, audio_format="opus"):
+        """
+        Extract only the speech of the audio track, condensed into one buffer.
+
+        Args:
+            video_path: Path to the video file
+            audio_format: "opus" or "mp3"; the PCM is re-encoded either way,
+                "auto" encodes to MP3
+
+        Returns:
+            tuple: (audio bytes, offset map), or (None, []) when no speech
+            was detected. See condense_regions for the offset map.
+
+        Raises:
+            FileNotFoundError: If video file doesn't exist
+            ValueError: If video has no audio track or the format is unknown
+        """
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(
+                f"Unknown audio format '{audio_format}', expected one of {AUDIO_FORMATS}"
+            )
+        if not os.path.exists(video_path):
+            logger.error(f"Video file not found: {video_path}")
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+
+        started = time.perf_counter()
+        ffmpeg = FfmpegService()
+        if ffmpeg.audio_codec(video_path) is None:
+            logger.error(f"Video has no audio track: {video_path}")
+            raise ValueError(f"Video has no audio track: {video_path}")
+
+        samples = ElevenLabsBuisness.decode_pcm(video_path)
+        regions = ElevenLabsBuisness.detect_speech_regions(samples)
+        total = len(samples) / VAD_SAMPLE_RATE
+        if not regions:
+            logger.info(f"No speech detected in {video_path} ({total:.1f}s of audio)")
+            return None, []
+
+        condensed, offset_map = ElevenLabsBuisness.condense_regions(samples, regions)
+        output_format = "opus" if audio_format == "opus" else "mp3"
+        audio_bytes = ElevenLabsBuisness.encode_pcm(condensed, output_format)
+
+        logger.info(
+            f"Kept {len(regions)} speech regions of {video_path}: "
+            f"{len(condensed) / VAD_SAMPLE_RATE:.1f}s of {total:.1f}s, "
+            f"{len(audio_bytes)} bytes of {output_format} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return audio_bytes, offset_map
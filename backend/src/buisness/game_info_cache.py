@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from config.settings import settings
+
+
+class GameInfoCache:
+    """
+    In-memory cache of Helix game metadata, keyed by game_id.
+
+    Entries expire ttl_seconds after they were stored; past max_entries the
+    least recently used one is dropped. A few games cover most clips, so a
+    small cache answers nearly every lookup.
+    """
+
+    def __init__(self, max_entries=None, ttl_seconds=None, clock=time.monotonic):
+        """
+        Args:
+            max_entries: Size bound (default: GAME_INFO_CACHE_MAX_ENTRIES)
+            ttl_seconds: Lifetime of an entry (default: GAME_INFO_CACHE_TTL_SECONDS)
+            clock: Monotonic time source, replaced in tests
+        """
+        self.max_entries = max_entries or settings.GAME_INFO_CACHE_MAX_ENTRIES
+        if ttl_seconds is None:
+            ttl_seconds = settings.GAME_INFO_CACHE_TTL_SECONDS
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, game_id):
+        """Return the cached game info for game_id, or None on a miss."""
+        game_id = str(game_id)
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[game_id]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(game_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, game_id, game_info):
+        """Store game info and evict least recently used entries past max_entries."""
+        game_id = str(game_id)
+        with self._lock:
+            self._entries[game_id] = (self.clock() + self.ttl_seconds, game_info)
+            self._entries.move_to_end(game_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return game_info
+
+    def stats(self):
+        """Return hit/miss/expiration/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "items": len(self._entries),
+            }
+
+
+@lru_cache
+def get_game_info_cache() -> GameInfoCache:
+    """Process-wide game metadata cache, created once then shared."""
+    return GameInfoCache()
@@ -0,0 +1,91 @@
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from config.settings import settings
+
+logger = logging.getLogger("HiLiteLogger")
+
+
+class JobWorkspace:
+    """
+    Private directories of one clip job, removed when the job ends.
+
+    Every file a job works on (downloaded clip, caption temp files,
+    subtitled output while it renders) lives under its own directories, so
+    several jobs can run at once on one host. Intermediates can go to tmpfs
+    (/dev/shm) to spare the disk; the output stays under root. Whatever must
+    outlive the job has to be moved out before cleanup.
+
+    Use as a context manager: directories are created on entry and deleted
+    on exit, unless keep is set.
+    """
+
+    def __init__(self, job_id=None, root=None, use_tmpfs=None, keep=False):
+        """
+        Args:
+            job_id: Name of the job directories (default: random)
+            root: Parent of job directories (default: JOB_WORKSPACE_DIR)
+            use_tmpfs: Put intermediates under JOB_WORKSPACE_TMPFS_DIR
+                (default: JOB_WORKSPACE_USE_TMPFS)
+            keep: Leave the directories in place on exit (debug)
+        """
+        self.job_id = str(job_id or uuid.uuid4().hex[:12])
+        self.path = Path(root or settings.JOB_WORKSPACE_DIR) / self.job_id
+        if use_tmpfs is None:
+            use_tmpfs = settings.JOB_WORKSPACE_USE_TMPFS
+        self.scratch_path = self.path / "scratch"
+        if use_tmpfs:
+            tmpfs_dir = Path(settings.JOB_WORKSPACE_TMPFS_DIR)
+            if _is_writable(tmpfs_dir):
+                self.scratch_path = tmpfs_dir / self.job_id
+            else:
+                logger.warning(f"{tmpfs_dir} is not writable, intermediates on disk")
+        self.keep = keep
+
+    @property
+    def download_dir(self):
+        return self.scratch_path / "download"
+
+    @property
+    def caption_temp_dir(self):
+        return self.scratch_path / "captions"
+
+    @property
+    def output_dir(self):
+        return self.path / "output"
+
+    def create(self):
+        for directory in (
+            self.download_dir,
+            self.caption_temp_dir,
+            self.output_dir,
+        ):
+            directory.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Job {self.job_id} workspace: {self.path}")
+        return self
+
+    def cleanup(self):
+        """Delete every file of the job."""
+        shutil.rmtree(self.scratch_path, ignore_errors=True)
+        shutil.rmtree(self.path, ignore_errors=True)
+        logger.info(f"Job {self.job_id} workspace removed")
+
+    def __enter__(self):
+        return self.create()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self.keep:
+            self.cleanup()
+        return False
+
+
+def _is_writable(directory):
+    """Create directory if needed and tell whether files can be written in it."""
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return False
+    return os.access(directory, os.W_OK)
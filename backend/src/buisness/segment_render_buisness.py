@@ -0,0 +1,205 @@
+import csv
+import logging
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from moviepy.editor import VideoFileClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from buisness.caption_compositor import CaptionCompositor
+from buisness.word_sprite_cache import WordSpriteCache
+from services.ffmpeg_service import FfmpegService
+
+logger = logging.getLogger("HiLiteLogger")
+
+# Segments shorter than this cost more in process start-up than they save
+MIN_SEGMENT_SECONDS = 2.0
+
+
+class SegmentRenderBuisness:
+    """
+    Render one clip's captions on several cores.
+
+    The source video is cut at keyframes with a stream copy, each segment is
+    composited and encoded in its own process with only the words that
+    overlap it, then the encoded segments are joined with a stream-copy
+    concat and the original audio is muxed back.
+    """
+
+    @staticmethod
+    def split_at_keyframes(video_path, segment_dir, segment_duration):
+        """
+        Cut the video stream into segments starting on keyframes.
+
+        Returns:
+            list: (segment_path, start, end) in source timeline seconds
+        """
+        list_path = os.path.join(segment_dir, "segments.csv")
+        FfmpegService().run(
+            [
+                "-i",
+                os.path.abspath(video_path),
+                "-map",
+                "0:v:0",
+                "-c",
+                "copy",
+                "-f",
+                "segment",
+                "-segment_time",
+                f"{segment_duration:.3f}",
+                "-reset_timestamps",
+                "1",
+                "-segment_list",
+                list_path,
+                "-segment_list_type",
+                "csv",
+                os.path.join(segment_dir, "source_%04d.mp4"),
+            ]
+        )
+
+        segments = []
+        with open(list_path, newline="", encoding="utf-8") as f:
+            for filename, start, end in csv.reader(f):
+                segments.append(
+                    (os.path.join(segment_dir, filename), float(start), float(end))
+                )
+        return segments
+
+    @staticmethod
+    def words_for_segment(sprite_timings, start, end):
+        """Captions overlapping [start, end), shifted onto the segment's timeline."""
+        return [
+            (sprite_key, word_start - start, word_end - start)
+            for sprite_key, word_start, word_end in sprite_timings
+            if word_start < end and word_end > start
+        ]
+
+    @staticmethod
+    def render_parallel(
+        video_path,
+        sprite_timings,
+        output_path,
+        sprite_cache,
+        position_y_ratio=0.80,
+        temp_dir="tmp/subtitles_temp",
+        workers=2,
+    ):
+        """
+        Composite captions over keyframe-aligned segments in a process pool.
+
+        Args:
+            sprite_timings: List of (sprite_key, start, end) on the source
+                timeline. Sprites must already be in sprite_cache, whose disk
+                tier is read by the workers.
+            workers: Number of processes; segments are sized so each worker
+                gets about two of them
+        """
+        started = time.perf_counter()
+        infos = ffmpeg_parse_infos(video_path)
+        segment_duration = max(infos["duration"] / (workers * 2), MIN_SEGMENT_SECONDS)
+
+        segment_dir = os.path.join(temp_dir, f"segments_{uuid.uuid4().hex}")
+        os.makedirs(segment_dir, exist_ok=True)
+        try:
+            segments = SegmentRenderBuisness.split_at_keyframes(
+                video_path, segment_dir, segment_duration
+            )
+            logger.info(
+                f"Split {video_path} into {len(segments)} segments "
+                f"for {workers} workers"
+            )
+
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            tasks = [
+                {
+                    "segment_path": segment_path,
+                    "output_path": os.path.join(
+                        segment_dir, f"captioned_{index:04d}.mp4"
+                    ),
+                    "sprite_timings": SegmentRenderBuisness.words_for_segment(
+                        sprite_timings, start, end
+                    ),
+                    "sprite_cache_dir": str(sprite_cache.cache_dir),
+                    "position_y_ratio": position_y_ratio,
+                    "fps": infos["video_fps"],
+                    "threads": threads,
+                }
+                for index, (segment_path, start, end) in enumerate(segments)
+            ]
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rendered = list(pool.map(_render_segment, tasks))
+
+            SegmentRenderBuisness.concat_with_audio(
+                rendered, video_path, output_path, segment_dir
+            )
+            logger.info(
+                f"Rendered {len(segments)} segments with {workers} workers "
+                f"in {time.perf_counter() - started:.1f}s: {output_path}"
+            )
+            return output_path
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    @staticmethod
+    def concat_with_audio(segment_paths, source_path, output_path, segment_dir):
+        """Join encoded segments without re-encoding and mux the source audio."""
+        list_path = os.path.join(segment_dir, "concat.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        FfmpegService().run(
+            [
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                list_path,
+                "-i",
+                os.path.abspath(source_path),
+                "-map",
+                "0:v:0",
+                "-map",
+                "1:a?",
+                "-c",
+                "copy",
+                os.path.abspath(output_path),
+            ]
+        )
+        return output_path
+
+
+def _render_segment(task):
+    """Process pool entry point: composite and encode one segment."""
+    sprite_cache = WordSpriteCache(cache_dir=task["sprite_cache_dir"])
+    img_infos = []
+    for sprite_key, start, end in task["sprite_timings"]:
+        sprite = sprite_cache.get(sprite_key)
+        if sprite is None:
+            logger.warning(f"Sprite {sprite_key} missing from cache, skipping word")
+            continue
+        img_infos.append((sprite, start, end))
+
+    video = VideoFileClip(task["segment_path"], audio=False)
+    try:
+        pos_y = int(video.h * task["position_y_ratio"])
+        compositor = CaptionCompositor(
+            img_infos, video.size, pos_y, fade_duration=0.1, fps=task["fps"]
+        )
+        video.fl(compositor.apply).write_videofile(
+            task["output_path"],
+            codec="libx264",
+            fps=task["fps"],
+            audio=False,
+            threads=task["threads"],
+            logger=None,
+        )
+    finally:
+        video.close()
+    return task["output_path"]
@@ -0,0 +1,207 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config.settings import settings
+
+logger = logging.getLogger("HiLiteLogger")
+
+# Marks the end of the items in a queue
+_STOP = object()
+
+
+class Stage:
+    """
+    One step of a StagedPipeline.
+
+    func takes the item produced by the previous stage and returns the item
+    for the next one. With processes=True it runs in a pool of `workers`
+    processes (CPU-bound work), so func, its input and its output must be
+    picklable; otherwise it runs in `workers` threads (I/O-bound work).
+    Worker processes are spawned, not forked, so they never inherit a lock
+    held by one of the pipeline's threads; func must be importable.
+    """
+
+    def __init__(self, name, func, workers=1, processes=False):
+        # Without a worker nothing drains the stage's queue and run() hangs
+        if workers < 1:
+            raise ValueError(f"Stage {name} needs at least 1 worker, got {workers}")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.processes = processes
+
+
+class _StageStats:
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+
+
+class StagedPipeline:
+    """
+    Run items through stages that work concurrently.
+
+    Stages are linked by bounded queues: a stage that falls behind fills its
+    input queue, which blocks the stage before it instead of piling up
+    work in memory. Once every stage is busy, the batch moves at the pace
+    of the slowest stage. An item whose stage raises is dropped, reported
+    to on_error, and the others carry on.
+    """
+
+    def __init__(self, stages, queue_size=None, on_error=None):
+        """
+        Args:
+            stages: Stage list, in order
+            queue_size: Items waiting between two stages (default: PIPELINE_QUEUE_SIZE)
+            on_error: Optional callable(item, stage_name, exception), called
+                from the failing stage's worker
+        """
+        self.stages = stages
+        self.queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._stats = {stage.name: _StageStats() for stage in stages}
+        self._queues = []
+        self._started = None
+        self._finished = None
+
+    def run(self, items):
+        """
+        Feed items through every stage and wait for the last one.
+
+        Returns:
+            list: Outputs of the last stage, in completion order
+        """
+        self._started = time.perf_counter()
+        self._finished = None
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        # Nothing downstream of the last stage, its output is never bounded
+        self._queues.append(queue.Queue())
+
+        threads = []
+        pools = []
+        for index, stage in enumerate(self.stages):
+            pool = None
+            if stage.processes:
+                pool = ProcessPoolExecutor(
+                    max_workers=stage.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                pools.append(pool)
+            remaining = [stage.workers]
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, index, pool, remaining),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                self._queues[0].put(item)
+        finally:
+            self._queues[0].put(_STOP)
+
+        results = []
+        while (result := self._queues[-1].get()) is not _STOP:
+            results.append(result)
+        for thread in threads:
+            thread.join()
+        for pool in pools:
+            pool.shutdown()
+
+        self._finished = time.perf_counter()
+        logger.info(f"Pipeline finished: {self.stats()}")
+        return results
+
+    def stats(self):
+        """
+        Per-stage counters; safe to call from another thread while running.
+
+        throughput is items per second over the run so far, utilization the
+        share of that time the stage's workers were busy, queue_* the depth
+        of the stage's input queue seen by its workers.
+        """
+        if self._started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished or time.perf_counter()) - self._started
+        with self._lock:
+            stages = {}
+            for index, stage in enumerate(self.stages):
+                s = self._stats[stage.name]
+                stages[stage.name] = {
+                    "workers": stage.workers,
+                    "processed": s.processed,
+                    "failed": s.failed,
+                    "throughput": s.processed / elapsed if elapsed else 0.0,
+                    "utilization": (
+                        s.busy_seconds / (elapsed * stage.workers) if elapsed else 0.0
+                    ),
+                    "queue_depth": (self._queues[index].qsize() if self._queues else 0),
+                    "queue_max": s.max_depth,
+                    "queue_avg": (
+                        s.depth_total / s.depth_samples if s.depth_samples else 0.0
+                    ),
+                }
+            last = self._stats[self.stages[-1].name].processed if self.stages else 0
+        return {
+            "elapsed": elapsed,
+            "completed": last,
+            "throughput": last / elapsed if elapsed else 0.0,
+            "stages": stages,
+        }
+
+    def _work(self, stage, index, pool, remaining):
+        inbox, outbox = self._queues[index], self._queues[index + 1]
+        stats = self._stats[stage.name]
+        while True:
+            depth = inbox.qsize()
+            item = inbox.get()
+            if item is _STOP:
+                # Let the stage's other workers see it too
+                inbox.put(_STOP)
+                with self._lock:
+                    remaining[0] -= 1
+                    last_worker = remaining[0] == 0
+                if last_worker:
+                    outbox.put(_STOP)
+                return
+
+            with self._lock:
+                stats.depth_samples += 1
+                stats.depth_total += depth
+                stats.max_depth = max(stats.max_depth, depth)
+            started = time.perf_counter()
+            try:
+                if pool is None:
+                    result = stage.func(item)
+                else:
+                    result = pool.submit(stage.func, item).result()
+            except Exception as e:
+                with self._lock:
+                    stats.failed += 1
+                    stats.busy_seconds += time.perf_counter() - started
+                logger.error(f"Pipeline stage {stage.name} failed: {e}")
+                if self.on_error is not None:
+                    try:
+                        self.on_error(item, stage.name, e)
+                    except Exception as handler_error:
+                        logger.error(f"Pipeline error handler failed: {handler_error}")
+                continue
+
+            with self._lock:
+                stats.processed += 1
+                stats.busy_seconds += time.perf_counter() - started
+            outbox.put(result)
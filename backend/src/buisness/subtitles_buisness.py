@@ -1,17 +1,36 @@
 import logging
 import os
 import shutil
+import uuid
+from functools import lru_cache
 
+import numpy as np
 import pysrt
-from moviepy.editor import CompositeVideoClip, ImageClip, VideoFileClip
+from moviepy.editor import VideoFileClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 from PIL import Image, ImageDraw, ImageFont
 
+from buisness.ass_buisness import AssBuisness
+from buisness.caption_compositor import CaptionCompositor
+from buisness.segment_render_buisness import SegmentRenderBuisness
+from buisness.word_sprite_cache import get_word_sprite_cache
+from config.settings import settings
+from services.ffmpeg_service import FfmpegService
+
 logger = logging.getLogger("HiLiteLogger")
 
+RENDER_BACKENDS = ("moviepy", "ass")
+
+
+@lru_cache(maxsize=16)
+def _load_font(font_path, font_size):
+    """Fonts are parsed once per (path, size) instead of once per word."""
+    return ImageFont.truetype(font_path, font_size)
+
 
 class SubtitlesBuisness:
     @staticmethod
-    def generate_word_image(
+    def render_word_sprite(
         word,
         font_path,
         font_size,
@@ -20,9 +39,14 @@ class SubtitlesBuisness:
         stroke_width,
         width=1280,
         height=130,
-        img_path="word.png",
+        sprite_cache=None,
     ):
-        """Generate an image for a single word with specified styling."""
+        """
+        Rasterize a single word into an RGBA numpy array.
+
+        When a WordSpriteCache is given, the sprite is looked up by content
+        address first and only rasterized on a miss.
+        """
         # Skip empty words
         if not word or not word.strip():
             logger.warning("Skipping empty word for image generation")
@@ -33,10 +57,26 @@ class SubtitlesBuisness:
             logger.error(f"Font file not found: {font_path}")
             raise FileNotFoundError(f"Font file not found: {font_path}")
 
+        key = None
+        if sprite_cache is not None:
+            key = sprite_cache.make_key(
+                word,
+                font_path,
+                font_size,
+                text_color,
+                stroke_color,
+                stroke_width,
+                width,
+                height,
+            )
+            sprite = sprite_cache.get(key)
+            if sprite is not None:
+                return sprite
+
         try:
             img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
             draw = ImageDraw.Draw(img)
-            font = ImageFont.truetype(font_path, font_size)
+            font = _load_font(font_path, font_size)
             bbox = draw.textbbox((0, 0), word, font=font, stroke_width=stroke_width)
             w = bbox[2] - bbox[0]
             draw.text(
@@ -47,8 +87,6 @@ class SubtitlesBuisness:
                 stroke_width=stroke_width,
                 stroke_fill=stroke_color,
             )
-            img.save(img_path)
-            return os.path.normpath(img_path)
         except OSError as e:
             logger.error(f"Failed to load font {font_path}: {e}")
             raise
@@ -56,6 +94,46 @@ class SubtitlesBuisness:
             logger.error(f"Failed to generate word image for '{word}': {e}")
             raise
 
+        sprite = np.asarray(img)
+        if sprite_cache is not None:
+            sprite = sprite_cache.put(key, sprite)
+        return sprite
+
+    @staticmethod
+    def generate_word_image(
+        word,
+        font_path,
+        font_size,
+        text_color,
+        stroke_color,
+        stroke_width,
+        width=1280,
+        height=130,
+        img_path="word.png",
+        sprite_cache=None,
+    ):
+        """Generate an image for a single word with specified styling."""
+        sprite = SubtitlesBuisness.render_word_sprite(
+            word,
+            font_path,
+            font_size,
+            text_color,
+            stroke_color,
+            stroke_width,
+            width,
+            height,
+            sprite_cache,
+        )
+        if sprite is None:
+            return None
+
+        try:
+            Image.fromarray(sprite, "RGBA").save(img_path)
+            return os.path.normpath(img_path)
+        except Exception as e:
+            logger.error(f"Failed to generate word image for '{word}': {e}")
+            raise
+
     @staticmethod
     def get_word_timings_from_subtitle(sub):
         """Calculate timing for each word in a subtitle."""
@@ -84,21 +162,159 @@ class SubtitlesBuisness:
             for i, word in enumerate(words)
         ]
 
+    @staticmethod
+    def get_word_timings(subs):
+        """Flatten subtitles into a list of (word, start, end)."""
+        word_timings = []
+        for sub in subs:
+            word_timings.extend(SubtitlesBuisness.get_word_timings_from_subtitle(sub))
+        return word_timings
+
+    @staticmethod
+    def get_word_timings_from_transcription(words):
+        """
+        Build the caption schedule straight from ElevenLabs transcription words.
+
+        Keeps each word's own start/end. Spacing entries, blank text and words
+        without timestamps are dropped; audio events such as "(rires)" are
+        kept, as in the SRT export.
+        """
+        word_timings = []
+        for word in words:
+            if getattr(word, "type", "word") == "spacing":
+                continue
+            text = (word.text or "").strip()
+            if not text or word.start is None or word.end is None:
+                continue
+            if word.end <= word.start:
+                continue
+            word_timings.append((text, word.start, word.end))
+        return word_timings
+
+    @staticmethod
+    def cache_word_sprites(
+        word_timings,
+        font_path,
+        font_size,
+        text_color,
+        stroke_color,
+        stroke_width,
+        sprite_cache,
+    ):
+        """
+        Make sure every word has a sprite in the cache's disk tier.
+
+        Returns a list of (sprite_key, start, end), for renderers that load
+        sprites from the cache in another process.
+        """
+        sprite_timings = []
+        for word, word_start, word_end in word_timings:
+            try:
+                sprite = SubtitlesBuisness.render_word_sprite(
+                    word,
+                    font_path,
+                    font_size,
+                    text_color,
+                    stroke_color,
+                    stroke_width,
+                    1280,
+                    130,
+                    sprite_cache,
+                )
+            except Exception as e:
+                logger.warning(f"Skipping word '{word}' due to error: {e}")
+                continue
+            if sprite is None:
+                continue
+
+            key = sprite_cache.make_key(
+                word,
+                font_path,
+                font_size,
+                text_color,
+                stroke_color,
+                stroke_width,
+                1280,
+                130,
+            )
+            # A memory hit does not guarantee the PNG is still on disk
+            if not sprite_cache.disk_path(key).exists():
+                sprite_cache.put(key, sprite)
+            sprite_timings.append((key, word_start, word_end))
+
+        logger.info(f"Cached {len(sprite_timings)} word sprites for parallel render")
+        return sprite_timings
+
     @staticmethod
     def generate_subtitle_images(
-        subs, font_path, font_size, text_color, stroke_color, stroke_width, temp_dir
+        subs,
+        font_path,
+        font_size,
+        text_color,
+        stroke_color,
+        stroke_width,
+        temp_dir,
+        sprite_cache=None,
+        in_memory=False,
     ):
-        """Generate all word images for subtitles and return list of (img_path, start, end)."""
+        """
+        Generate all word images for subtitles.
+
+        Returns a list of (img_path, start, end), or (sprite, start, end) with
+        RGBA numpy sprites when in_memory is True. In that mode nothing is
+        written to temp_dir, and repeated words share the same cached array.
+        """
         logger.info(f"Starting image generation for {len(subs)} subtitles")
-        os.makedirs(temp_dir, exist_ok=True)
+        return SubtitlesBuisness.generate_word_images(
+            SubtitlesBuisness.get_word_timings(subs),
+            font_path,
+            font_size,
+            text_color,
+            stroke_color,
+            stroke_width,
+            temp_dir,
+            sprite_cache,
+            in_memory,
+        )
+
+    @staticmethod
+    def generate_word_images(
+        word_timings,
+        font_path,
+        font_size,
+        text_color,
+        stroke_color,
+        stroke_width,
+        temp_dir,
+        sprite_cache=None,
+        in_memory=False,
+    ):
+        """
+        Generate the word images of a (word, start, end) schedule.
+
+        Same return values as generate_subtitle_images.
+        """
+        if not in_memory:
+            os.makedirs(temp_dir, exist_ok=True)
         img_infos = []
 
-        for sub_idx, sub in enumerate(subs):
-            word_timings = SubtitlesBuisness.get_word_timings_from_subtitle(sub)
-            for i, (word, word_start, word_end) in enumerate(word_timings):
-                img_path = os.path.join(temp_dir, f"sub{sub_idx}_word{i}.png")
-                try:
-                    generated_path = SubtitlesBuisness.generate_word_image(
+        for i, (word, word_start, word_end) in enumerate(word_timings):
+            try:
+                if in_memory:
+                    image = SubtitlesBuisness.render_word_sprite(
+                        word,
+                        font_path,
+                        font_size,
+                        text_color,
+                        stroke_color,
+                        stroke_width,
+                        1280,
+                        130,
+                        sprite_cache,
+                    )
+                else:
+                    img_path = os.path.join(temp_dir, f"word{i}.png")
+                    image = SubtitlesBuisness.generate_word_image(
                         word,
                         font_path,
                         font_size,
@@ -108,17 +324,19 @@ class SubtitlesBuisness:
                         1280,
                         130,
                         img_path,
+                        sprite_cache,
                     )
-                    # Only add if image was successfully generated
-                    if generated_path:
-                        img_infos.append(
-                            (os.path.normpath(img_path), word_start, word_end)
-                        )
-                except Exception as e:
-                    logger.warning(f"Skipping word '{word}' due to error: {e}")
-                    continue
-
-        logger.info(f"Generated {len(img_infos)} word images in {temp_dir}")
+                # Only add if image was successfully generated
+                if image is not None:
+                    img_infos.append((image, word_start, word_end))
+            except Exception as e:
+                logger.warning(f"Skipping word '{word}' due to error: {e}")
+                continue
+
+        if in_memory:
+            logger.info(f"Rendered {len(img_infos)} word sprites in memory")
+        else:
+            logger.info(f"Generated {len(img_infos)} word images in {temp_dir}")
         return img_infos
 
     @staticmethod
@@ -133,60 +351,120 @@ class SubtitlesBuisness:
         stroke_width,
         position_y_ratio=0.80,
         temp_dir="tmp/subtitles_temp",
+        sprite_cache=None,
+        in_memory=True,
+        backend=None,
+        workers=None,
+        word_timings=None,
     ):
         """
         Create a video with animated word-by-word subtitles.
         Handles image generation, video composition, and cleanup.
+
+        Captions come from word_timings, a list of (word, start, end) such as
+        get_word_timings_from_transcription returns, or else from srt_path.
+
+        backend selects the renderer (default: SUBTITLES_RENDER_BACKEND):
+            - "moviepy": word sprites blended frame by frame in Python
+            - "ass": an ASS script burned in by ffmpeg/libass in one pass
+
+        Word sprites go through the process-wide WordSpriteCache unless another
+        cache is given. By default they stay as numpy arrays from rasterization
+        to compositing; in_memory=False writes them as PNGs to temp_dir (debug).
+
+        With the MoviePy backend, workers > 1 (default: SUBTITLES_RENDER_WORKERS)
+        renders keyframe-aligned segments in a process pool, see
+        SegmentRenderBuisness.
         """
+        backend = backend or settings.SUBTITLES_RENDER_BACKEND
+        if backend not in RENDER_BACKENDS:
+            raise ValueError(
+                f"Unknown subtitles backend '{backend}', expected one of {RENDER_BACKENDS}"
+            )
+        if sprite_cache is None:
+            sprite_cache = get_word_sprite_cache()
+        if workers is None:
+            workers = settings.SUBTITLES_RENDER_WORKERS
+
         try:
             logger.info(f"Starting subtitle video creation for {video_path}")
 
             # Verify input files exist
             if not os.path.exists(video_path):
                 raise FileNotFoundError(f"Video file not found: {video_path}")
-            if not os.path.exists(srt_path):
-                raise FileNotFoundError(f"SRT file not found: {srt_path}")
+            if word_timings is None:
+                if not srt_path or not os.path.exists(srt_path):
+                    raise FileNotFoundError(f"SRT file not found: {srt_path}")
+                subs = pysrt.open(srt_path)
+                word_timings = SubtitlesBuisness.get_word_timings(subs)
+                logger.info(f"Loaded {len(subs)} subtitles from {srt_path}")
+            logger.info(f"Caption schedule has {len(word_timings)} words")
+
+            if backend == "ass":
+                return SubtitlesBuisness.burn_subtitles_with_ass(
+                    video_path,
+                    word_timings,
+                    output_path,
+                    font_path,
+                    font_size,
+                    text_color,
+                    stroke_color,
+                    stroke_width,
+                    position_y_ratio,
+                    temp_dir,
+                )
+
+            if workers > 1:
+                sprite_timings = SubtitlesBuisness.cache_word_sprites(
+                    word_timings,
+                    font_path,
+                    font_size,
+                    text_color,
+                    stroke_color,
+                    stroke_width,
+                    sprite_cache,
+                )
+                logger.info(f"Sprite cache stats: {sprite_cache.stats()}")
+                return SegmentRenderBuisness.render_parallel(
+                    video_path,
+                    sprite_timings,
+                    output_path,
+                    sprite_cache,
+                    position_y_ratio,
+                    temp_dir,
+                    workers,
+                )
 
-            # Load video and subtitles
             video = VideoFileClip(video_path)
-            subs = pysrt.open(srt_path)
-            logger.info(f"Loaded video and {len(subs)} subtitles")
 
             # Generate all word images
-            img_infos = SubtitlesBuisness.generate_subtitle_images(
-                subs,
+            img_infos = SubtitlesBuisness.generate_word_images(
+                word_timings,
                 font_path,
                 font_size,
                 text_color,
                 stroke_color,
                 stroke_width,
                 temp_dir,
+                sprite_cache,
+                in_memory,
             )
             logger.info(f"Generated {len(img_infos)} word images")
+            logger.info(f"Sprite cache stats: {sprite_cache.stats()}")
 
-            # Create video clips
-            clips = [video]
+            # Compile the word schedule into a single overlay pass
             pos_y = int(video.h * position_y_ratio)
-
-            for img_path, word_start, word_end in img_infos:
-                txt_clip = (
-                    ImageClip(img_path)
-                    .set_start(word_start)
-                    .set_end(word_end)
-                    .set_position(("center", pos_y))
-                )
-                txt_clip = txt_clip.fadein(0.1)
-                clips.append(txt_clip)
-
-            logger.info(f"Created {len(clips)} video clips")
+            compositor = CaptionCompositor(
+                img_infos, video.size, pos_y, fade_duration=0.1, fps=video.fps
+            )
 
             # Compose and write final video
-            final = CompositeVideoClip(clips)
+            final = video.fl(compositor.apply)
             final.write_videofile(output_path, codec="libx264", fps=video.fps)
             logger.info(f"Successfully created subtitled video: {output_path}")
 
             # Clean up temporary files
-            if os.path.exists(temp_dir):
+            if not in_memory and os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir)
                 logger.info(f"Cleaned up temporary directory: {temp_dir}")
 
@@ -195,8 +473,64 @@ class SubtitlesBuisness:
         except Exception as e:
             logger.error(f"Failed to create subtitled video: {e}")
             # Clean up on error
-            if os.path.exists(temp_dir):
+            if not in_memory and os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir)
             raise
 
         return output_path
+
+    @staticmethod
+    def burn_subtitles_with_ass(
+        video_path,
+        word_timings,
+        output_path,
+        font_path,
+        font_size,
+        text_color,
+        stroke_color,
+        stroke_width,
+        position_y_ratio=0.80,
+        temp_dir="tmp/subtitles_temp",
+    ):
+        """
+        Render word-by-word captions with libass in a single ffmpeg pass.
+
+        Same font, size, stroke, colours, vertical position and 0.1s fade as
+        the MoviePy backend, without decoding frames in Python.
+        """
+        if not os.path.exists(font_path):
+            logger.error(f"Font file not found: {font_path}")
+            raise FileNotFoundError(f"Font file not found: {font_path}")
+
+        width, height = ffmpeg_parse_infos(video_path)["video_size"]
+        pos_y = int(height * position_y_ratio)
+        script = AssBuisness.build_ass_script(
+            word_timings,
+            (width, height),
+            font_path,
+            font_size,
+            text_color,
+            stroke_color,
+            stroke_width,
+            pos_y,
+            fade_duration=0.1,
+        )
+
+        os.makedirs(temp_dir, exist_ok=True)
+        ass_path = os.path.join(temp_dir, f"captions_{uuid.uuid4().hex}.ass")
+        try:
+            with open(ass_path, "w", encoding="utf-8") as f:
+                f.write(script)
+            logger.info(f"Wrote ASS script with {len(word_timings)} words: {ass_path}")
+
+            FfmpegService().burn_ass_subtitles(
+                video_path,
+                ass_path,
+                output_path,
+                fonts_dir=os.path.dirname(os.path.abspath(font_path)),
+            )
+            logger.info(f"Successfully created subtitled video: {output_path}")
+            return output_path
+        finally:
+            if os.path.exists(ass_path):
+                os.remove(ass_path)
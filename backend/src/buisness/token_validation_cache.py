@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from config.settings import settings
+
+
+class TokenValidationCache:
+    """
+    In-memory cache of /oauth2/validate results, keyed by a token hash.
+
+    A valid result is kept for the expires_in Twitch returned, capped by
+    max_ttl_seconds since Twitch asks apps to validate tokens at least
+    hourly. A rejected token is kept for negative_ttl_seconds. Past
+    max_entries the least recently used entry is dropped. Raw tokens are
+    never stored.
+    """
+
+    def __init__(
+        self,
+        max_entries=None,
+        max_ttl_seconds=None,
+        negative_ttl_seconds=None,
+        clock=time.monotonic,
+    ):
+        """
+        Args:
+            max_entries: Size bound (default: TOKEN_VALIDATION_CACHE_MAX_ENTRIES)
+            max_ttl_seconds: Longest life of a valid result
+                (default: TOKEN_VALIDATION_CACHE_MAX_TTL_SECONDS)
+            negative_ttl_seconds: Life of an invalid result
+                (default: TOKEN_VALIDATION_NEGATIVE_TTL_SECONDS)
+            clock: Monotonic time source, replaced in tests
+        """
+        self.max_entries = max_entries or settings.TOKEN_VALIDATION_CACHE_MAX_ENTRIES
+        if max_ttl_seconds is None:
+            max_ttl_seconds = settings.TOKEN_VALIDATION_CACHE_MAX_TTL_SECONDS
+        if negative_ttl_seconds is None:
+            negative_ttl_seconds = settings.TOKEN_VALIDATION_NEGATIVE_TTL_SECONDS
+        self.max_ttl_seconds = max_ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(access_token):
+        return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+    def get(self, access_token):
+        """
+        Return the cached validation result, or None on a miss.
+
+        expires_in of a valid result is the time left now, not the value
+        Twitch returned when the entry was stored.
+        """
+        key = self.make_key(access_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self.clock()
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            _, token_expires_at, result = entry
+            if not result["valid"]:
+                self.negative_hits += 1
+                return dict(result)
+            self.hits += 1
+            return {**result, "expires_in": int(token_expires_at - now)}
+
+    def put(self, access_token, result):
+        """Store a validation result, for as long as it stays true."""
+        now = self.clock()
+        if result["valid"]:
+            token_expires_at = now + (result.get("expires_in") or 0)
+            expires_at = min(token_expires_at, now + self.max_ttl_seconds)
+        else:
+            token_expires_at = now
+            expires_at = now + self.negative_ttl_seconds
+        if expires_at <= now:
+            return result
+
+        key = self.make_key(access_token)
+        with self._lock:
+            self._entries[key] = (expires_at, token_expires_at, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        """Return hit/negative hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    (self.hits + self.negative_hits) / lookups if lookups else 0.0
+                ),
+                "items": len(self._entries),
+            }
+
+
+@lru_cache
+def get_token_validation_cache() -> TokenValidationCache:
+    """Process-wide validation cache, created once then shared."""
+    return TokenValidationCache()
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+from config.settings import settings
+from models.transcription_model import Transcription, TranscriptionWord
+
+logger = logging.getLogger("HiLiteLogger")
+
+# Bump when the serialized layout changes, old entries then miss
+FORMAT_VERSION = 1
+
+
+class TranscriptionCache:
+    """
+    Persistent cache of speech-to-text results, addressed by the audio content.
+
+    One zlib-compressed JSON file per transcription under cache_dir. Words
+    are stored as rows of [text, start, end, type, speaker_id]. When the
+    directory grows past max_bytes, least recently used entries (by mtime,
+    refreshed on every hit) are deleted.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Args:
+            cache_dir: Directory of the cache (default: TRANSCRIPTION_CACHE_DIR)
+            max_bytes: Size bound of the directory
+                (default: TRANSCRIPTION_CACHE_MAX_MB)
+        """
+        self.cache_dir = Path(cache_dir or settings.TRANSCRIPTION_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = settings.TRANSCRIPTION_CACHE_MAX_MB * 1024 * 1024
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(audio_bytes, model_id, language_code, diarize, tag_audio_events):
+        """Address a transcription by its audio and every option that changes it."""
+        digest = hashlib.sha256(audio_bytes)
+        options = repr(
+            (FORMAT_VERSION, model_id, language_code, diarize, tag_audio_events)
+        )
+        digest.update(options.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json.z"
+
+    def get(self, key):
+        """Return the cached Transcription for key, or None on a miss."""
+        path = self.path(key)
+        try:
+            payload = zlib.decompress(path.read_bytes())
+            transcription = self.deserialize(payload)
+        except FileNotFoundError:
+            transcription = None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable transcription cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            transcription = None
+
+        with self._lock:
+            if transcription is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            # Keep the entry young for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return transcription
+
+    def put(self, key, transcription):
+        """
+        Store a transcription and return it as a Transcription model.
+
+        Accepts the ElevenLabs response or any object with the same fields.
+        Disk failures are logged, never raised.
+        """
+        transcription = self.to_model(transcription)
+        path = self.path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(zlib.compress(self.serialize(transcription), 9))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write transcription cache entry {path}: {e}")
+            return transcription
+
+        self.evict()
+        return transcription
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.json.z"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+            logger.info(f"Evicted {evicted} transcription cache entries")
+        return total
+
+    def stats(self):
+        """Return hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def to_model(transcription):
+        """
+        Keep only the fields the pipeline reads from a transcription.
+
+        ElevenLabs can leave a word without start or end; such words cannot
+        be placed on the timeline and are dropped.
+        """
+        if isinstance(transcription, Transcription):
+            return transcription
+        return Transcription(
+            language_code=getattr(transcription, "language_code", None),
+            text=getattr(transcription, "text", "") or "",
+            words=[
+                TranscriptionWord(
+                    text=word.text,
+                    start=word.start,
+                    end=word.end,
+                    type=getattr(word, "type", None) or "word",
+                    speaker_id=getattr(word, "speaker_id", None),
+                )
+                for word in transcription.words
+                if word.start is not None and word.end is not None
+            ],
+        )
+
+    @staticmethod
+    def serialize(transcription):
+        payload = {
+            "v": FORMAT_VERSION,
+            "language_code": transcription.language_code,
+            "text": transcription.text,
+            "words": [
+                [word.text, word.start, word.end, word.type, word.speaker_id]
+                for word in transcription.words
+            ],
+        }
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+
+    @staticmethod
+    def deserialize(payload):
+        data = json.loads(payload)
+        if data.get("v") != FORMAT_VERSION:
+            raise ValueError(f"unsupported format version {data.get('v')}")
+        return Transcription(
+            language_code=data["language_code"],
+            text=data["text"],
+            words=[
+                TranscriptionWord(
+                    text=text, start=start, end=end, type=type_, speaker_id=speaker
+                )
+                for text, start, end, type_, speaker in data["words"]
+            ],
+        )
+
+
+@lru_cache
+def get_transcription_cache() -> TranscriptionCache:
+    """Process-wide transcription cache, created once then shared."""
+    return TranscriptionCache()
@@ -0,0 +1,179 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from config.settings import settings
+
+logger = logging.getLogger("HiLiteLogger")
+
+
+@lru_cache(maxsize=64)
+def _hash_font_file(font_path, mtime_ns, size):
+    """Hash a font file's content. mtime/size are only part of the memo key."""
+    digest = hashlib.sha256()
+    with open(font_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WordSpriteCache:
+    """
+    Content-addressed cache of rendered word sprites (RGBA numpy arrays).
+
+    Two tiers:
+        - memory: LRU bounded in bytes, shared by every clip of the process
+        - disk: one PNG per sprite under cache_dir, survives between runs
+    """
+
+    def __init__(self, cache_dir=None, max_memory_bytes=None):
+        """
+        Args:
+            cache_dir: Directory of the on-disk tier (default: SPRITE_CACHE_DIR)
+            max_memory_bytes: Size bound of the memory tier
+                (default: SPRITE_CACHE_MEMORY_MB)
+        """
+        self.cache_dir = Path(cache_dir or settings.SPRITE_CACHE_DIR)
+        if max_memory_bytes is None:
+            max_memory_bytes = settings.SPRITE_CACHE_MEMORY_MB * 1024 * 1024
+        self.max_memory_bytes = max_memory_bytes
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def font_hash(font_path):
+        """Return the sha256 of the font file, memoized on (path, mtime, size)."""
+        stat = os.stat(font_path)
+        return _hash_font_file(
+            os.path.abspath(font_path), stat.st_mtime_ns, stat.st_size
+        )
+
+    def make_key(
+        self,
+        word,
+        font_path,
+        font_size,
+        text_color,
+        stroke_color,
+        stroke_width,
+        width,
+        height,
+    ):
+        """Build the content address of a sprite from everything that affects its pixels."""
+        payload = repr(
+            (
+                word,
+                self.font_hash(font_path),
+                font_size,
+                _normalize_color(text_color),
+                _normalize_color(stroke_color),
+                stroke_width,
+                width,
+                height,
+            )
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def disk_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.png"
+
+    def get(self, key):
+        """Return the cached sprite for key, or None on a miss."""
+        with self._lock:
+            sprite = self._memory.get(key)
+            if sprite is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return sprite
+
+        path = self.disk_path(key)
+        if path.exists():
+            try:
+                with Image.open(path) as img:
+                    sprite = np.asarray(img.convert("RGBA"))
+            except Exception as e:
+                logger.warning(f"Dropping unreadable sprite cache entry {path}: {e}")
+                path.unlink(missing_ok=True)
+            else:
+                sprite.setflags(write=False)
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, sprite)
+                return sprite
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, sprite):
+        """Store a sprite in both tiers. Disk failures are logged, never raised."""
+        sprite = np.asarray(sprite, dtype=np.uint8)
+        sprite.setflags(write=False)
+        with self._lock:
+            self._remember(key, sprite)
+
+        path = self.disk_path(key)
+        if path.exists():
+            return sprite
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            Image.fromarray(sprite, "RGBA").save(tmp_path, format="PNG")
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write sprite cache entry {path}: {e}")
+        return sprite
+
+    def stats(self):
+        """Return hit/miss counters and memory tier usage."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    def _remember(self, key, sprite):
+        """Insert in the memory tier and evict least recently used entries. Lock held."""
+        if sprite.nbytes > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = sprite
+        self._memory_bytes += sprite.nbytes
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+
+def _normalize_color(color):
+    """Make list/tuple colors hash the same way."""
+    if isinstance(color, (list, tuple)):
+        return tuple(int(c) for c in color)
+    return color
+
+
+@lru_cache
+def get_word_sprite_cache() -> WordSpriteCache:
+    """Process-wide sprite cache, created once then shared."""
+    return WordSpriteCache()
@@ -22,10 +22,59 @@ class Settings(BaseSettings):
     SUPABASE_API_KEY: str = "test_supabase_key"
     SUPABASE_URL: str = "test_password"
     # ============= Buisness Conf =============
+    # ElevenLabs
+    # Audio sent for transcription: "auto" (AAC stream copy, else MP3),
+    # "mp3", or "opus" (mono 16 kHz, smallest upload)
+    ELEVENLABS_AUDIO_FORMAT: str = "auto"
+    # Upload only the speech regions found by an energy detector
+    ELEVENLABS_TRIM_SILENCE: bool = False
+    # Empty = public API; point at a stand-in server for load tests
+    ELEVENLABS_BASE_URL: str = ""
+    # Long-audio mode (speech_to_text_chunked)
+    ELEVENLABS_CHUNK_SECONDS: float = 120.0
+    ELEVENLABS_CHUNK_OVERLAP_SECONDS: float = 2.0
+    ELEVENLABS_MAX_PARALLEL_CHUNKS: int = 4
+    TRANSCRIPTION_CACHE_DIR: str = "tmp/transcription_cache"
+    TRANSCRIPTION_CACHE_MAX_MB: int = 64
+
     # Twitch
     BASE_URL: str = "https://api.twitch.tv/helix"
     TWITCH_CLIP_FOLDER_PATH: str = "data/twitch_clips"
     TWITCH_CLIP_BLACKLIST_PATH: str = "data/clip_blacklist.csv"
+    # HTTP clip downloads (ClipDownloadService)
+    CLIP_DOWNLOAD_MAX_PARALLEL: int = 4
+    CLIP_DOWNLOAD_CHUNK_BYTES: int = 1024 * 1024
+    CLIP_DOWNLOAD_RETRIES: int = 3
+    CLIP_DOWNLOAD_TIMEOUT: float = 60.0
+    # Warm Chrome sessions for ScrapingService downloads (BrowserPool)
+    SCRAPING_POOL_SIZE: int = 2
+    SCRAPING_POOL_MAX_USES: int = 25
+    SCRAPING_POOL_MAX_MEMORY_MB: int = 1024
+    SCRAPING_POOL_DIR: str = "tmp/scraping_pool"
+    SCRAPING_POOL_CHECKOUT_TIMEOUT: float = 300.0
+    # Lean clip page loads: URL patterns Chrome never fetches (ScrapingService).
+    # UNBLOCKED entries remove patterns from BLOCKED_URL_PATTERNS, e.g. "*.woff*"
+    SCRAPING_BLOCK_REQUESTS: bool = True
+    SCRAPING_EXTRA_BLOCKED_URL_PATTERNS: list[str] = []
+    SCRAPING_UNBLOCKED_URL_PATTERNS: list[str] = []
+    # Per-job directories, so clips can be processed concurrently (JobWorkspace)
+    JOB_WORKSPACE_DIR: str = "tmp/jobs"
+    # Keep downloads and caption temp files on tmpfs instead of disk
+    JOB_WORKSPACE_USE_TMPFS: bool = False
+    JOB_WORKSPACE_TMPFS_DIR: str = "/dev/shm/hilite"
+    # Staged clip pipeline (StagedPipeline): workers per stage, items between stages
+    PIPELINE_DOWNLOAD_WORKERS: int = 2
+    PIPELINE_TRANSCRIBE_WORKERS: int = 2
+    PIPELINE_RENDER_PROCESSES: int = 1
+    PIPELINE_UPLOAD_WORKERS: int = 1
+    PIPELINE_QUEUE_SIZE: int = 2
+    # Clip job store, replaces the CSV blacklist (ClipJobRepository)
+    CLIP_STORE_PATH: str = "data/clip_jobs.db"
+    CLIP_STORE_WAL: bool = True
+    # Failures of a step (download, edit, post) before a clip is failed
+    CLIP_STORE_MAX_ATTEMPTS: int = 3
+    # Seconds after which a claimed clip is considered abandoned
+    CLIP_STORE_CLAIM_TIMEOUT: float = 3600.0
 
     TWITCH_OAUTH2_VALIDATE: str = "https://id.twitch.tv/oauth2/validate"
     TWITCH_OAUTH2_URL: str = "https://id.twitch.tv/oauth2/authorize"
@@ -35,6 +84,31 @@ class Settings(BaseSettings):
 
     TWITCH_EVENTSUB_URL: str = "https://api.twitch.tv/helix/eventsub/subscriptions"
 
+    # Shared Twitch HTTP clients
+    TWITCH_HTTP2: bool = True
+    TWITCH_MAX_CONNECTIONS: int = 20
+    TWITCH_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    TWITCH_KEEPALIVE_EXPIRY: float = 30.0
+    TWITCH_HTTP_TIMEOUT: float = 10.0
+    # Helix app token bucket (points per minute) and retries of 429/5xx
+    TWITCH_RATE_LIMIT_POINTS: int = 800
+    TWITCH_MAX_RETRIES: int = 3
+    TWITCH_RETRY_BACKOFF: float = 0.5
+    # App token shared by every process when set (empty = per process)
+    TWITCH_APP_TOKEN_CACHE_PATH: str = ""
+    # Refresh the app token in the background this long before its deadline
+    TWITCH_APP_TOKEN_REFRESH_AHEAD: float = 3600.0
+    # /oauth2/validate results, valid ones at most an hour as Twitch requires
+    TOKEN_VALIDATION_CACHE_MAX_ENTRIES: int = 4096
+    TOKEN_VALIDATION_CACHE_MAX_TTL_SECONDS: float = 3600.0
+    TOKEN_VALIDATION_NEGATIVE_TTL_SECONDS: float = 300.0
+
+    # Game metadata cache (game names rarely change)
+    GAME_INFO_CACHE_MAX_ENTRIES: int = 1024
+    GAME_INFO_CACHE_TTL_SECONDS: float = 86400.0
+    # Login -> user ID map kept between runs (IDs never change)
+    BROADCASTER_ID_CACHE_PATH: str = "tmp/broadcaster_ids.json"
+
     # Youtube
     SCOPES: str = "https://www.googleapis.com/auth/youtube.upload"
     API_SERVICE_NAME: str = "youtube"
@@ -47,7 +121,17 @@ class Settings(BaseSettings):
     # Edit
     TITLES_TEMPLATE_PATH: str = "data/titles_template.json"
     SRT_DIR_PATH: str = "tmp/srt"
+    # Also write the transcription as an SRT file (captions do not need it)
+    SUBTITLES_EXPORT_SRT: bool = False
     EDITED_CLIP_FOLDER: str = "data/edited_clips"
+    SPRITE_CACHE_DIR: str = "tmp/sprite_cache"
+    SPRITE_CACHE_MEMORY_MB: int = 128
+    # "moviepy" (frame-by-frame compositor) or "ass" (libass burn-in via ffmpeg)
+    SUBTITLES_RENDER_BACKEND: str = "moviepy"
+    # Processes for the MoviePy backend; > 1 renders keyframe-aligned segments in parallel
+    SUBTITLES_RENDER_WORKERS: int = 1
+    # Empty = use the ffmpeg binary MoviePy is configured with
+    FFMPEG_BINARY: str = ""
 
     # CORS
     BACKEND_URL: str = "http://localhost:8000"
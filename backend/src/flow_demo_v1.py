@@ -1,17 +1,23 @@
-import csv
 import os
-import time
+import shutil
 from pathlib import Path
 
 from dotenv import load_dotenv
 
+from buisness.app_token_cache import get_app_token_cache
+from buisness.broadcaster_id_cache import get_broadcaster_id_cache
+from buisness.game_info_cache import get_game_info_cache
+from buisness.job_workspace import JobWorkspace
+from buisness.staged_pipeline import Stage, StagedPipeline
 from buisness.subtitles_buisness import SubtitlesBuisness
+from buisness.transcription_cache import get_transcription_cache
 from buisness.twitch_buisness import TwitchBuisness
 from config.logger_conf import setup_logger
 from config.path_config import BASE_DIR
 from config.settings import settings
+from repositories.clip_job_repository import get_clip_job_repository
+from services.browser_pool_service import get_browser_pool
 from services.eleven_labs_service import ElevenLabsService
-from services.scraping_service import ScrapingService
 from services.srt_service import SrtService
 from services.twitch_service import TwitchApi
 from services.youtube_service import YoutubeService
@@ -23,104 +29,83 @@ load_dotenv()
 logger = setup_logger()
 
 
-def load_blacklist():
-    """Load all blacklisted clip IDs from CSV."""
-    csv_path = os.path.join(BASE_DIR, settings.TWITCH_CLIP_BLACKLIST_PATH)
+# Name of this script in the clip store's claims and publications
+WORKER_ID = "flow_demo"
 
-    # Create file with header if it doesn't exist
-    if not os.path.exists(csv_path):
-        with open(csv_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["clip_id", "url"])
-        return set()
 
-    with open(csv_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return {row["clip_id"] for row in reader}
+def get_clip_store():
+    """Clip job store, with the old CSV blacklist imported on first use."""
+    store = get_clip_job_repository()
+    store.import_blacklist_csv()
+    return store
 
 
-def add_to_blacklist(clip_id, clip_url):
-    """Add a clip to the blacklist."""
-    csv_path = os.path.join(BASE_DIR, settings.TWITCH_CLIP_BLACKLIST_PATH)
-    with open(csv_path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([clip_id, clip_url])
-    logger.info(f"Clip {clip_id} added to blacklist")
-
-
-def find_new_clip(clips):
-    """Find the first clip not in blacklist."""
-    blacklist = load_blacklist()
-
-    for clip in clips:
-        clip_id = clip.get("id")
-        if clip_id not in blacklist:
-            logger.info(f"Found new clip: {clip_id}")
-            return clip
-
-    logger.warning("No new clips found - all clips are in blacklist")
-    return None
-
-
-def fetch_clips(broadcaster_name):
-    """Fetch clips and return the first one not in blacklist."""
+def fetch_new_clips(broadcaster_name, nb_clips):
+    """Fetch clips into the clip store and claim up to nb_clips pending ones."""
     # Init twitch service
-    twitch_service = TwitchApi(settings.TWITCH_CLIENT_ID, settings.TWITCH_CLIENT_SECRET)
+    twitch_service = TwitchApi(
+        settings.TWITCH_CLIENT_ID,
+        settings.TWITCH_CLIENT_SECRET,
+        game_info_cache=get_game_info_cache(),
+        app_token_cache=get_app_token_cache(),
+        broadcaster_id_cache=get_broadcaster_id_cache(),
+    )
 
     # Fetch broadcaster clips (50 by default)
     broadcaster_id = twitch_service.get_broadcaster_id(broadcaster_name)
     print(f"\nFetching clips for {broadcaster_name}...\n")
 
-    all_clips = twitch_service.get_broadcaster_clips(broadcaster_id)
+    all_clips = twitch_service.get_broadcaster_clips(broadcaster_id, max_clips=50)
     print(f"Retrieved {len(all_clips)} clips from Twitch API")
 
-    # Find first non-blacklisted clip
-    new_clip = find_new_clip(all_clips)
+    # Warm the game cache for the whole batch in one call
+    twitch_service.get_games_info(clip.get("game_id") for clip in all_clips)
+
+    # New clips are stored as pending, known ones keep their state
+    store = get_clip_store()
+    store.add_clips(all_clips)
+    claimed = store.claim(WORKER_ID, limit=nb_clips, broadcaster_id=broadcaster_id)
 
-    if new_clip is None:
+    if not claimed:
         print("No new clips available - all clips are already processed")
-        return None
-
-    # Add to blacklist
-    clip_id = str(new_clip.get("id"))
-    clip_url = str(new_clip.get("url"))
-    add_to_blacklist(clip_id, clip_url)
-
-    print(f"Selected new clip: {clip_id}")
-    return new_clip
-
-
-def clean_clip_folder():
-    """Remove all files from clip folder before downloading new clip."""
-    clip_folder = Path(os.path.join(BASE_DIR, settings.TWITCH_CLIP_FOLDER_PATH))
-    for file in clip_folder.glob("*.mp4"):
-        try:
-            file.unlink()
-            logger.info(f"Removed old file: {file.name}")
-        except PermissionError:
-            logger.warning(f"Could not delete {file.name} - file in use. Waiting...")
-            time.sleep(2)
-            try:
-                file.unlink()
-                logger.info(f"Removed old file: {file.name} (after retry)")
-            except Exception as e:
-                logger.error(f"Failed to delete {file.name}: {e}")
-    logger.info("Clip folder cleaned")
-
-
-def download_clip(clip_obj):
-    """Download a single clip after cleaning the folder."""
-    # Clean folder first to ensure only one video exists
-    clean_clip_folder()
-
-    scraping_service = ScrapingService()
+        return []
+
+    # Pending clips from an earlier fetch are rebuilt from their stored fields
+    fetched = {str(clip.get("id")): clip for clip in all_clips}
+    new_clips = []
+    for row in claimed:
+        clip = fetched.get(row["clip_id"]) or {
+            "id": row["clip_id"],
+            "url": row["url"],
+            "title": row["title"],
+            "broadcaster_id": row["broadcaster_id"],
+            "broadcaster_name": row["broadcaster_name"],
+            "game_id": row["game_id"],
+        }
+        print(f"Selected new clip: {row['clip_id']}")
+        new_clips.append(clip)
+    return new_clips
+
+
+def fetch_clips(broadcaster_name):
+    """Fetch clips and claim the most viewed pending one."""
+    new_clips = fetch_new_clips(broadcaster_name, 1)
+    return new_clips[0] if new_clips else None
+
+
+def download_clip(clip_obj, workspace):
+    """Download a single clip into the job workspace and return its path."""
     clip_url = clip_obj.get("url")
     print("\rDownloading clip...", end="", flush=True)
-    scraping_service.download_clip(clip_url)
-    time.sleep(3)
-    scraping_service.close()
+    # Warm browser from the pool, downloading into its own folder
+    with get_browser_pool().session() as scraping_service:
+        downloaded = scraping_service.download_clip(clip_url)
+        video_path = workspace.download_dir / downloaded.name
+        shutil.move(str(downloaded), video_path)
+    get_clip_store().mark_downloaded(clip_obj.get("id"), video_path)
     print(" Done!")
     logger.info(f"Clip downloaded: {clip_url}")
+    return str(video_path)
 
 
 def post_single_video_on_youtube(
@@ -145,56 +130,50 @@ def post_single_video_on_youtube(
     return video_id
 
 
-def get_clip_video_path():
-    """Get the path of the single video file in clip folder."""
-    clip_folder = Path(os.path.join(BASE_DIR, settings.TWITCH_CLIP_FOLDER_PATH))
-    logger.info(f"clip folder : {clip_folder} ")
-    video_files = list(clip_folder.glob("*.mp4"))
-
-    if len(video_files) == 0:
-        raise FileNotFoundError("No video file found in clip folder")
-    elif len(video_files) > 1:
-        raise RuntimeError(
-            f"Multiple videos found in folder: {len(video_files)}. Expected only 1."
-        )
-
-    return str(video_files[0])
-
-
-def subtitle_video(subtitle_font="C:/Windows/Fonts/arial.ttf", font_size=110):
-    """Add subtitles to the single video in clip folder."""
-    # Get the video path
-    time.sleep(10)
-    video_path = get_clip_video_path()
-    logger.info(f"Processing video: {video_path}")
-
-    # Output to edited_clips folder instead of same folder
-    edited_folder = Path(os.path.join(BASE_DIR, settings.EDITED_CLIP_FOLDER))
-    edited_folder.mkdir(parents=True, exist_ok=True)
-
-    video_filename = Path(video_path).stem
-    video_output_path = str(edited_folder / f"{video_filename}_subtitled.mp4")
-
-    # Generate transcription
-    elevenlabs_service = ElevenLabsService(settings.ELEVENLABS_API_KEY)
+def transcribe_clip(video_path):
+    """Transcribe video_path and return its caption schedule (word timings)."""
+    elevenlabs_service = ElevenLabsService(
+        settings.ELEVENLABS_API_KEY, get_transcription_cache()
+    )
     print("Generating transcription...")
     transcription = elevenlabs_service.speech_to_text(video_path, "fr")
 
-    # Setup srt service - use only filename, not full path
-    video_filename = Path(video_path).stem  # Get filename without extension
-    srt_output_file = f"{video_filename}.srt"
-    srt_service = SrtService(srt_output_file)
+    # SRT is only an export, the renderer does not read it; it goes to
+    # SRT_DIR_PATH, outside the job workspace, so it survives the job
+    if settings.SUBTITLES_EXPORT_SRT:
+        print("Creating SRT file...")
+        srt_service = SrtService(f"{Path(video_path).stem}.srt")
+        srt_service.convert_transcription_into_srt(transcription)
+
+    # Caption schedule straight from the transcription's word timestamps
+    return SubtitlesBuisness.get_word_timings_from_transcription(transcription.words)
 
-    # Convert transcription to srt and save it
-    print("Creating SRT file...")
-    srt_service.convert_transcription_into_srt(transcription)
-    srt_path = srt_service.srt_output_file
 
-    # Create subtitled video
+def render_clip(
+    video_path,
+    word_timings,
+    workspace,
+    subtitle_font="C:/Windows/Fonts/arial.ttf",
+    font_size=110,
+):
+    """
+    Burn word_timings into video_path and return the subtitled video path.
+
+    The video renders in the job workspace, then moves to EDITED_CLIP_FOLDER
+    so it is kept once the workspace is removed.
+    """
+    video_output_path = str(
+        workspace.output_dir / f"{Path(video_path).stem}_subtitled.mp4"
+    )
+    if not word_timings:
+        logger.info(f"No speech in {video_path}, publishing it without captions")
+        shutil.copyfile(video_path, video_output_path)
+        return keep_edited_clip(video_output_path)
+
     print("Adding subtitles to video...")
     SubtitlesBuisness.create_subtitled_video(
         video_path,
-        srt_path,
+        None,
         video_output_path,
         subtitle_font,
         font_size,
@@ -202,14 +181,86 @@ def subtitle_video(subtitle_font="C:/Windows/Fonts/arial.ttf", font_size=110):
         (0, 0, 0, 255),
         6,
         0.80,
+        temp_dir=str(workspace.caption_temp_dir),
+        word_timings=word_timings,
     )
 
     logger.info(f"Subtitled video created: {video_output_path}")
+    return keep_edited_clip(video_output_path)
 
-    # Clean up: wait a bit to ensure files are released
-    time.sleep(1)
 
-    return video_output_path
+def keep_edited_clip(video_path):
+    """Move a finished video to EDITED_CLIP_FOLDER and return its new path."""
+    edited_folder = Path(os.path.join(BASE_DIR, settings.EDITED_CLIP_FOLDER))
+    edited_folder.mkdir(parents=True, exist_ok=True)
+    edited_path = edited_folder / Path(video_path).name
+    shutil.move(video_path, edited_path)
+    return str(edited_path)
+
+
+def subtitle_video(
+    video_path, workspace, subtitle_font="C:/Windows/Fonts/arial.ttf", font_size=110
+):
+    """Add subtitles to video_path; scratch files stay in the job workspace."""
+    logger.info(f"Processing video: {video_path}")
+    word_timings = transcribe_clip(video_path)
+    return render_clip(video_path, word_timings, workspace, subtitle_font, font_size)
+
+
+def publish_clip(clip, video_path, broadcaster_name):
+    """Title, describe and upload a subtitled clip; return the YouTube video ID."""
+    clip_id = str(clip.get("id"))
+    store = get_clip_store()
+    # Never upload a clip twice, whatever failed after its first upload
+    published = store.successful_publication(clip_id, WORKER_ID, "youtube")
+    if published is not None:
+        logger.info(f"Clip {clip_id} already on YouTube, skipping upload")
+        return published["platform_video_id"]
+
+    # Generate title using template
+    twitch_service = TwitchApi(
+        settings.TWITCH_CLIENT_ID,
+        settings.TWITCH_CLIENT_SECRET,
+        game_info_cache=get_game_info_cache(),
+        app_token_cache=get_app_token_cache(),
+    )
+    twitch_business = TwitchBuisness()
+    youtube_title = twitch_business.generate_short_title(twitch_service, clip)
+
+    if youtube_title is None:
+        # Fallback title if template generation fails
+        youtube_title = f"{clip.get('title', 'Clip')} | {clip.get('broadcaster_name') or broadcaster_name}"
+
+    broadcaster = clip.get("broadcaster_name") or broadcaster_name
+    game_id = clip.get("game_id")
+    game_info = twitch_service.get_game_info(game_id) if game_id else None
+    game = game_info.get("name", "Gaming") if game_info else "Gaming"
+
+    # Create YouTube description
+    youtube_description = f"""
+            Clip de {broadcaster} en stream!
+        Game: {game}
+
+        #twitch #gaming #{game.replace(" ", "")} #{broadcaster.replace(" ", "")}
+                #short""".strip()
+
+    store.start_publication(clip_id, WORKER_ID, "youtube")
+    video_id = post_single_video_on_youtube(
+        video_path,
+        youtube_title,
+        youtube_description,
+        tags=[game, broadcaster, "twitch", "clips", "short"],
+        status="public",
+    )
+    # Success and published status in one transaction, right after the upload
+    store.publish(
+        clip_id,
+        WORKER_ID,
+        "youtube",
+        platform_video_id=video_id,
+        platform_url=f"https://www.youtube.com/watch?v={video_id}",
+    )
+    return video_id
 
 
 def process_single_clip(broadcaster_name):
@@ -226,51 +277,21 @@ def process_single_clip(broadcaster_name):
 
     print(f"Processing clip: {clip.get('url')}")
 
+    # Every file of this clip lives in its own workspace, removed at the end
+    workspace = JobWorkspace(job_id=clip.get("id")).create()
     try:
-        # Step 2: Download clip (with folder cleaning)
-        print("\n[1/4] Downloading clip...")
-        download_clip(clip)
+        # Step 2: Download clip
+        print("\n[1/3] Downloading clip...")
+        video_path = download_clip(clip, workspace)
 
         # Step 3: Add subtitles
-        print("\n[2/4] Adding subtitles...")
-        subtitled_video = subtitle_video()
+        print("\n[2/3] Adding subtitles...")
+        subtitled_video = subtitle_video(video_path, workspace)
+        get_clip_store().mark_edited(clip.get("id"), subtitled_video)
 
-        # Step 4: Generate title and description
-        print("\n[3/4] Preparing YouTube upload...")
-
-        # Generate title using template
-        twitch_service = TwitchApi(
-            settings.TWITCH_CLIENT_ID, settings.TWITCH_CLIENT_SECRET
-        )
-        twitch_business = TwitchBuisness()
-        youtube_title = twitch_business.generate_short_title(twitch_service, clip)
-
-        if youtube_title is None:
-            # Fallback title if template generation fails
-            youtube_title = f"{clip.get('title', 'Clip')} | {clip.get('broadcaster_name', broadcaster_name)}"
-
-        broadcaster = clip.get("broadcaster_name", broadcaster_name)
-        game_id = clip.get("game_id")
-        game_info = twitch_service.get_game_info(game_id) if game_id else None
-        game = game_info.get("name", "Gaming") if game_info else "Gaming"
-
-        # Create YouTube description
-        youtube_description = f"""
-                Clip de {broadcaster} en stream!
-            Game: {game}
-
-            #twitch #gaming #{game.replace(" ", "")} #{broadcaster.replace(" ", "")}
-                    #short""".strip()
-
-        # Step 5: Upload to YouTube
-        print("\n[4/4] Uploading to YouTube...")
-        video_id = post_single_video_on_youtube(
-            subtitled_video,
-            youtube_title,
-            youtube_description,
-            tags=[game, broadcaster, "twitch", "clips", "short"],
-            status="public",
-        )
+        # Step 4: Title, description and upload
+        print("\n[3/3] Uploading to YouTube...")
+        video_id = publish_clip(clip, subtitled_video, broadcaster_name)
 
         print("\n Video uploaded successfully!")
         print(f"YouTube URL: https://www.youtube.com/watch?v={video_id}")
@@ -283,36 +304,104 @@ def process_single_clip(broadcaster_name):
     except Exception as e:
         logger.error(f"Pipeline failed: {e}")
         print(f"\n Error during processing: {e}")
+        # The workspace is removed, so a retry starts from the download
+        get_clip_store().record_failure(clip.get("id"), str(e), back_to="pending")
         return False
+    finally:
+        workspace.cleanup()
 
 
-if __name__ == "__main__":
-    nb_clips = 2
-    broadcaster_name = "Sniper_Biscuit"
+def _download_stage(job):
+    job["workspace"] = JobWorkspace(job_id=job["clip"].get("id")).create()
+    job["video_path"] = download_clip(job["clip"], job["workspace"])
+    return job
 
-    successful = 0
-    failed = 0
 
-    for i in range(nb_clips):
-        print(f"\n\n{'=' * 60}")
-        print(f"PROCESSING CLIP {i + 1}/{nb_clips}")
-        print(f"{'=' * 60}\n")
+def _transcribe_stage(job):
+    job["word_timings"] = transcribe_clip(job["video_path"])
+    return job
 
-        result = process_single_clip(broadcaster_name)
 
-        if result:
-            successful += 1
-        else:
-            failed += 1
-            print("Moving to next clip...")
+def _render_stage(job):
+    # Runs in a worker process: job goes there and back pickled
+    job["output_path"] = render_clip(
+        job["video_path"], job["word_timings"], job["workspace"]
+    )
+    return job
+
 
-        # Small delay between clips
-        if i < nb_clips - 1:
-            time.sleep(2)
+def _edited_stage(job):
+    # Back in the parent process, the render is recorded before the upload
+    get_clip_store().mark_edited(job["clip"].get("id"), job["output_path"])
+    return job
+
+
+def _upload_stage(job):
+    job["video_id"] = publish_clip(
+        job["clip"], job["output_path"], job["broadcaster_name"]
+    )
+    print(f"YouTube URL: https://www.youtube.com/watch?v={job['video_id']}")
+    job["workspace"].cleanup()
+    return job
+
+
+def _drop_failed_job(job, stage_name, error):
+    print(f"\n Clip {job['clip'].get('id')} failed at {stage_name}: {error}")
+    if job.get("workspace") is not None:
+        job["workspace"].cleanup()
+    get_clip_store().record_failure(
+        job["clip"].get("id"), str(error), back_to="pending"
+    )
+
+
+def process_clips(broadcaster_name, nb_clips):
+    """
+    Fetch nb_clips new clips and run them through download -> transcribe ->
+    render -> upload, each stage working on a different clip at the same time.
+
+    Returns:
+        tuple: (YouTube video IDs, pipeline stats)
+    """
+    clips = fetch_new_clips(broadcaster_name, nb_clips)
+    pipeline = StagedPipeline(
+        [
+            Stage("download", _download_stage, settings.PIPELINE_DOWNLOAD_WORKERS),
+            Stage(
+                "transcribe", _transcribe_stage, settings.PIPELINE_TRANSCRIBE_WORKERS
+            ),
+            Stage(
+                "render",
+                _render_stage,
+                settings.PIPELINE_RENDER_PROCESSES,
+                processes=True,
+            ),
+            Stage("edited", _edited_stage),
+            Stage("upload", _upload_stage, settings.PIPELINE_UPLOAD_WORKERS),
+        ],
+        on_error=_drop_failed_job,
+    )
+    jobs = pipeline.run(
+        {"clip": clip, "broadcaster_name": broadcaster_name} for clip in clips
+    )
+    return [job["video_id"] for job in jobs], pipeline.stats()
+
+
+if __name__ == "__main__":
+    nb_clips = 2
+    broadcaster_name = "Sniper_Biscuit"
+
+    video_ids, stats = process_clips(broadcaster_name, nb_clips)
+    get_browser_pool().close()
 
     print(f"\n\n{'=' * 60}")
     print("FINAL SUMMARY")
     print(f"{'=' * 60}")
-    print(f"Successful: {successful}/{nb_clips}")
-    print(f"Failed: {failed}/{nb_clips}")
+    print(f"Successful: {len(video_ids)}/{nb_clips}")
+    print(f"Failed: {nb_clips - len(video_ids)}/{nb_clips}")
+    print(f"Elapsed: {stats['elapsed']:.1f}s")
+    for name, stage in stats["stages"].items():
+        print(
+            f"  {name}: {stage['processed']} done, {stage['failed']} failed, "
+            f"{stage['utilization']:.0%} busy, queue max {stage['queue_max']}"
+        )
     print(f"{'=' * 60}\n")
@@ -0,0 +1,17 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class TranscriptionWord(BaseModel):
+    text: str
+    start: float
+    end: float
+    type: str = "word"
+    speaker_id: Optional[str] = None
+
+
+class Transcription(BaseModel):
+    language_code: Optional[str] = None
+    text: str = ""
+    words: List[TranscriptionWord] = []
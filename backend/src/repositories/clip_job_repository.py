@@ -0,0 +1,545 @@
+import csv
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from config.path_config import BASE_DIR
+from config.settings import settings
+
+logger = logging.getLogger("HiLiteLogger")
+
+# Tables `clips` and `publications` of PIPELINE.md, plus the claim columns
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    clip_id TEXT PRIMARY KEY,
+    broadcaster_id TEXT,
+    broadcaster_name TEXT,
+    game_id TEXT,
+    editor_id TEXT,
+    url TEXT,
+    title TEXT,
+    duration REAL,
+    view_count INTEGER,
+    created_at TEXT,
+    downloaded_path TEXT,
+    edited_path TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    download_attempts INTEGER NOT NULL DEFAULT 0,
+    edit_attempts INTEGER NOT NULL DEFAULT 0,
+    upload_attempts INTEGER NOT NULL DEFAULT 0,
+    fetched_at TIMESTAMP,
+    downloaded_at TIMESTAMP,
+    edited_at TIMESTAMP,
+    published_at TIMESTAMP,
+    error_log TEXT,
+    claimed_by TEXT,
+    claimed_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_clips_status
+    ON clips (status, claimed_by, view_count DESC);
+
+CREATE TABLE IF NOT EXISTS publications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    clip_id TEXT NOT NULL REFERENCES clips (clip_id),
+    worker_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    post_status TEXT NOT NULL DEFAULT 'pending',
+    post_attempts INTEGER NOT NULL DEFAULT 0,
+    published_at TIMESTAMP,
+    platform_video_id TEXT,
+    platform_url TEXT,
+    error_log TEXT,
+    UNIQUE (clip_id, worker_id, platform)
+);
+CREATE INDEX IF NOT EXISTS idx_publications_worker
+    ON publications (worker_id, post_status);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Columns added after the first version of the schema, with their type
+ADDED_COLUMNS = {
+    "clips": {
+        "broadcaster_name": "TEXT",
+        "game_id": "TEXT",
+        "upload_attempts": "INTEGER NOT NULL DEFAULT 0",
+    }
+}
+
+# Allowed status changes; going back to pending retries a clip from scratch
+TRANSITIONS = {
+    "pending": {"downloaded", "failed"},
+    "downloaded": {"edited", "pending", "failed"},
+    "edited": {"published", "downloaded", "pending", "failed"},
+    "published": set(),
+    "failed": {"pending"},
+}
+
+# Attempt counter of the step that works on a clip in each status
+ATTEMPT_COLUMNS = {
+    "pending": "download_attempts",
+    "downloaded": "edit_attempts",
+    "edited": "upload_attempts",
+}
+
+
+class ClipJobRepository:
+    """
+    SQLite store of the clips going through the pipeline and their
+    publications.
+
+    A clip moves pending -> downloaded -> edited -> published, or to failed
+    once a step has failed max_attempts times. Workers claim a clip before
+    working on it, so two workers never get the same one; a claim older
+    than claim_timeout is considered abandoned. Each thread gets its own
+    connection, and the database runs in WAL mode so readers do not block
+    the writer.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        wal=None,
+        max_attempts=None,
+        claim_timeout=None,
+        clock=time.time,
+    ):
+        """
+        Args:
+            path: Database file, ":memory:" is not supported since every
+                thread opens its own connection (default: CLIP_STORE_PATH)
+            wal: Use WAL journal mode (default: CLIP_STORE_WAL)
+            max_attempts: Failures of a step before the clip is failed
+                (default: CLIP_STORE_MAX_ATTEMPTS)
+            claim_timeout: Seconds after which a claim can be taken over
+                (default: CLIP_STORE_CLAIM_TIMEOUT)
+            clock: Time source in seconds since the epoch, replaced in tests
+        """
+        self.path = Path(path or os.path.join(BASE_DIR, settings.CLIP_STORE_PATH))
+        self.wal = settings.CLIP_STORE_WAL if wal is None else wal
+        self.max_attempts = max_attempts or settings.CLIP_STORE_MAX_ATTEMPTS
+        if claim_timeout is None:
+            claim_timeout = settings.CLIP_STORE_CLAIM_TIMEOUT
+        self.claim_timeout = claim_timeout
+        self.clock = clock
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+        self._add_missing_columns()
+
+    def close(self):
+        """Close the connections of every thread."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    # --- clips ---
+
+    def add_clips(self, clips):
+        """
+        Insert Helix clip objects as pending, skipping the ones already known.
+
+        Returns:
+            int: Number of new clips
+        """
+        now = self._now()
+        rows = [
+            (
+                str(clip["id"]),
+                clip.get("broadcaster_id"),
+                clip.get("broadcaster_name"),
+                clip.get("game_id"),
+                clip.get("creator_id"),
+                clip.get("url"),
+                clip.get("title"),
+                clip.get("duration"),
+                clip.get("view_count"),
+                clip.get("created_at"),
+                now,
+            )
+            for clip in clips
+        ]
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO clips (clip_id, broadcaster_id,"
+                " broadcaster_name, game_id, editor_id, url, title, duration,"
+                " view_count, created_at, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = db.total_changes - before
+        logger.info(f"Clip store: {added} new clips out of {len(rows)}")
+        return added
+
+    def get_clip(self, clip_id):
+        """Return the clip row as a dict, or None."""
+        row = (
+            self._connection()
+            .execute("SELECT * FROM clips WHERE clip_id = ?", (str(clip_id),))
+            .fetchone()
+        )
+        return dict(row) if row else None
+
+    def claim(self, worker_id, status="pending", limit=1, broadcaster_id=None):
+        """
+        Atomically take up to limit unclaimed clips in status, most viewed
+        first, optionally of one broadcaster. Clips whose current step
+        failed max_attempts times are skipped.
+
+        Returns:
+            list: Claimed clip rows as dicts
+        """
+        now = self.clock()
+        filters = " AND (claimed_by IS NULL OR claimed_at < ?)"
+        params = [status, self._iso(now - self.claim_timeout)]
+        attempts = ATTEMPT_COLUMNS.get(status)
+        if attempts:
+            filters += f" AND {attempts} < ?"
+            params.append(self.max_attempts)
+        if broadcaster_id is not None:
+            filters += " AND broadcaster_id = ?"
+            params.append(str(broadcaster_id))
+        params.append(limit)
+
+        with self._transaction() as db:
+            rows = db.execute(
+                f"SELECT clip_id FROM clips WHERE status = ?{filters}"
+                " ORDER BY view_count DESC, fetched_at LIMIT ?",
+                params,
+            ).fetchall()
+            clip_ids = [row["clip_id"] for row in rows]
+            db.executemany(
+                "UPDATE clips SET claimed_by = ?, claimed_at = ? WHERE clip_id = ?",
+                [(worker_id, self._iso(now), clip_id) for clip_id in clip_ids],
+            )
+            claimed = [
+                dict(
+                    db.execute("SELECT * FROM clips WHERE clip_id = ?", (c,)).fetchone()
+                )
+                for c in clip_ids
+            ]
+        return claimed
+
+    def release(self, clip_id):
+        """Drop the claim on a clip without changing its status."""
+        self._connection().execute(
+            "UPDATE clips SET claimed_by = NULL, claimed_at = NULL WHERE clip_id = ?",
+            (str(clip_id),),
+        )
+
+    def mark_downloaded(self, clip_id, path):
+        self._transition(
+            clip_id, "downloaded", downloaded_path=str(path), downloaded_at=self._now()
+        )
+
+    def mark_edited(self, clip_id, path):
+        self._transition(
+            clip_id, "edited", edited_path=str(path), edited_at=self._now()
+        )
+
+    def mark_published(self, clip_id):
+        """Mark the clip published and release its claim."""
+        self._transition(
+            clip_id,
+            "published",
+            published_at=self._now(),
+            claimed_by=None,
+            claimed_at=None,
+        )
+
+    def record_failure(self, clip_id, error, back_to=None):
+        """
+        Count a failed step, log the error and release the claim.
+
+        The attempt counter of the step matching the clip's status grows; a
+        failed upload also fails its pending publications. Once the counter
+        reaches max_attempts the clip is failed; otherwise it moves to
+        back_to, e.g. "pending" when its files are gone, or stays put.
+
+        Returns:
+            str: The clip's new status
+        """
+        clip_id = str(clip_id)
+        now = self._now()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT * FROM clips WHERE clip_id = ?", (clip_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown clip {clip_id}")
+            status = row["status"]
+            if status == "published":
+                # Whatever failed after the post, the clip must not go again
+                logger.warning(f"Clip {clip_id} already published, ignoring: {error}")
+                return status
+            if status == "edited":
+                db.execute(
+                    "UPDATE publications SET post_status = 'failed',"
+                    " post_attempts = post_attempts + 1, error_log = ?"
+                    " WHERE clip_id = ? AND post_status = 'pending'",
+                    (error, clip_id),
+                )
+            # Counted on the clip, so a failure before any post was started
+            # (no publication row) still moves it towards failed
+            attempts_column = ATTEMPT_COLUMNS.get(status)
+            exhausted = False
+            if attempts_column:
+                exhausted = row[attempts_column] + 1 >= self.max_attempts
+                db.execute(
+                    f"UPDATE clips SET {attempts_column} = {attempts_column} + 1"
+                    " WHERE clip_id = ?",
+                    (clip_id,),
+                )
+
+            new_status = "failed" if exhausted else (back_to or status)
+            if new_status != status:
+                self._check_transition(clip_id, status, new_status)
+            log = f"{row['error_log'] or ''}[{now}] {status}: {error}\n"
+            db.execute(
+                "UPDATE clips SET status = ?, error_log = ?, claimed_by = NULL,"
+                " claimed_at = NULL WHERE clip_id = ?",
+                (new_status, log, clip_id),
+            )
+        logger.warning(f"Clip {clip_id} failed while {status}: {error} -> {new_status}")
+        return new_status
+
+    def count_by_status(self):
+        """Return {status: number of clips}."""
+        rows = self._connection().execute(
+            "SELECT status, COUNT(*) AS n FROM clips GROUP BY status"
+        )
+        return {row["status"]: row["n"] for row in rows}
+
+    # --- publications ---
+
+    def start_publication(self, clip_id, worker_id, platform):
+        """Record a pending post of clip_id by worker_id on platform; a
+        failed one is retried, a successful one is left alone."""
+        self._connection().execute(
+            "INSERT INTO publications (clip_id, worker_id, platform)"
+            " VALUES (?, ?, ?) ON CONFLICT (clip_id, worker_id, platform)"
+            " DO UPDATE SET post_status = 'pending' WHERE post_status = 'failed'",
+            (str(clip_id), worker_id, platform),
+        )
+
+    def finish_publication(
+        self,
+        clip_id,
+        worker_id,
+        platform,
+        success,
+        platform_video_id=None,
+        platform_url=None,
+        error=None,
+    ):
+        """Record the outcome of a post attempt; see publish() for the last one."""
+        self._connection().execute(
+            "UPDATE publications SET post_status = ?, post_attempts = post_attempts + 1,"
+            " published_at = ?, platform_video_id = ?, platform_url = ?, error_log = ?"
+            " WHERE clip_id = ? AND worker_id = ? AND platform = ?",
+            (
+                "success" if success else "failed",
+                self._now() if success else None,
+                platform_video_id,
+                platform_url,
+                error,
+                str(clip_id),
+                worker_id,
+                platform,
+            ),
+        )
+
+    def publish(self, clip_id, worker_id, platform, platform_video_id, platform_url):
+        """
+        Record a successful post and mark the clip published, in one
+        transaction, so a posted clip can never be left claimable.
+        """
+        clip_id = str(clip_id)
+        now = self._now()
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE publications SET post_status = 'success',"
+                " post_attempts = post_attempts + 1, published_at = ?,"
+                " platform_video_id = ?, platform_url = ?, error_log = NULL"
+                " WHERE clip_id = ? AND worker_id = ? AND platform = ?",
+                (now, platform_video_id, platform_url, clip_id, worker_id, platform),
+            )
+            self._set_status(
+                db,
+                clip_id,
+                "published",
+                published_at=now,
+                claimed_by=None,
+                claimed_at=None,
+            )
+
+    def successful_publication(self, clip_id, worker_id, platform):
+        """Return the successful post of clip_id by worker_id on platform, or None."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT * FROM publications WHERE clip_id = ? AND worker_id = ?"
+                " AND platform = ? AND post_status = 'success'",
+                (str(clip_id), worker_id, platform),
+            )
+            .fetchone()
+        )
+        return dict(row) if row else None
+
+    def get_publications(self, clip_id):
+        rows = self._connection().execute(
+            "SELECT * FROM publications WHERE clip_id = ? ORDER BY id", (str(clip_id),)
+        )
+        return [dict(row) for row in rows]
+
+    # --- migration ---
+
+    def import_blacklist_csv(self, csv_path=None):
+        """
+        One-time import of the clip blacklist CSV (clip_id,url).
+
+        Blacklisted clips were already handled, so they are stored as
+        published and never picked again. Once a file has been imported it
+        is not read again.
+
+        Returns:
+            int: Number of clips imported, 0 if already done or no file
+        """
+        csv_path = Path(
+            csv_path or os.path.join(BASE_DIR, settings.TWITCH_CLIP_BLACKLIST_PATH)
+        )
+        key = f"imported:{csv_path.resolve()}"
+        if self._meta(key) is not None or not csv_path.exists():
+            return 0
+
+        with open(csv_path, "r", encoding="utf-8") as f:
+            rows = [
+                (row["clip_id"], row.get("url"))
+                for row in csv.DictReader(f)
+                if row.get("clip_id")
+            ]
+        now = self._now()
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO clips (clip_id, url, status, fetched_at)"
+                " VALUES (?, ?, 'published', ?)",
+                [(clip_id, url, now) for clip_id, url in rows],
+            )
+            imported = db.total_changes - before
+            db.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, now))
+        logger.info(f"Imported {imported} blacklisted clips from {csv_path}")
+        return imported
+
+    # --- internals ---
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit; multi-statement writes use _transaction
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.row_factory = sqlite3.Row
+            if self.wal:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _add_missing_columns(self):
+        """Bring a database created by an older version up to SCHEMA."""
+        db = self._connection()
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {
+                row["name"] for row in db.execute(f"PRAGMA table_info({table})")
+            }
+            for column, column_type in columns.items():
+                if column not in existing:
+                    db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def _transition(self, clip_id, new_status, **fields):
+        with self._transaction() as db:
+            self._set_status(db, str(clip_id), new_status, **fields)
+
+    def _set_status(self, db, clip_id, new_status, **fields):
+        """Change the status within the caller's transaction."""
+        row = db.execute(
+            "SELECT status FROM clips WHERE clip_id = ?", (clip_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown clip {clip_id}")
+        self._check_transition(clip_id, row["status"], new_status)
+        assignments = "".join(f", {column} = ?" for column in fields)
+        db.execute(
+            f"UPDATE clips SET status = ?{assignments} WHERE clip_id = ?",
+            (new_status, *fields.values(), clip_id),
+        )
+
+    @staticmethod
+    def _check_transition(clip_id, status, new_status):
+        if new_status not in TRANSITIONS[status]:
+            raise ValueError(f"Clip {clip_id} cannot go from {status} to {new_status}")
+
+    def _meta(self, key):
+        row = (
+            self._connection()
+            .execute("SELECT value FROM meta WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row["value"] if row else None
+
+    def _now(self):
+        return self._iso(self.clock())
+
+    @staticmethod
+    def _iso(timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(
+            timespec="seconds"
+        )
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT: takes the write lock up front, so a
+    read-then-write (a claim) cannot interleave with another writer."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.connection.execute("COMMIT")
+        else:
+            self.connection.execute("ROLLBACK")
+        return False
+
+
+@lru_cache
+def get_clip_job_repository() -> ClipJobRepository:
+    """Process-wide clip store, opened once then shared."""
+    return ClipJobRepository()
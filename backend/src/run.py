@@ -1,10 +1,21 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
+from api.dependencies import get_twitch_service
 from api.routes.auth_routes import router as auth_router
 from middlewares.cors import setup_cors
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the shared Twitch connection pools
+    await get_twitch_service().aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 setup_cors(app)
 app.include_router(auth_router, tags=["auth"])
 
@@ -0,0 +1,202 @@
+import logging
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from config.settings import settings
+from services.scraping_service import ScrapingService
+
+logger = logging.getLogger("HiLiteLogger")
+
+
+class _PooledSession:
+    """A pool slot: its directories and the browser currently living in it."""
+
+    def __init__(self, slot, base_dir):
+        self.slot = slot
+        self.profile_dir = base_dir / f"session_{slot}" / "profile"
+        self.download_dir = base_dir / f"session_{slot}" / "downloads"
+        self.service = None
+        self.uses = 0
+        # Set at checkin, the browser is replaced at the next checkout
+        self.recycle_reason = None
+
+
+class BrowserPool:
+    """
+    Pre-launched ScrapingService browsers shared between downloads.
+
+    Each slot has its own Chrome profile and download directory, so up to
+    `size` downloads run at once without clashing. A browser is
+    health-checked when checked out and replaced when it stops answering,
+    after max_uses downloads, or once its processes use more than
+    max_memory_mb. Replacement happens at checkout, so returning a browser
+    never waits for Chrome to quit and relaunch.
+    """
+
+    def __init__(
+        self,
+        size=None,
+        max_uses=None,
+        max_memory_mb=None,
+        base_dir=None,
+        factory=ScrapingService,
+        warm=True,
+    ):
+        """
+        Args:
+            size: Number of browsers (default: SCRAPING_POOL_SIZE)
+            max_uses: Downloads before a browser is replaced
+                (default: SCRAPING_POOL_MAX_USES)
+            max_memory_mb: Memory above which a browser is replaced
+                (default: SCRAPING_POOL_MAX_MEMORY_MB)
+            base_dir: Parent of the per-slot directories (default: SCRAPING_POOL_DIR)
+            factory: Callable(download_dir, profile_dir) returning a ScrapingService
+            warm: Launch every browser now instead of on first checkout
+        """
+        self.size = size or settings.SCRAPING_POOL_SIZE
+        self.max_uses = max_uses or settings.SCRAPING_POOL_MAX_USES
+        self.max_memory_mb = max_memory_mb or settings.SCRAPING_POOL_MAX_MEMORY_MB
+        self.base_dir = Path(base_dir or settings.SCRAPING_POOL_DIR)
+        self.factory = factory
+
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.launches = 0
+        self.recycles = {"unhealthy": 0, "max_uses": 0, "memory": 0}
+        self.checkouts = 0
+        self.total_wait = 0.0
+
+        sessions = [_PooledSession(slot, self.base_dir) for slot in range(self.size)]
+        if warm:
+            with ThreadPoolExecutor(max_workers=self.size) as executor:
+                list(executor.map(self._try_launch, sessions))
+        for pooled in sessions:
+            self._idle.put(pooled)
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Check out a healthy browser with an empty download directory.
+
+        Raises:
+            TimeoutError: If no browser is free within timeout seconds
+                (default: SCRAPING_POOL_CHECKOUT_TIMEOUT)
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        started = time.perf_counter()
+        try:
+            pooled = self._idle.get(
+                timeout=timeout or settings.SCRAPING_POOL_CHECKOUT_TIMEOUT
+            )
+        except queue.Empty:
+            raise TimeoutError("No browser available in the scraping pool") from None
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += time.perf_counter() - started
+
+        try:
+            if pooled.service is None:
+                self._launch(pooled)
+            elif pooled.recycle_reason is not None:
+                self._recycle(pooled, pooled.recycle_reason)
+            elif not pooled.service.is_healthy():
+                self._recycle(pooled, "unhealthy")
+            self._clear_downloads(pooled)
+            pooled.uses += 1
+            yield pooled.service
+        finally:
+            self._checkin(pooled)
+
+    def close(self):
+        """Quit every idle browser; checked-out ones quit when returned."""
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(pooled)
+        logger.info(f"Browser pool closed, stats: {self.stats()}")
+
+    def stats(self):
+        """Return launch, recycle, checkout and queue wait counters."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "launches": self.launches,
+                "recycles": dict(self.recycles),
+                "checkouts": self.checkouts,
+                "avg_wait": self.total_wait / self.checkouts if self.checkouts else 0.0,
+            }
+
+    def _checkin(self, pooled):
+        if self._closed:
+            self._quit(pooled)
+            return
+        try:
+            if pooled.service is not None:
+                memory = pooled.service.memory_mb()
+                if pooled.uses >= self.max_uses:
+                    pooled.recycle_reason = "max_uses"
+                elif memory is not None and memory > self.max_memory_mb:
+                    logger.info(f"Browser {pooled.slot} uses {memory:.0f} MB")
+                    pooled.recycle_reason = "memory"
+        except Exception as e:
+            # Treated as a browser that stopped answering
+            logger.error(f"Failed to check browser {pooled.slot}: {e}")
+            pooled.recycle_reason = "unhealthy"
+        self._idle.put(pooled)
+
+    def _recycle(self, pooled, reason):
+        logger.info(f"Recycling browser {pooled.slot} ({reason})")
+        with self._lock:
+            self.recycles[reason] += 1
+        self._quit(pooled)
+        # A fresh profile, so cache and history do not grow across browsers
+        shutil.rmtree(pooled.profile_dir, ignore_errors=True)
+        self._launch(pooled)
+
+    def _launch(self, pooled):
+        pooled.download_dir.mkdir(parents=True, exist_ok=True)
+        pooled.service = self.factory(
+            download_dir=pooled.download_dir, profile_dir=str(pooled.profile_dir)
+        )
+        pooled.uses = 0
+        pooled.recycle_reason = None
+        with self._lock:
+            self.launches += 1
+
+    def _try_launch(self, pooled):
+        try:
+            self._launch(pooled)
+        except Exception as e:
+            logger.error(f"Failed to pre-launch browser {pooled.slot}: {e}")
+
+    def _quit(self, pooled):
+        if pooled.service is not None:
+            pooled.service.close()
+            pooled.service = None
+
+    @staticmethod
+    def _clear_downloads(pooled):
+        """Remove leftovers so a download is never mistaken for an older one."""
+        for path in pooled.download_dir.glob("*"):
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+
+@lru_cache
+def get_browser_pool() -> BrowserPool:
+    """Process-wide browser pool, launched on first use."""
+    return BrowserPool()
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+import httpx
+
+from config.path_config import BASE_DIR
+from config.settings import settings
+
+logger = logging.getLogger("HiLiteLogger")
+
+# Keys of a /clips/downloads entry, by orientation
+DOWNLOAD_URL_KEYS = {
+    "portrait": "portrait_download_url",
+    "landscape": "landscape_download_url",
+}
+
+
+class ClipDownloadService:
+    """
+    Download clip MP4s over HTTP from the URLs given by Helix /clips/downloads.
+
+    Files are streamed to disk in chunks next to their final path (.part),
+    resumed with a Range request after a dropped connection, checked
+    against the size announced by the server, then renamed into place.
+    """
+
+    def __init__(
+        self,
+        twitch_api,
+        download_dir=None,
+        max_parallel=None,
+        chunk_size=None,
+        transport=None,
+    ):
+        """
+        Args:
+            twitch_api: TwitchApi used to resolve the download URLs
+            download_dir: Folder of the clips (default: TWITCH_CLIP_FOLDER_PATH)
+            max_parallel: Concurrent downloads (default: CLIP_DOWNLOAD_MAX_PARALLEL)
+            chunk_size: Bytes written per chunk (default: CLIP_DOWNLOAD_CHUNK_BYTES)
+            transport: Optional httpx transport (tests)
+        """
+        self.twitch_api = twitch_api
+        self.download_dir = Path(
+            download_dir or os.path.join(BASE_DIR, settings.TWITCH_CLIP_FOLDER_PATH)
+        )
+        self.max_parallel = max_parallel or settings.CLIP_DOWNLOAD_MAX_PARALLEL
+        self.chunk_size = chunk_size or settings.CLIP_DOWNLOAD_CHUNK_BYTES
+        self.http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.CLIP_DOWNLOAD_TIMEOUT),
+            follow_redirects=True,
+            transport=transport,
+        )
+
+    async def aclose(self):
+        await self.http_client.aclose()
+
+    async def resolve_download_url(
+        self, editor_id, broadcaster_id, clip_id, user_token, orientation="portrait"
+    ):
+        """Return the MP4 URL of a clip in the given orientation, or None."""
+        entries = await self.twitch_api.adownload_broadcaster_clips(
+            editor_id, broadcaster_id, clip_id, user_token
+        )
+        key = DOWNLOAD_URL_KEYS[orientation]
+        for entry in entries:
+            if str(entry.get("clip_id", clip_id)) == str(clip_id) and entry.get(key):
+                return entry[key]
+        logger.warning(f"No {orientation} download URL for clip {clip_id}")
+        return None
+
+    async def download_file(self, url, path):
+        """
+        Stream url to path, resuming a partial download left by a previous try.
+
+        A part file that ends up with another size than announced is
+        discarded and the next try downloads from the start.
+
+        Returns:
+            Path: The downloaded file
+
+        Raises:
+            httpx.HTTPError: If the server keeps failing after CLIP_DOWNLOAD_RETRIES
+            RuntimeError: If the file never matches the announced size
+        """
+        path = Path(path)
+        part_path = path.with_name(path.name + ".part")
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        for attempt in range(settings.CLIP_DOWNLOAD_RETRIES + 1):
+            try:
+                expected = await self._stream_to(url, part_path)
+                size = part_path.stat().st_size
+                if expected is None or size == expected:
+                    os.replace(part_path, path)
+                    logger.info(f"Downloaded {size} bytes to {path}")
+                    return path
+                problem = f"got {size} of {expected} bytes"
+                # Stream ended cleanly with the wrong size: the part file does
+                # not match this URL (e.g. longer than the clip), start over
+                part_path.unlink(missing_ok=True)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    raise
+                problem = f"HTTP {e.response.status_code}"
+            except httpx.TransportError as e:
+                problem = str(e) or type(e).__name__
+            logger.warning(
+                f"Download of {path.name} interrupted ({problem}), "
+                f"attempt {attempt + 1}/{settings.CLIP_DOWNLOAD_RETRIES + 1}"
+            )
+
+        raise RuntimeError(f"Download of {url} did not complete: {problem}")
+
+    async def _stream_to(self, url, part_path):
+        """
+        Append the missing bytes of url to part_path.
+
+        Returns:
+            int | None: Full size announced by the server, if any
+        """
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        async with self.http_client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 416:
+                # Nothing left past offset: the part file is already whole
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                return int(total) if total.isdigit() else offset
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                expected = int(total) if total.isdigit() else None
+                mode = "ab"
+            else:
+                # Server ignored the range, start over
+                length = response.headers.get("Content-Length")
+                expected = int(length) if length and length.isdigit() else None
+                mode = "wb"
+
+            with open(part_path, mode) as f:
+                buffer = bytearray()
+                try:
+                    async for data in response.aiter_bytes():
+                        buffer += data
+                        if len(buffer) >= self.chunk_size:
+                            await asyncio.to_thread(f.write, bytes(buffer))
+                            buffer.clear()
+                finally:
+                    # Keep what arrived before a drop so the next try resumes after it
+                    f.write(buffer)
+        return expected
+
+    async def download_clips(
+        self, clip_ids, editor_id, broadcaster_id, user_token, orientation="portrait"
+    ):
+        """
+        Download several clips, max_parallel at a time.
+
+        Returns:
+            dict: clip_id -> Path of the MP4, or None if it could not be downloaded
+        """
+        # Iterated twice below, so a generator must not be consumed by the first pass
+        clip_ids = list(clip_ids)
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def download(clip_id):
+            async with semaphore:
+                try:
+                    url = await self.resolve_download_url(
+                        editor_id, broadcaster_id, clip_id, user_token, orientation
+                    )
+                    if url is None:
+                        return None
+                    return await self.download_file(
+                        url, self.download_dir / f"{clip_id}.mp4"
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to download clip {clip_id}: {e}")
+                    return None
+
+        paths = await asyncio.gather(*(download(clip_id) for clip_id in clip_ids))
+        return dict(zip(clip_ids, paths))
@@ -1,19 +1,29 @@
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from elevenlabs.client import ElevenLabs
 
-from buisness.eleven_labs_buisness import ElevenLabsBuisness
+from buisness.eleven_labs_buisness import VAD_SAMPLE_RATE, ElevenLabsBuisness
+from config.settings import settings
+from models.transcription_model import Transcription
+from services.ffmpeg_service import FfmpegService
 
 logger = logging.getLogger("HiLiteLogger")
 
 
 class ElevenLabsService:
-    def __init__(self, api_key):
+    def __init__(self, api_key, transcription_cache=None, base_url=None):
         """
         Initialize ElevenLabs service with API key.
 
         Args:
             api_key: ElevenLabs API key
+            transcription_cache: Optional TranscriptionCache checked before
+                each API call
+            base_url: API root, e.g. a local stand-in server
+                (default: ELEVENLABS_BASE_URL, then the public API)
 
         Raises:
             ValueError: If api_key is None or empty
@@ -22,8 +32,15 @@ class ElevenLabsService:
             raise ValueError("ElevenLabs API key is required")
 
         self.api_key = api_key
+        self.transcription_cache = transcription_cache
+        base_url = base_url or settings.ELEVENLABS_BASE_URL or None
         try:
-            self.eleven_labs_client = ElevenLabs(api_key=self.api_key)
+            if base_url:
+                self.eleven_labs_client = ElevenLabs(
+                    api_key=self.api_key, base_url=base_url
+                )
+            else:
+                self.eleven_labs_client = ElevenLabs(api_key=self.api_key)
             logger.info("ElevenLabs service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize ElevenLabs client: {e}")
@@ -36,6 +53,8 @@ class ElevenLabsService:
         model_id="scribe_v1",
         tag_audio_events=True,
         diarize=True,
+        audio_format=None,
+        trim_silence=None,
     ):
         """
         Convert video speech to text using ElevenLabs API.
@@ -46,9 +65,17 @@ class ElevenLabsService:
             model_id: Transcription model to use
             tag_audio_events: Whether to tag audio events (laugh, applause, etc.)
             diarize: Whether to annotate who is speaking
+            audio_format: Audio sent to the API, see
+                ElevenLabsBuisness.extract_audio_bytes_ffmpeg
+                (default: ELEVENLABS_AUDIO_FORMAT)
+            trim_silence: Send only the detected speech regions and shift the
+                word timestamps back (default: ELEVENLABS_TRIM_SILENCE)
 
         Returns:
-            Transcription object from ElevenLabs
+            Transcription object from ElevenLabs, or a Transcription model
+            when a transcription cache is configured or silence is trimmed.
+            A clip without detected speech gets an empty Transcription and
+            no API call.
 
         Raises:
             FileNotFoundError: If video file doesn't exist
@@ -60,23 +87,33 @@ class ElevenLabsService:
         )
 
         try:
+            audio_format = audio_format or settings.ELEVENLABS_AUDIO_FORMAT
+            if trim_silence is None:
+                trim_silence = settings.ELEVENLABS_TRIM_SILENCE
+
             # Extract audio from video
-            audio_data = ElevenLabsBuisness.extract_audio_bytes_from_video(video_path)
+            offset_map = None
+            if trim_silence:
+                audio_data, offset_map = ElevenLabsBuisness.extract_speech_audio_bytes(
+                    video_path, audio_format
+                )
+                if audio_data is None:
+                    logger.info("No speech detected, skipping transcription")
+                    return Transcription()
+            else:
+                audio_data = ElevenLabsBuisness.extract_audio_bytes_ffmpeg(
+                    video_path, audio_format
+                )
             logger.info(f"Audio extracted successfully, size: {len(audio_data)} bytes")
 
-            # Call ElevenLabs API
-            logger.info("Sending audio to ElevenLabs API for transcription...")
-            transcription = self.eleven_labs_client.speech_to_text.convert(
-                file=audio_data,
-                model_id=model_id,
-                tag_audio_events=tag_audio_events,
-                language_code=language_code,
-                diarize=diarize,
-            )
-
-            logger.info(
-                f"Transcription completed successfully, words count: {len(transcription.words)}"
+            transcription = self._transcribe_audio(
+                audio_data, language_code, model_id, tag_audio_events, diarize
             )
+            if offset_map:
+                # Cached in the condensed timeline, the offsets depend on the clip
+                transcription = ElevenLabsBuisness.remap_transcription(
+                    transcription, offset_map
+                )
             return transcription
 
         except (FileNotFoundError, ValueError) as e:
@@ -85,3 +122,124 @@ class ElevenLabsService:
         except Exception as e:
             logger.error(f"ElevenLabs API error during transcription: {e}")
             raise Exception(f"Failed to transcribe audio: {e}") from e
+
+    def speech_to_text_chunked(
+        self,
+        video_path,
+        language_code,
+        model_id="scribe_v1",
+        tag_audio_events=True,
+        diarize=True,
+        audio_format="opus",
+        chunk_seconds=None,
+        overlap_seconds=None,
+        max_workers=None,
+    ):
+        """
+        Transcribe long audio as overlapping chunks sent concurrently.
+
+        The audio is cut at quiet frames into chunks of about chunk_seconds
+        (default: ELEVENLABS_CHUNK_SECONDS) that overlap by overlap_seconds
+        (default: ELEVENLABS_CHUNK_OVERLAP_SECONDS). At most max_workers
+        (default: ELEVENLABS_MAX_PARALLEL_CHUNKS) requests are in flight.
+        Each chunk goes through the transcription cache on its own.
+
+        Returns:
+            Transcription: Merged words on the source timeline
+
+        Raises:
+            FileNotFoundError: If video file doesn't exist
+            ValueError: If video has no audio
+            RuntimeError: If ffmpeg fails to decode the audio
+            Exception: For API errors or processing failures
+        """
+        chunk_seconds = chunk_seconds or settings.ELEVENLABS_CHUNK_SECONDS
+        if overlap_seconds is None:
+            overlap_seconds = settings.ELEVENLABS_CHUNK_OVERLAP_SECONDS
+        max_workers = max_workers or settings.ELEVENLABS_MAX_PARALLEL_CHUNKS
+        output_format = "opus" if audio_format == "opus" else "mp3"
+        logger.info(
+            f"Starting chunked speech-to-text for video: {video_path}, "
+            f"language: {language_code}"
+        )
+
+        if not os.path.exists(video_path):
+            logger.error(f"Video file not found: {video_path}")
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+
+        started = time.perf_counter()
+        if FfmpegService().audio_codec(video_path) is None:
+            logger.error(f"Video has no audio track: {video_path}")
+            raise ValueError(f"Video has no audio track: {video_path}")
+        samples = ElevenLabsBuisness.decode_pcm(video_path)
+        duration = len(samples) / VAD_SAMPLE_RATE
+        chunks = ElevenLabsBuisness.plan_chunks(samples, chunk_seconds, overlap_seconds)
+        logger.info(
+            f"Split {duration:.1f}s of audio into {len(chunks)} chunks, "
+            f"{max_workers} in flight"
+        )
+
+        def transcribe_chunk(chunk):
+            start, end = chunk[0], chunk[1]
+            audio_data = ElevenLabsBuisness.encode_pcm(
+                samples[int(start * VAD_SAMPLE_RATE) : int(end * VAD_SAMPLE_RATE)],
+                output_format,
+            )
+            return self._transcribe_audio(
+                audio_data, language_code, model_id, tag_audio_events, diarize
+            )
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                transcriptions = list(pool.map(transcribe_chunk, chunks))
+        except Exception as e:
+            logger.error(f"ElevenLabs API error during chunked transcription: {e}")
+            raise Exception(f"Failed to transcribe audio: {e}") from e
+
+        transcription = ElevenLabsBuisness.merge_chunk_transcriptions(
+            list(zip(chunks, transcriptions))
+        )
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Chunked transcription completed, words count: "
+            f"{len(transcription.words)}, {duration:.1f}s of audio in "
+            f"{elapsed:.2f}s ({duration / elapsed:.1f}x realtime)"
+        )
+        return transcription
+
+    def _transcribe_audio(
+        self, audio_data, language_code, model_id, tag_audio_events, diarize
+    ):
+        """Send audio bytes to the API, through the transcription cache if any."""
+        cache_key = None
+        if self.transcription_cache is not None:
+            cache_key = self.transcription_cache.make_key(
+                audio_data, model_id, language_code, diarize, tag_audio_events
+            )
+            cached = self.transcription_cache.get(cache_key)
+            if cached is not None:
+                logger.info(
+                    f"Transcription cache hit, words count: {len(cached.words)}, "
+                    f"stats: {self.transcription_cache.stats()}"
+                )
+                return cached
+
+        # Call ElevenLabs API
+        logger.info("Sending audio to ElevenLabs API for transcription...")
+        transcription = self.eleven_labs_client.speech_to_text.convert(
+            file=audio_data,
+            model_id=model_id,
+            tag_audio_events=tag_audio_events,
+            language_code=language_code,
+            diarize=diarize,
+        )
+
+        logger.info(
+            f"Transcription completed successfully, words count: {len(transcription.words)}"
+        )
+        if cache_key is not None:
+            transcription = self.transcription_cache.put(cache_key, transcription)
+            logger.info(
+                f"Transcription cached, stats: {self.transcription_cache.stats()}"
+            )
+        return transcription
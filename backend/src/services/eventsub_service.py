@@ -25,65 +25,66 @@ class EventSubService:
 
         headers = await self.twitch_api.get_headers()
 
-        async with httpx.AsyncClient() as client:
-            # Check existing subscriptions
-            try:
-                list_response = await client.get(
-                    settings.TWITCH_EVENTSUB_URL, headers=headers
-                )
-                list_response.raise_for_status()
-                existing_subs = list_response.json()["data"]
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Failed to list EventSubs: {e}")
-                return None
+        client = self.twitch_api.async_http_client
 
-            # Check if subscription already exists
-            for sub in existing_subs:
-                if (
-                    sub["type"] == event_type
-                    and sub["condition"].get("broadcaster_user_id") == broadcaster_id
-                    and sub["status"] == "enabled"
-                ):
-                    logger.info(f"EventSub already exists (ID: {sub['id']})")
-                    return sub
+        # Check existing subscriptions
+        try:
+            list_response = await client.get(
+                settings.TWITCH_EVENTSUB_URL, headers=headers
+            )
+            list_response.raise_for_status()
+            existing_subs = list_response.json()["data"]
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Failed to list EventSubs: {e}")
+            return None
 
-            # Create new subscription
-            logger.info(f"Creating EventSub for event: {event_type}")
+        # Check if subscription already exists
+        for sub in existing_subs:
+            if (
+                sub["type"] == event_type
+                and sub["condition"].get("broadcaster_user_id") == broadcaster_id
+                and sub["status"] == "enabled"
+            ):
+                logger.info(f"EventSub already exists (ID: {sub['id']})")
+                return sub
 
-            try:
-                response = await client.post(
-                    settings.TWITCH_EVENTSUB_URL,
-                    headers={**headers, "Content-Type": "application/json"},
-                    json={
-                        "type": event_type,
-                        "version": version,
-                        "condition": {"broadcaster_user_id": broadcaster_id},
-                        "transport": {
-                            "method": "webhook",
-                            "callback": f"{settings.BASE_URL}/twitch/webhook",
-                            "secret": settings.TWITCH_EVENTSUB_SECRET,
-                        },
-                    },
-                )
+        # Create new subscription
+        logger.info(f"Creating EventSub for event: {event_type}")
 
-                if response.status_code == 202:
-                    subscription = response.json()["data"][0]
-                    logger.info(
-                        f"Subscription created successfully! (ID: {subscription['id']})"
-                    )
-                    return subscription
-                else:
-                    logger.error(
-                        f"Failed to create EventSub: {response.status_code} - {response.text}"
-                    )
-                    return None
+        try:
+            response = await client.post(
+                settings.TWITCH_EVENTSUB_URL,
+                headers={**headers, "Content-Type": "application/json"},
+                json={
+                    "type": event_type,
+                    "version": version,
+                    "condition": {"broadcaster_user_id": broadcaster_id},
+                    "transport": {
+                        "method": "webhook",
+                        "callback": f"{settings.BASE_URL}/twitch/webhook",
+                        "secret": settings.TWITCH_EVENTSUB_SECRET,
+                    },
+                },
+            )
 
-            except httpx.HTTPStatusError as e:
-                logger.error(f"HTTP error creating EventSub: {e}")
+            if response.status_code == 202:
+                subscription = response.json()["data"][0]
+                logger.info(
+                    f"Subscription created successfully! (ID: {subscription['id']})"
+                )
+                return subscription
+            else:
                 logger.error(
-                    f"Response: {e.response.text if hasattr(e, 'response') else 'N/A'}"
+                    f"Failed to create EventSub: {response.status_code} - {response.text}"
                 )
                 return None
-            except Exception as e:
-                logger.error(f"Unexpected error creating EventSub: {e}")
-                return None
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error creating EventSub: {e}")
+            logger.error(
+                f"Response: {e.response.text if hasattr(e, 'response') else 'N/A'}"
+            )
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error creating EventSub: {e}")
+            return None
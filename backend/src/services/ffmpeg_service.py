@@ -0,0 +1,116 @@
+import logging
+import os
+import re
+import subprocess
+
+from moviepy.config import get_setting
+
+from config.settings import settings
+
+logger = logging.getLogger("HiLiteLogger")
+
+AUDIO_STREAM_PATTERN = re.compile(r"Stream #\S+.*?: Audio: (\w+)")
+
+
+class FfmpegService:
+    """
+    Thin wrapper around the ffmpeg binary for work that does not need
+    MoviePy's frame-by-frame Python loop.
+    """
+
+    def __init__(self, ffmpeg_binary=None):
+        """
+        Args:
+            ffmpeg_binary: Path of the ffmpeg executable. Defaults to
+                FFMPEG_BINARY, then to the binary MoviePy is configured with.
+        """
+        self.ffmpeg_binary = (
+            ffmpeg_binary or settings.FFMPEG_BINARY or get_setting("FFMPEG_BINARY")
+        )
+
+    def run(self, args, input_bytes=None, cwd=None):
+        """
+        Run ffmpeg with the given arguments and return its stdout as bytes.
+
+        Raises:
+            RuntimeError: If ffmpeg exits with a non-zero status
+        """
+        cmd = [self.ffmpeg_binary, "-hide_banner", "-nostdin", "-y", *args]
+        if input_bytes is not None:
+            # -nostdin would make ffmpeg ignore the pipe
+            cmd.remove("-nostdin")
+        logger.debug(f"Running ffmpeg: {' '.join(cmd)}")
+
+        result = subprocess.run(
+            cmd,
+            input=input_bytes,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+        )
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", errors="replace").strip()
+            logger.error(f"ffmpeg failed ({result.returncode}): {stderr[-1000:]}")
+            raise RuntimeError(f"ffmpeg failed: {stderr[-300:]}")
+        return result.stdout
+
+    def audio_codec(self, media_path):
+        """
+        Return the codec name of the first audio stream (e.g. "aac"), or None.
+
+        Reads the stream list ffmpeg prints for its input, nothing is decoded.
+        """
+        cmd = [self.ffmpeg_binary, "-hide_banner", "-nostdin", "-i", media_path]
+        # Without an output ffmpeg exits with an error after listing the streams
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        match = AUDIO_STREAM_PATTERN.search(
+            result.stderr.decode("utf-8", errors="replace")
+        )
+        return match.group(1) if match else None
+
+    def burn_ass_subtitles(self, video_path, ass_path, output_path, fonts_dir=None):
+        """
+        Burn an ASS script into a video in a single ffmpeg pass.
+
+        Video is re-encoded with libx264, audio is stream-copied.
+        """
+        ass_dir, ass_name = os.path.split(os.path.abspath(ass_path))
+        # Run from the script's directory so its path never needs escaping
+        vf = f"ass=filename={escape_filter_value(ass_name)}"
+        if fonts_dir:
+            vf += f":fontsdir={escape_filter_value(os.path.abspath(fonts_dir))}"
+
+        self.run(
+            [
+                "-i",
+                os.path.abspath(video_path),
+                "-map",
+                "0:v:0",
+                "-map",
+                "0:a?",
+                "-vf",
+                vf,
+                "-c:v",
+                "libx264",
+                "-pix_fmt",
+                "yuv420p",
+                "-c:a",
+                "copy",
+                os.path.abspath(output_path),
+            ],
+            cwd=ass_dir,
+        )
+        return output_path
+
+
+def escape_filter_value(value):
+    """Escape a value for use as a filter option inside an ffmpeg filtergraph."""
+    value = str(value).replace("\\", "/")
+    # Filter option level
+    for char in ("'", ":"):
+        value = value.replace(char, "\\" + char)
+    # Filtergraph level
+    value = value.replace("\\", "\\\\")
+    for char in ("'", "[", "]", ",", ";"):
+        value = value.replace(char, "\\" + char)
+    return value
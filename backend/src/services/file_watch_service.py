@@ -0,0 +1,142 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger("HiLiteLogger")
+
+# <linux/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".tmp")
+# Polling period when inotify is unavailable
+POLL_INTERVAL = 0.25
+
+
+def _load_inotify():
+    """libc with inotify symbols, or None off Linux."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DownloadWatcher:
+    """
+    Wait for a browser download to land in a directory.
+
+    A download is final once a file with the wanted suffix exists and no
+    partial file (.crdownload, ...) is left. On Linux, inotify reports the
+    rename of the .crdownload file or the close after write as soon as it
+    happens; elsewhere, or if inotify is unavailable, the directory is
+    polled. Create the watcher before starting the download so no event is
+    missed; files already present are ignored.
+    """
+
+    def __init__(self, directory, suffix=".mp4"):
+        self.directory = Path(directory)
+        self.suffix = suffix
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._existing = set(self._files())
+        self._fd = None
+
+        libc = _load_inotify()
+        if libc is None:
+            logger.info("inotify unavailable, polling for downloads")
+            return
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            logger.warning(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+            return
+        watch = libc.inotify_add_watch(
+            fd, os.fsencode(self.directory), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if watch < 0:
+            logger.warning(
+                f"inotify_add_watch failed: {os.strerror(ctypes.get_errno())}"
+            )
+            os.close(fd)
+            return
+        self._fd = fd
+
+    @property
+    def uses_inotify(self):
+        return self._fd is not None
+
+    def wait(self, timeout=180):
+        """
+        Block until a new download is final and return its path.
+
+        Raises:
+            TimeoutError: If no download completes within timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            path = self._completed()
+            if path is not None:
+                logger.info(f"Download completed: {path.name}")
+                return path
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                files = [f.name for f in self._files()]
+                logger.error(
+                    f"Download timeout after {timeout}s. Files in directory: {files}"
+                )
+                raise TimeoutError(f"Download did not complete after {timeout}s")
+
+            if self._fd is None:
+                time.sleep(min(POLL_INTERVAL, remaining))
+                continue
+            # Wake on the next event; the periodic scan covers missed ones
+            ready, _, _ = select.select([self._fd], [], [], min(1.0, remaining))
+            if ready:
+                self._drain_events()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def _drain_events(self):
+        """Empty the event queue; _completed rescans the directory anyway."""
+        try:
+            while os.read(self._fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _completed(self):
+        files = self._files()
+        if any(f.name.endswith(PARTIAL_SUFFIXES) for f in files):
+            return None
+        new = [
+            f for f in files if f.name.endswith(self.suffix) and f not in self._existing
+        ]
+        return new[0] if new else None
+
+    def _files(self):
+        return sorted(self.directory.glob("*"))
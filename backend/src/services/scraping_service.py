@@ -1,7 +1,10 @@
 import logging
 import os
+import shutil
+import tempfile
 import time
 import uuid
+from fnmatch import fnmatch
 from pathlib import Path
 
 from selenium.common.exceptions import (
@@ -16,9 +19,37 @@ from undetected_chromedriver import Chrome, ChromeOptions
 
 from config.path_config import BASE_DIR
 from config.settings import settings
+from services.file_watch_service import DownloadWatcher
 
 logger = logging.getLogger("HiLiteLogger")
 
+# Requests a clip page does not need to show the download link, as
+# Network.setBlockedURLs wildcards. The player's MP4 is blocked too: the
+# pattern matching the download link is lifted just before it is clicked.
+BLOCKED_URL_PATTERNS = {
+    "media": [
+        "*.m3u8*",
+        "*.ts",
+        "*.ts?*",
+        "*.mp4*",
+        "*usher.ttvnw.net*",
+        "*video-weaver*",
+    ],
+    "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*"],
+    "fonts": ["*.woff*", "*.ttf*", "*.otf*"],
+    "trackers": [
+        "*spade.twitch.tv*",
+        "*countess.twitch.tv*",
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*amazon-adsystem.com*",
+        "*scorecardresearch.com*",
+        "*imasdk.googleapis.com*",
+        "*sentry.io*",
+    ],
+}
+
 
 class ScrapingService:
     """
@@ -26,16 +57,25 @@ class ScrapingService:
     Handles Twitch clip downloads with automated browser interactions.
     """
 
-    def __init__(self):
+    def __init__(self, download_dir=None, profile_dir=None, block_requests=None):
         """
         Initialize Chrome driver with download preferences for Twitch clips.
 
+        Args:
+            download_dir: Folder Chrome saves clips to
+                (default: TWITCH_CLIP_FOLDER_PATH)
+            profile_dir: Chrome user data dir; browsers running at the same
+                time need different ones (default: a private temporary
+                directory, removed on close)
+            block_requests: Skip media, images, fonts and trackers on page
+                loads (default: SCRAPING_BLOCK_REQUESTS)
+
         Raises:
             ValueError: If TWITCH_CLIP_FOLDER_PATH is not set
             Exception: If ChromeDriver fails to initialize
         """
         clip_folder_path = settings.TWITCH_CLIP_FOLDER_PATH
-        if not clip_folder_path:
+        if download_dir is None and not clip_folder_path:
             raise ValueError("TWITCH_CLIP_FOLDER_PATH environment variable is not set")
 
         try:
@@ -52,13 +92,18 @@ class ScrapingService:
             options.add_argument("--window-size=1920,1080")
 
             # Forcer le profil Chrome dans un dossier accessible
-            profile_dir = os.path.join("/tmp", "chrome_profile")
+            self._own_profile_dir = None
+            if profile_dir is None:
+                profile_dir = tempfile.mkdtemp(prefix="chrome_profile_")
+                self._own_profile_dir = profile_dir
             logger.info(f"{profile_dir}")
             Path(profile_dir).mkdir(parents=True, exist_ok=True)
             options.add_argument(f"--user-data-dir={profile_dir}")
 
             # Chemin absolu à partir de la racine du projet
-            download_dir = Path(os.path.join(BASE_DIR, clip_folder_path))
+            download_dir = Path(
+                download_dir or os.path.join(BASE_DIR, clip_folder_path)
+            )
             logger.info(f"this is {download_dir}")
             download_dir.mkdir(parents=True, exist_ok=True)
             self.download_dir = download_dir
@@ -72,6 +117,12 @@ class ScrapingService:
 
             logger.info("Initializing Chrome driver...")
             self.driver = Chrome(options=options)
+            self.blocked_url_patterns = []
+            if block_requests is None:
+                block_requests = settings.SCRAPING_BLOCK_REQUESTS
+            if block_requests:
+                self.block_urls(blocked_url_patterns())
+            self.last_timings = {}
             logger.info(
                 f"Scraping service initialized. Download directory: {download_dir}"
             )
@@ -80,6 +131,49 @@ class ScrapingService:
             logger.error(f"Failed to initialize Chrome driver: {e}")
             raise Exception(f"ChromeDriver initialization failed: {e}") from e
 
+    def is_healthy(self):
+        """Return True if the browser still answers commands."""
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception as e:
+            logger.warning(f"Chrome session is unresponsive: {e}")
+            return False
+
+    def block_urls(self, patterns):
+        """
+        Make Chrome fail every request whose URL matches one of patterns.
+
+        Blocking is an optimization: if the DevTools command fails, pages
+        load in full.
+        """
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+            self.blocked_url_patterns = list(patterns)
+        except Exception as e:
+            logger.warning(f"Request blocking unavailable: {e}")
+
+    def allow_url(self, url):
+        """Stop blocking the patterns matching url (the clip being downloaded)."""
+        self.unblock([p for p in self.blocked_url_patterns if fnmatch(url, p)])
+
+    def unblock(self, patterns):
+        """Stop blocking the given patterns, if any of them is blocked."""
+        kept = [p for p in self.blocked_url_patterns if p not in patterns]
+        if len(kept) != len(self.blocked_url_patterns):
+            self.block_urls(kept)
+
+    def memory_mb(self):
+        """
+        Resident memory of the browser and its child processes, in MB.
+
+        Returns None where it cannot be measured (no /proc, unknown pid).
+        """
+        pid = getattr(self.driver, "browser_pid", None)
+        if not pid:
+            return None
+        return _process_tree_rss_mb(pid)
+
     def accept_cookies(self):
         """
         Accept cookie consent banner if it appears on the page.
@@ -102,9 +196,14 @@ class ScrapingService:
         Download a Twitch clip by navigating to the URL and clicking download link.
 
         :param clip_url: Full URL of the Twitch clip to download.
+        :return: Path of the downloaded MP4, as soon as it is complete.
         """
         logger.info(f"Starting clip download from: {clip_url}")
+        # Seconds since the start of the download at each step
+        timings = {}
+        started = time.perf_counter()
         self.driver.get(clip_url)
+        timings["page_load"] = time.perf_counter() - started
 
         try:
             # Accept cookies if needed
@@ -119,74 +218,13 @@ class ScrapingService:
                     )
                 )
             ).click()
+            timings["menu"] = time.perf_counter() - started
             logger.info("Share button clicked successfully.")
 
             # Click the 'Download portrait version' link (supports both French and English)
-            def wait_for_download_file(download_dir: Path, timeout=180):
-                """
-                Wait for download to complete by checking for .crdownload files.
-
-                Args:
-                    download_dir: Directory where file is being downloaded
-                    timeout: Maximum time to wait in seconds
-
-                Returns:
-                    List of downloaded .mp4 files
-
-                Raises:
-                    TimeoutError: If download doesn't complete in time
-                """
-                end_time = time.time() + timeout
-                logger.info(f"Waiting for download in {download_dir}...")
-
-                # Phase 1: Wait for download to START (crdownload appears)
-                download_started = False
-                start_wait_time = time.time()
-                while time.time() < end_time and (time.time() - start_wait_time) < 30:
-                    files = list(download_dir.glob("*"))
-                    if any(f.name.endswith(".crdownload") for f in files):
-                        download_started = True
-                        logger.info("Download started (.crdownload file detected)")
-                        break
-                    time.sleep(0.5)
-
-                if not download_started:
-                    logger.warning(
-                        "Download may not have started (no .crdownload found)"
-                    )
-
-                # Phase 2: Wait for download to COMPLETE (crdownload disappears)
-                while time.time() < end_time:
-                    files = list(download_dir.glob("*"))
-                    crdownload_files = [
-                        f for f in files if f.name.endswith(".crdownload")
-                    ]
-                    mp4_files = [f for f in files if f.name.endswith(".mp4")]
-
-                    # Log progress
-                    if crdownload_files:
-                        logger.debug(
-                            f"Download in progress: {crdownload_files[0].name}"
-                        )
-
-                    # Download complete when:
-                    # 1. No more .crdownload files
-                    # 2. At least one .mp4 file exists
-                    if not crdownload_files and mp4_files:
-                        logger.info(f"Download completed: {mp4_files[0].name}")
-                        # Wait a bit more for file system to stabilize
-                        time.sleep(2)
-                        return mp4_files
-
-                    time.sleep(1)  # Check every second
-
-                # Timeout - log what we found
-                all_files = list(download_dir.glob("*"))
-                logger.error(
-                    f"Download timeout after {timeout}s. Files in directory: {[f.name for f in all_files]}"
-                )
-                raise TimeoutError(f"Download did not complete after {timeout}s")
-
+            # Watch before clicking so the download cannot finish unseen
+            watcher = DownloadWatcher(self.download_dir)
+            blocked = self.blocked_url_patterns
             try:
                 # fallback xpaths (original xpath + useful fallbacks)
                 xpaths = [
@@ -244,7 +282,13 @@ class ScrapingService:
                     except Exception:
                         download_url = None
 
+                timings["link_found"] = time.perf_counter() - started
                 logger.info(f"download_url: {download_url}")
+                if download_url:
+                    self.allow_url(download_url)
+                else:
+                    # Unknown target: let any media through for the click
+                    self.unblock(BLOCKED_URL_PATTERNS["media"])
                 logger.debug(
                     f"element outerHTML: {download_link.get_attribute('outerHTML')[:1000]}"
                 )
@@ -281,8 +325,10 @@ class ScrapingService:
 
                 # wait for actual file
                 try:
-                    files = wait_for_download_file(self.download_dir, timeout=60)
-                    logger.info(f"Download finished: {files}")
+                    path = watcher.wait(timeout=60)
+                    timings["file_done"] = time.perf_counter() - started
+                    logger.info(f"Download finished: {path}")
+                    return path
                 except TimeoutError as e:
                     logger.warning(f"Download watch timeout: {e}")
                     raise
@@ -290,10 +336,21 @@ class ScrapingService:
             except Exception as e:
                 logger.error(f"Failed at download link handling: {e}")
                 raise
+            finally:
+                watcher.close()
+                if self.blocked_url_patterns != blocked:
+                    # Keep the next page load lean
+                    self.block_urls(blocked)
 
         except Exception as e:
             logger.error(f"Failed to download clip from {clip_url}: {e}")
             raise
+        finally:
+            self.last_timings = timings
+            logger.info(
+                "Clip download timings: "
+                + ", ".join(f"{step}={t:.2f}s" for step, t in timings.items())
+            )
 
     def close(self):
         """
@@ -313,6 +370,8 @@ class ScrapingService:
                     pass
         else:
             logger.warning("Driver was not initialized, nothing to close")
+        if getattr(self, "_own_profile_dir", None):
+            shutil.rmtree(self._own_profile_dir, ignore_errors=True)
 
     def __enter__(self):
         """Context manager entry."""
@@ -322,3 +381,55 @@ class ScrapingService:
         """Context manager exit - ensures driver is closed."""
         self.close()
         return False
+
+
+def blocked_url_patterns():
+    """
+    BLOCKED_URL_PATTERNS plus SCRAPING_EXTRA_BLOCKED_URL_PATTERNS, without
+    the patterns removed by SCRAPING_UNBLOCKED_URL_PATTERNS.
+
+    Unblocked entries are matched against the block patterns themselves,
+    not against URLs: "*.woff*" lets fonts load again, "*.woff" removes
+    nothing. An entry that removes no pattern is logged.
+    """
+    patterns = [p for group in BLOCKED_URL_PATTERNS.values() for p in group]
+    patterns += settings.SCRAPING_EXTRA_BLOCKED_URL_PATTERNS
+    unblocked = settings.SCRAPING_UNBLOCKED_URL_PATTERNS
+    for entry in unblocked:
+        if not any(fnmatch(p, entry) for p in patterns):
+            logger.warning(
+                f"SCRAPING_UNBLOCKED_URL_PATTERNS entry {entry!r} "
+                f"matches no blocked URL pattern"
+            )
+    return [p for p in patterns if not any(fnmatch(p, u) for u in unblocked)]
+
+
+def _process_tree_rss_mb(root_pid):
+    """Sum VmRSS of root_pid and its descendants from /proc (Linux only)."""
+    children = {}
+    rss_kb = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status", encoding="utf-8") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        pid = int(entry)
+        children.setdefault(int(fields["PPid"].strip()), []).append(pid)
+        rss_kb[pid] = int(fields.get("VmRSS", "0 kB").split()[0])
+
+    if root_pid not in rss_kb:
+        return None
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        total += rss_kb.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total / 1024
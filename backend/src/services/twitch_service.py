@@ -1,45 +1,438 @@
+import asyncio
+import importlib.util
 import logging
+import random
+import threading
+import time
+import weakref
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 
 import httpx
-import requests
 
+from buisness.app_token_cache import AppTokenCache
 from config.settings import settings
 
 logger = logging.getLogger("HiLiteLogger")
 
+# App tokens are replaced this long before Twitch expires them
+TOKEN_EXPIRY_MARGIN = 3600
+# Largest page Helix accepts for /clips
+CLIPS_PAGE_SIZE = 100
+# Most ids Helix accepts in one /games call
+GAMES_PER_REQUEST = 100
+# Most logins Helix accepts in one /users call
+USERS_PER_REQUEST = 100
+
+
+class ConnectionMetrics:
+    """
+    Per-host request and connection reuse counters for an httpx client.
+
+    A connection is recognised by the network stream httpx reports in the
+    response extensions; a stream seen before means a kept-alive (HTTP/1.1)
+    or multiplexed (HTTP/2) connection was reused.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams = defaultdict(weakref.WeakSet)
+        self._hosts = defaultdict(
+            lambda: {"requests": 0, "new_connections": 0, "reused_connections": 0}
+        )
+        self._http_versions = defaultdict(lambda: defaultdict(int))
+
+    def record(self, response):
+        host = response.request.url.host
+        stream = response.extensions.get("network_stream")
+        http_version = response.extensions.get("http_version", b"unknown")
+        with self._lock:
+            counters = self._hosts[host]
+            counters["requests"] += 1
+            self._http_versions[host][http_version.decode()] += 1
+            if stream is None:
+                return
+            if stream in self._streams[host]:
+                counters["reused_connections"] += 1
+            else:
+                counters["new_connections"] += 1
+                self._streams[host].add(stream)
+
+    def stats(self):
+        """Return {host: counters} with the reuse ratio and HTTP versions seen."""
+        with self._lock:
+            stats = {}
+            for host, counters in self._hosts.items():
+                tracked = counters["new_connections"] + counters["reused_connections"]
+                stats[host] = {
+                    **counters,
+                    "reuse_ratio": (
+                        counters["reused_connections"] / tracked if tracked else 0.0
+                    ),
+                    "http_versions": dict(self._http_versions[host]),
+                }
+            return stats
+
+
+def _http2_available():
+    """HTTP/2 needs the optional h2 package (httpx[http2])."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class RateLimiter:
+    """
+    Token bucket pacing Helix requests across coroutines and threads.
+
+    The bucket holds `points` tokens refilled over `period` seconds, like
+    Twitch's own limiter. Each request reserves one token; when the bucket
+    is empty the reservation goes negative and the caller sleeps until its
+    token is refilled, so waiting requests are served in order. Ratelimit-*
+    response headers correct the local estimate: the bucket never holds more
+    than Twitch says remains, and an exhausted bucket blocks until reset.
+    """
+
+    def __init__(self, points=None, period=60.0, clock=time.monotonic):
+        self.points = points or settings.TWITCH_RATE_LIMIT_POINTS
+        self.period = period
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.points)
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+        self.remaining = None
+
+    @property
+    def rate(self):
+        return self.points / self.period
+
+    async def acquire(self):
+        """Wait for a token and return the time spent waiting, in seconds."""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(-self._tokens / self.rate, self._blocked_until - now, 0.0)
+            self.requests += 1
+            if wait > 0:
+                self.throttled += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def update(self, headers):
+        """Align the bucket with the Ratelimit-* headers of a Helix response."""
+        try:
+            limit = headers.get("Ratelimit-Limit")
+            remaining = headers.get("Ratelimit-Remaining")
+            reset = headers.get("Ratelimit-Reset")
+            with self._lock:
+                if limit is not None:
+                    self.points = max(int(limit), 1)
+                if remaining is None:
+                    return
+                self.remaining = int(remaining)
+                now = self.clock()
+                self._refill(now)
+                self._tokens = min(self._tokens, float(self.remaining))
+                if self.remaining <= 0 and reset is not None:
+                    self._blocked_until = max(
+                        self._blocked_until, now + max(int(reset) - time.time(), 0)
+                    )
+        except ValueError:
+            logger.warning(f"Ignoring malformed Twitch rate limit headers: {headers}")
+
+    def record_retry(self, status_code):
+        with self._lock:
+            self.retries += 1
+            if status_code == 429:
+                self.rate_limited += 1
+
+    def stats(self):
+        """Return request, queue wait and retry counters."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+                "avg_wait": self.total_wait / self.requests if self.requests else 0.0,
+                "rate_limited": self.rate_limited,
+                "retries": self.retries,
+                "remaining": self.remaining,
+            }
+
+    def _refill(self, now):
+        """Add the tokens earned since the last call. Lock held."""
+        self._tokens = min(
+            self._tokens + (now - self._updated) * self.rate, float(self.points)
+        )
+        self._updated = now
+
+
+def retry_delay(response, attempt):
+    """
+    Seconds to wait before retrying a 429 or 5xx response.
+
+    A 429 waits for the bucket reset announced by Twitch; otherwise the
+    delay grows exponentially. Both get random jitter so that coroutines
+    throttled together do not retry together.
+    """
+    backoff = settings.TWITCH_RETRY_BACKOFF
+    if response.status_code == 429:
+        reset = response.headers.get("Ratelimit-Reset")
+        if reset is not None and reset.isdigit():
+            return max(int(reset) - time.time(), 0) + random.uniform(0, backoff)
+    return random.uniform(0, backoff * 2**attempt)
+
+
+class _SyncLoop:
+    """
+    Event loop running in a daemon thread, with its own async client.
+
+    Lets the sync wrappers run the async Helix methods from plain scripts
+    without touching the caller's loop or the main client's connections.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="twitch-sync-loop", daemon=True
+        )
+        self.thread.start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self):
+        self.run(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
 
 class TwitchApi:
     """
     Handles Twitch API interactions for authentication, video fetching, and downloading.
     """
 
-    def __init__(self, client_id, client_secret):
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        transport=None,
+        game_info_cache=None,
+        broadcaster_id_cache=None,
+        app_token_cache=None,
+        token_validation_cache=None,
+    ):
         """
         Initialize TwitchApi instance and authenticate.
 
+        Every Helix method is async and shares one connection-pooled client
+        until aclose(). The sync methods of the same name are thin wrappers
+        for scripts; they run the async ones on a private loop.
+
         :param client_id: Twitch application client ID.
         :param client_secret: Twitch application client secret.
+        :param transport: Optional httpx transport of the clients (tests).
+        :param game_info_cache: Optional GameInfoCache checked before /games.
+        :param broadcaster_id_cache: Optional BroadcasterIdCache checked before /users.
+        :param app_token_cache: AppTokenCache shared with other instances
+                                (default: one private to this instance).
+        :param token_validation_cache: Optional TokenValidationCache checked
+                                       before /oauth2/validate.
         """
         self.BASE_URL = settings.BASE_URL
         self.client_id = client_id
         self.client_secret = client_secret
         self.scopes = settings.TWITCH_SCOPES
+        self.game_info_cache = game_info_cache
+        self.broadcaster_id_cache = broadcaster_id_cache
+        self.token_validation_cache = token_validation_cache
 
         # Token management
         self._access_token = None
         self._token_expiry = None
+        self.app_token_cache = app_token_cache or AppTokenCache()
+        self._background_refresh = None
+
+        # Shared HTTP clients
+        self.metrics = ConnectionMetrics()
+        self.rate_limiter = RateLimiter()
+        self._transport = transport
+        self._http2 = settings.TWITCH_HTTP2 and _http2_available()
+        if settings.TWITCH_HTTP2 and not self._http2:
+            logger.warning("h2 is not installed, Twitch client falls back to HTTP/1.1")
+        self.async_http_client = self._make_client()
+        self._sync_loop = None
+        self._sync_loop_lock = threading.Lock()
+
+    def _make_client(self):
+        async def record(response):
+            self.metrics.record(response)
+
+        return httpx.AsyncClient(
+            http2=self._http2,
+            limits=httpx.Limits(
+                max_connections=settings.TWITCH_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.TWITCH_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.TWITCH_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.TWITCH_HTTP_TIMEOUT),
+            transport=self._transport,
+            event_hooks={"response": [record]},
+        )
+
+    def _client(self):
+        """The async client bound to the running loop."""
+        if self._sync_loop is not None:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is self._sync_loop.loop:
+                return self._sync_loop.client
+        return self.async_http_client
+
+    def _run_sync(self, coro):
+        """Run a coroutine on the private loop and wait for its result."""
+        with self._sync_loop_lock:
+            if self._sync_loop is None:
+                self._sync_loop = _SyncLoop(self._make_client())
+        return self._sync_loop.run(coro)
+
+    def close(self):
+        """Close the sync wrappers' loop. Use aclose() from async code to close all."""
+        with self._sync_loop_lock:
+            if self._sync_loop is not None:
+                self._sync_loop.close()
+                self._sync_loop = None
+
+    async def aclose(self):
+        """Close every pooled client and log their connection reuse."""
+        logger.info(f"Twitch HTTP connection stats: {self.metrics.stats()}")
+        logger.info(f"Twitch rate limit stats: {self.rate_limiter.stats()}")
+        if self._background_refresh is not None:
+            self._background_refresh.cancel()
+        self.close()
+        await self.async_http_client.aclose()
+
+    def connection_stats(self):
+        """Per-host request, new/reused connection and HTTP version counters."""
+        return self.metrics.stats()
+
+    def rate_limit_stats(self):
+        """Queue wait, 429 and retry counters of the Helix scheduler."""
+        return self.rate_limiter.stats()
+
+    async def _helix_get(self, url, params=None, user_token=None):
+        """
+        GET a Helix endpoint through the rate limiter, retrying 429 and 5xx.
+
+        App token requests share the rate limiter bucket. User token
+        requests count against that user's own bucket on Twitch's side, so
+        they are only retried.
+
+        :return: The last response; callers still check its status.
+        """
+        if user_token is None:
+            headers = await self.get_headers()
+            rate_limiter = self.rate_limiter
+        else:
+            headers = {
+                "Client-Id": self.client_id,
+                "Authorization": f"Bearer {user_token}",
+            }
+            rate_limiter = None
+
+        attempt = 0
+        while True:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            response = await self._client().get(url, headers=headers, params=params)
+            if rate_limiter is not None:
+                rate_limiter.update(response.headers)
+
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if not retryable or attempt >= settings.TWITCH_MAX_RETRIES:
+                return response
+
+            delay = retry_delay(response, attempt)
+            attempt += 1
+            self.rate_limiter.record_retry(response.status_code)
+            logger.warning(
+                f"Twitch answered {response.status_code} for {url}, "
+                f"retry {attempt}/{settings.TWITCH_MAX_RETRIES} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
 
     async def get_access_token(self) -> str:
         """
         Get valid access token, refreshing if necessary.
 
+        A token refreshed by another instance sharing the app token cache
+        is reused. Only one refresh runs at a time; callers arriving
+        meanwhile wait for its token. Within TWITCH_APP_TOKEN_REFRESH_AHEAD
+        seconds of the deadline, the current token is returned and a new
+        one is fetched in the background.
+
         :return: Valid access token
         """
         if self._access_token is None or datetime.now() >= self._token_expiry:
-            await self._refresh_token()
+            if not self._use_cached_token():
+                await self._refresh_token_once()
+        if datetime.now() >= self._token_expiry - timedelta(
+            seconds=settings.TWITCH_APP_TOKEN_REFRESH_AHEAD
+        ):
+            self._schedule_background_refresh()
         return self._access_token
 
+    def _use_cached_token(self, fresh_for=0.0):
+        """Adopt the shared token if it stays usable for fresh_for more seconds."""
+        entry = self.app_token_cache.get(self.client_id)
+        if entry is None:
+            return False
+        access_token, expires_at = entry
+        usable_for = expires_at - TOKEN_EXPIRY_MARGIN - time.time()
+        if usable_for <= fresh_for:
+            return False
+        self._access_token = access_token
+        self._token_expiry = datetime.now() + timedelta(seconds=usable_for)
+        return True
+
+    async def _refresh_token_once(self, fresh_for=0.0):
+        """Refresh unless another coroutine did while we waited for the lock."""
+        async with self.app_token_cache.refresh_lock(self.client_id):
+            if not self._use_cached_token(fresh_for):
+                await self._refresh_token()
+
+    def _schedule_background_refresh(self):
+        if self._background_refresh is not None and not self._background_refresh.done():
+            return
+        self._background_refresh = asyncio.get_running_loop().create_task(
+            self._refresh_token_in_background()
+        )
+
+    async def _refresh_token_in_background(self):
+        try:
+            await self._refresh_token_once(
+                fresh_for=settings.TWITCH_APP_TOKEN_REFRESH_AHEAD
+            )
+        except Exception as e:
+            # The current token is still valid, the next call tries again
+            logger.warning(f"Background Twitch token refresh failed: {e}")
+
     async def _refresh_token(self):
         """
         Authenticate and get a new app access token.
@@ -53,23 +446,25 @@ class TwitchApi:
 
         try:
             logger.info("Authenticating with Twitch API...")
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, data=payload, timeout=10)
-                response.raise_for_status()
+            response = await self._client().post(url, data=payload)
+            response.raise_for_status()
 
-                data = response.json()
-                if "access_token" not in data:
-                    logger.error("Access token not found in Twitch API response")
-                    raise ValueError("Invalid authentication response from Twitch")
-
-                self._access_token = data["access_token"]
-                # Token expires in ~60 days, but we refresh 1 hour before
-                expires_in = data.get("expires_in", 5184000)  # Default 60 days
-                self._token_expiry = datetime.now() + timedelta(
-                    seconds=expires_in - 3600
-                )
+            data = response.json()
+            if "access_token" not in data:
+                logger.error("Access token not found in Twitch API response")
+                raise ValueError("Invalid authentication response from Twitch")
+
+            self._access_token = data["access_token"]
+            # Token expires in ~60 days, but we refresh 1 hour before
+            expires_in = data.get("expires_in", 5184000)  # Default 60 days
+            self._token_expiry = datetime.now() + timedelta(
+                seconds=expires_in - TOKEN_EXPIRY_MARGIN
+            )
+            self.app_token_cache.put(
+                self.client_id, self._access_token, time.time() + expires_in
+            )
 
-                logger.info("Successfully authenticated with Twitch API")
+            logger.info("Successfully authenticated with Twitch API")
 
         except httpx.TimeoutException:
             logger.error("Twitch authentication timeout")
@@ -101,17 +496,14 @@ class TwitchApi:
                 "grant_type": "refresh_token",
                 "refresh_token": refresh_token,
             }
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    settings.TWITCH_TOKEN_URI, data=data, time_out=10
-                )
-                response.raise_for_status()
-                logger.info("Refreshed user access token successfully")
-                return response.json()
+            response = await self._client().post(settings.TWITCH_TOKEN_URI, data=data)
+            response.raise_for_status()
+            logger.info("Refreshed user access token successfully")
+            return response.json()
         except Exception as e:
             logger.info(f"Failed to refresh user access token : {e}")
 
-    def is_token_valid(self, access_token):
+    async def ais_token_valid(self, access_token):
         """
         Verify if the access token is still valid and return it's data
             Args:
@@ -119,104 +511,196 @@ class TwitchApi:
             Return:
                - {'valid': bool, 'expires_in': int, 'scopes': list}
         """
+        cache = self.token_validation_cache
+        if cache is not None:
+            cached = cache.get(access_token)
+            if cached is not None:
+                return cached
+
         url = settings.TWITCH_OAUTH2_VALIDATE
         try:
             header = {"Authorization": f"OAuth {access_token}"}
-            response = requests.get(url, headers=header)
+            response = await self._client().get(url, headers=header)
 
             if response.status_code == 401:
                 logger.info("The user access token is expired")
-                return {"valid": False, "expires_in": 0}
+                result = {"valid": False, "expires_in": 0}
+            else:
+                response.raise_for_status()
+                data = response.json()
+                result = {"valid": True, "expires_in": data.get("expires_in")}
 
-            data = response.json()
-            return {"valid": True, "expires_in": data.get("expires_in")}
+            if cache is not None:
+                cache.put(access_token, result)
+            return result
 
         except Exception as e:
             logger.info(
                 f"Error validation token , the access token may be expired : {e}"
             )
 
-    def get_broadcaster_id(self, username):
+    async def aget_broadcaster_id(self, username):
         """
         Fetch the user ID for a given Twitch username.
 
         :param username: Twitch username.
         :return: User ID as a string, or None if not found.
         """
+        ids, unresolved = await self.aget_broadcaster_ids([username])
+        # An empty username resolves to nothing and is not unresolved either
+        if unresolved or not ids:
+            return None
+        broadcaster_id = next(iter(ids.values()))
+        logger.info(f"Found broadcaster ID: {broadcaster_id} for {username}")
+        return broadcaster_id
+
+    async def aget_broadcaster_ids(self, usernames):
+        """
+        Resolve many Twitch usernames to user IDs.
+
+        Known logins come from the broadcaster ID cache; the others are
+        requested with up to USERS_PER_REQUEST logins per /users call, calls
+        running concurrently.
+
+        :param usernames: Iterable of Twitch usernames, case-insensitive.
+        :return: (dict of lowercase login -> user ID, list of logins not resolved).
+        """
+        ids = {}
+        missing = []
+        for login in dict.fromkeys(u.strip().lower() for u in usernames if u):
+            cached = (
+                self.broadcaster_id_cache.get(login)
+                if self.broadcaster_id_cache
+                else None
+            )
+            if cached is not None:
+                ids[login] = cached
+            else:
+                missing.append(login)
+
+        if missing:
+            batches = [
+                missing[i : i + USERS_PER_REQUEST]
+                for i in range(0, len(missing), USERS_PER_REQUEST)
+            ]
+            logger.info(
+                f"Fetching broadcaster IDs for {len(missing)} usernames "
+                f"in {len(batches)} requests"
+            )
+            resolved = {}
+            for users in await asyncio.gather(*(self._fetch_users(b) for b in batches)):
+                resolved.update({user["login"].lower(): user["id"] for user in users})
+            if self.broadcaster_id_cache is not None:
+                self.broadcaster_id_cache.put_many(resolved)
+            ids.update(resolved)
+
+        unresolved = [login for login in missing if login not in ids]
+        if unresolved:
+            logger.warning(f"No user found for usernames: {unresolved}")
+        return ids, unresolved
+
+    async def _fetch_users(self, logins):
+        """One /users call for at most USERS_PER_REQUEST logins, [] on error."""
         try:
-            url = f"{self.BASE_URL}/users"
-            params = {"login": username}
-            logger.info(f"Fetching broadcaster ID for username: {username}")
-
-            response = requests.get(
-                url,
-                headers={
-                    "Client-Id": self.client_id,
-                    "Authorization": f"Bearer {self._access_token}",
-                },
-                params=params,
-                timeout=10,
+            response = await self._helix_get(
+                f"{self.BASE_URL}/users",
+                params=[("login", login) for login in logins],
             )
             response.raise_for_status()
+            return response.json().get("data", [])
 
-            data = response.json().get("data", [])
-            if data:
-                broadcaster_id = data[0]["id"]
-                logger.info(f"Found broadcaster ID: {broadcaster_id} for {username}")
-                return broadcaster_id
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to fetch user IDs for {logins}: {e}")
+            return []
 
-            logger.warning(f"No user found for username: {username}")
-            return None
+    async def aiter_broadcaster_clips(
+        self, brodcaster_id, filters=None, min_view_count=None, max_clips=None
+    ):
+        """
+        Yield a broadcaster's clips page by page, following the Helix cursor.
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch user ID for {username}: {e}")
-            return None
+        Only the current page is held in memory, so callers can filter or
+        store clips while the next pages are still to be fetched.
 
-    def get_broadcaster_clips(self, brodcaster_id, filters={"first": 50}):
+        :param brodcaster_id: Twitch user ID.
+        :param filters: Dictionary of filters (e.g., first, started_at, ended_at).
+                       Without started_at, clips from the last 7 days are listed.
+        :param min_view_count: Stop at the first clip below this view count.
+                       Helix returns clips by descending view count, so none
+                       of the following ones would pass either.
+        :param max_clips: Stop after yielding this many clips.
+        :raises httpx.HTTPError: If a page request fails.
         """
-        Fetch videos for a given Twitch user based on filters.
+        url = f"{self.BASE_URL}/clips"
+        params = {"broadcaster_id": brodcaster_id, "first": CLIPS_PAGE_SIZE}
+        params.update(filters or {})
+
+        # Default time window, keeping the caller's other filters
+        if params.get("started_at") is None:
+            ended_at = datetime.now(timezone.utc)
+            started_at = ended_at - timedelta(days=7)
+            params["started_at"] = started_at.isoformat()
+            params["ended_at"] = ended_at.isoformat()
+
+        if max_clips is not None:
+            params["first"] = min(int(params["first"]), max_clips)
+
+        logger.info(f"Fetching clips for broadcaster {brodcaster_id}")
+        yielded = 0
+        pages = 0
+        while True:
+            response = await self._helix_get(url, params=params)
+            response.raise_for_status()
+            payload = response.json()
+            pages += 1
+
+            for clip in payload.get("data", []):
+                if (
+                    min_view_count is not None
+                    and clip.get("view_count", 0) < min_view_count
+                ):
+                    logger.info(
+                        f"Clip views below {min_view_count}, stopping after "
+                        f"{yielded} clips"
+                    )
+                    return
+                yield clip
+                yielded += 1
+                if max_clips is not None and yielded >= max_clips:
+                    return
+
+            cursor = payload.get("pagination", {}).get("cursor")
+            if not cursor:
+                logger.info(
+                    f"Retrieved {yielded} clips in {pages} pages for broadcaster "
+                    f"{brodcaster_id}"
+                )
+                return
+            params["after"] = cursor
 
-        :param brodcaster_id: Twitch user ID.
-        :param filters: Dictionary of filters (e.g., views, duration, started_at, ended_at).
-                       If not provided, defaults to clips from the last 7 days.
-        :return: List of video metadata dictionaries.
+    async def aget_broadcaster_clips(
+        self, brodcaster_id, filters=None, min_view_count=None, max_clips=None
+    ):
         """
-        try:
-            url = f"{self.BASE_URL}/clips"
-            params = {"broadcaster_id": brodcaster_id}
-
-            # Set default time window if no filters provided
-            if filters.get("started_at") is None:
-                ended_at = datetime.now(timezone.utc)
-                started_at = ended_at - timedelta(days=7)
-                filters = {
-                    "started_at": started_at.isoformat(),
-                    "ended_at": ended_at.isoformat(),
-                }
+        Fetch every clip of a broadcaster matching the filters.
 
-            params.update(filters)
-            logger.info(f"Fetching clips for broadcaster {brodcaster_id}")
-
-            response = requests.get(
-                url,
-                headers={
-                    "Client-Id": self.client_id,
-                    "Authorization": f"Bearer {self._access_token}",
-                },
-                params=params,
-                timeout=10,
-            )
-            response.raise_for_status()
+        See aiter_broadcaster_clips for the arguments; this collects all pages.
 
-            clips = response.json().get("data", [])
-            logger.info(f"Retrieved {len(clips)} clips for broadcaster {brodcaster_id}")
+        :return: List of clip metadata dictionaries, empty on error.
+        """
+        clips = []
+        try:
+            async for clip in self.aiter_broadcaster_clips(
+                brodcaster_id, filters, min_view_count, max_clips
+            ):
+                clips.append(clip)
             return clips
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to fetch clips for broadcaster {brodcaster_id}: {e}")
             return []
 
-    def download_broadcaster_clips(
+    async def adownload_broadcaster_clips(
         self, editor_id, broadcaster_id, clip_id, user_token
     ):
         """
@@ -237,15 +721,7 @@ class TwitchApi:
 
             logger.info(f"Downloading clip {clip_id} for broadcaster {broadcaster_id}")
 
-            response = requests.get(
-                url,
-                headers={
-                    "Client-Id": self.client_id,
-                    "Authorization": f"Bearer {user_token}",
-                },
-                params=params,
-                timeout=10,
-            )
+            response = await self._helix_get(url, params=params, user_token=user_token)
 
             response.raise_for_status()
             clips = response.json().get("data", [])
@@ -253,38 +729,115 @@ class TwitchApi:
                 f"Retrieved {len(clips)} clips for broadcaster {broadcaster_id}"
             )
             return clips
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(
                 f"Failed to download clips for broadcaster {broadcaster_id}: {e}"
             )
             return []
 
-    def get_game_info(self, game_id):
+    async def aget_game_info(self, game_id):
         """
         Fetch game information from Twitch API using the game ID.
 
         :param game_id: Twitch game ID.
         :return: Game info dict or None if not found.
         """
-        try:
-            url = f"{self.BASE_URL}/games"
-            params = {"id": game_id}
-            logger.info(f"Fetching game info for game_id: {game_id}")
+        games = await self.aget_games_info([game_id])
+        game_info = games.get(str(game_id))
+        if game_info is None:
+            logger.warning(f"No game found for game_id: {game_id}")
+        return game_info
+
+    async def aget_games_info(self, game_ids):
+        """
+        Fetch game information for many game IDs at once.
 
-            response = requests.get(
-                url, headers=self.headers, params=params, timeout=10
+        Cached games are answered locally; the others are requested with up
+        to GAMES_PER_REQUEST ids per /games call, calls running concurrently.
+
+        :param game_ids: Iterable of Twitch game IDs, duplicates and empty ids ignored.
+        :return: Dict of game_id -> game info, unknown or failed ids left out.
+        """
+        games = {}
+        missing = []
+        for game_id in dict.fromkeys(str(g) for g in game_ids if g):
+            cached = self.game_info_cache.get(game_id) if self.game_info_cache else None
+            if cached is not None:
+                games[game_id] = cached
+            else:
+                missing.append(game_id)
+
+        if not missing:
+            return games
+
+        batches = [
+            missing[i : i + GAMES_PER_REQUEST]
+            for i in range(0, len(missing), GAMES_PER_REQUEST)
+        ]
+        logger.info(
+            f"Fetching game info for {len(missing)} game ids in {len(batches)} requests"
+        )
+        for fetched in await asyncio.gather(*(self._fetch_games(b) for b in batches)):
+            for game_info in fetched:
+                if self.game_info_cache is not None:
+                    self.game_info_cache.put(game_info["id"], game_info)
+                games[game_info["id"]] = game_info
+
+        if self.game_info_cache is not None:
+            logger.debug(f"Game info cache stats: {self.game_info_cache.stats()}")
+        return games
+
+    async def _fetch_games(self, game_ids):
+        """One /games call for at most GAMES_PER_REQUEST ids, [] on error."""
+        try:
+            response = await self._helix_get(
+                f"{self.BASE_URL}/games",
+                params=[("id", game_id) for game_id in game_ids],
             )
             response.raise_for_status()
+            return response.json().get("data", [])
 
-            data = response.json().get("data", [])
-            if data:
-                game_info = data[0]
-                logger.info(f"Found game: {game_info.get('name')}")
-                return game_info
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to fetch game info for game_ids {game_ids}: {e}")
+            return []
 
-            logger.warning(f"No game found for game_id: {game_id}")
-            return None
+    # ============= Sync wrappers (scripts) =============
+    def is_token_valid(self, access_token):
+        """Sync version of ais_token_valid."""
+        return self._run_sync(self.ais_token_valid(access_token))
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch game info for game_id {game_id}: {e}")
-            return None
+    def get_broadcaster_id(self, username):
+        """Sync version of aget_broadcaster_id."""
+        return self._run_sync(self.aget_broadcaster_id(username))
+
+    def get_broadcaster_ids(self, usernames):
+        """Sync version of aget_broadcaster_ids."""
+        return self._run_sync(self.aget_broadcaster_ids(usernames))
+
+    def get_broadcaster_clips(
+        self, brodcaster_id, filters=None, min_view_count=None, max_clips=None
+    ):
+        """Sync version of aget_broadcaster_clips."""
+        return self._run_sync(
+            self.aget_broadcaster_clips(
+                brodcaster_id, filters, min_view_count, max_clips
+            )
+        )
+
+    def download_broadcaster_clips(
+        self, editor_id, broadcaster_id, clip_id, user_token
+    ):
+        """Sync version of adownload_broadcaster_clips."""
+        return self._run_sync(
+            self.adownload_broadcaster_clips(
+                editor_id, broadcaster_id, clip_id, user_token
+            )
+        )
+
+    def get_game_info(self, game_id):
+        """Sync version of aget_game_info."""
+        return self._run_sync(self.aget_game_info(game_id))
+
+    def get_games_info(self, game_ids):
+        """Sync version of aget_games_info."""
+        return self._run_sync(self.aget_games_info(game_ids))
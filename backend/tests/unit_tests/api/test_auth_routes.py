@@ -0,0 +1,103 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.dependencies import (
+    get_current_user,
+    get_twitch_service,
+    get_twitch_token_business,
+    get_user_business,
+)
+from api.routes.auth_routes import router
+from buisness.db.twitch_token_business import TwitchTokensBusiness
+from config.settings import settings
+from models.user_model import User
+from services.twitch_service import TwitchApi
+
+CONCURRENT_REQUESTS = 20
+VALIDATE_DELAY = 0.25
+
+
+def build_app(twitch_api, token_repository):
+    app = FastAPI()
+    app.include_router(router)
+
+    async def current_user():
+        return User(id="user-1", username="hilite", email=None, profile_picture=None)
+
+    app.dependency_overrides[get_current_user] = current_user
+    app.dependency_overrides[get_user_business] = lambda: MagicMock()
+    app.dependency_overrides[get_twitch_token_business] = lambda: TwitchTokensBusiness(
+        MagicMock(), token_repository
+    )
+    app.dependency_overrides[get_twitch_service] = lambda: twitch_api
+    return app
+
+
+@pytest.mark.asyncio
+async def test_auth_me_throughput_with_slow_twitch():
+    """A slow token validation must not serialize concurrent /auth/me calls."""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_validate(request):
+        nonlocal in_flight, max_in_flight
+        assert str(request.url) == settings.TWITCH_OAUTH2_VALIDATE
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(VALIDATE_DELAY)
+        in_flight -= 1
+        return httpx.Response(200, json={"expires_in": 3600})
+
+    twitch_api = TwitchApi("id", "secret", transport=httpx.MockTransport(slow_validate))
+    token_repository = MagicMock()
+    app = build_app(twitch_api, token_repository)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/auth/me",
+                    json={"twitch_access_token": f"token-{i}"},
+                    headers={"Authorization": "Bearer supabase"},
+                )
+                for i in range(CONCURRENT_REQUESTS)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    await twitch_api.aclose()
+
+    assert [r.status_code for r in responses] == [200] * CONCURRENT_REQUESTS
+    assert token_repository.create_or_update.call_count == CONCURRENT_REQUESTS
+    assert max_in_flight == CONCURRENT_REQUESTS
+    # Serialized, the validations alone would take CONCURRENT_REQUESTS * delay
+    assert elapsed < CONCURRENT_REQUESTS * VALIDATE_DELAY / 4
+
+
+@pytest.mark.asyncio
+async def test_auth_me_rejects_invalid_twitch_token():
+    twitch_api = TwitchApi(
+        "id", "secret", transport=httpx.MockTransport(lambda r: httpx.Response(401))
+    )
+    token_repository = MagicMock()
+    app = build_app(twitch_api, token_repository)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/auth/me",
+            json={"twitch_access_token": "expired"},
+            headers={"Authorization": "Bearer supabase"},
+        )
+    await twitch_api.aclose()
+
+    assert response.status_code == 400
+    token_repository.create_or_update.assert_not_called()
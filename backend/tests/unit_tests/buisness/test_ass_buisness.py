@@ -0,0 +1,138 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from buisness.ass_buisness import AssBuisness
+from buisness.subtitles_buisness import SubtitlesBuisness
+from buisness.word_sprite_cache import WordSpriteCache
+from services.ffmpeg_service import FfmpegService, escape_filter_value
+
+FONT_DIRS = ["/usr/share/fonts", "/usr/local/share/fonts", "C:/Windows/Fonts"]
+
+
+def find_test_font():
+    for font_dir in FONT_DIRS:
+        fonts = sorted(glob.glob(os.path.join(font_dir, "**", "*.ttf"), recursive=True))
+        if fonts:
+            return fonts[0]
+    return None
+
+
+def test_seconds_to_ass_time():
+    assert AssBuisness.seconds_to_ass_time(0) == "0:00:00.00"
+    assert AssBuisness.seconds_to_ass_time(65.5) == "0:01:05.50"
+    assert AssBuisness.seconds_to_ass_time(3661.257) == "1:01:01.26"
+
+
+def test_color_to_ass():
+    assert AssBuisness.color_to_ass((255, 255, 255, 255)) == "&H00FFFFFF"
+    assert AssBuisness.color_to_ass((255, 0, 0)) == "&H000000FF"
+    assert AssBuisness.color_to_ass((0, 0, 255, 0)) == "&HFFFF0000"
+    assert AssBuisness.color_to_ass("black") == "&H00000000"
+
+
+def test_escape_text():
+    assert AssBuisness.escape_text("{\\b1}c'est") == "\\{\\\u200bb1\\}c'est"
+
+
+def test_escape_filter_value():
+    assert escape_filter_value("C:\\Windows\\Fonts") == "C\\\\:/Windows/Fonts"
+    assert escape_filter_value("a,b[c]") == "a\\,b\\[c\\]"
+
+
+def test_build_ass_script(monkeypatch):
+    monkeypatch.setattr(
+        AssBuisness, "font_style", staticmethod(lambda path, size: ("Arial", True, 123))
+    )
+    script = AssBuisness.build_ass_script(
+        [("le", 0.5, 1.0), (" ", 1.0, 1.2), ("chat", 1.0, 1.75)],
+        (720, 1280),
+        "arial.ttf",
+        110,
+        (255, 255, 255, 255),
+        (0, 0, 0, 255),
+        6,
+        1024,
+    )
+
+    assert "PlayResX: 720\nPlayResY: 1280" in script
+    assert (
+        "Style: Word,Arial,123,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,-1,"
+        "0,0,0,100,100,0,0,1,6,0,8,0,0,0,1"
+    ) in script
+    dialogues = [line for line in script.splitlines() if line.startswith("Dialogue")]
+    assert dialogues == [
+        "Dialogue: 0,0:00:00.50,0:00:01.00,Word,,0,0,0,,{\\an8\\pos(360,1024)\\fad(100,0)}le",
+        "Dialogue: 0,0:00:01.00,0:00:01.75,Word,,0,0,0,,{\\an8\\pos(360,1024)\\fad(100,0)}chat",
+    ]
+
+
+def _caption_mask(path, t, background):
+    from moviepy.editor import VideoFileClip
+
+    clip = VideoFileClip(path)
+    try:
+        frame = clip.get_frame(t).astype(int)
+    finally:
+        clip.close()
+    return np.abs(frame - background).max(axis=2) > 40
+
+
+def test_ass_backend_matches_moviepy_backend(tmp_path):
+    """Visual parity between both backends on a flat synthetic clip."""
+    font_path = find_test_font()
+    if font_path is None:
+        pytest.skip("No TrueType font available")
+
+    video_path = str(tmp_path / "gray.mp4")
+    FfmpegService().run(
+        [
+            "-f",
+            "lavfi",
+            "-i",
+            "color=c=gray:size=360x640:rate=25",
+            "-t",
+            "1.5",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            video_path,
+        ]
+    )
+    srt_path = tmp_path / "words.srt"
+    srt_path.write_text("1\n00:00:00,500 --> 00:00:01,200\nHiLite\n", encoding="utf-8")
+
+    masks = {}
+    for backend in ("moviepy", "ass"):
+        output_path = str(tmp_path / f"{backend}.mp4")
+        SubtitlesBuisness.create_subtitled_video(
+            video_path,
+            str(srt_path),
+            output_path,
+            font_path,
+            60,
+            (255, 255, 255, 255),
+            (0, 0, 0, 255),
+            3,
+            temp_dir=str(tmp_path / "temp"),
+            sprite_cache=WordSpriteCache(cache_dir=tmp_path / "sprites"),
+            backend=backend,
+        )
+        background = np.full(3, 128)
+        assert not _caption_mask(output_path, 0.3, background).any()
+        masks[backend] = _caption_mask(output_path, 1.0, background)
+
+    boxes = {}
+    for backend, mask in masks.items():
+        ys, xs = np.nonzero(mask)
+        assert xs.size > 0, f"No caption rendered by {backend}"
+        boxes[backend] = np.array([xs.min(), ys.min(), xs.max(), ys.max()])
+
+    assert np.abs(boxes["moviepy"] - boxes["ass"]).max() <= 12
+    overlap = (masks["moviepy"] & masks["ass"]).sum() / (
+        masks["moviepy"] | masks["ass"]
+    ).sum()
+    assert overlap >= 0.5
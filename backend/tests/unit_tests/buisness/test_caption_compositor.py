@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from buisness.caption_compositor import CaptionCompositor
+
+
+def make_sprite(width=20, height=10, box=(5, 2, 15, 6), color=(255, 0, 0)):
+    """Transparent canvas with an opaque box (x0, y0, x1, y1)."""
+    sprite = np.zeros((height, width, 4), dtype=np.uint8)
+    x0, y0, x1, y1 = box
+    sprite[y0:y1, x0:x1, :3] = color
+    sprite[y0:y1, x0:x1, 3] = 255
+    return sprite
+
+
+def black_frame(width=40, height=30):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+def test_active_indices_uses_half_open_intervals():
+    sprite = make_sprite()
+    compositor = CaptionCompositor(
+        [(sprite, 2.0, 3.0), (sprite, 0.0, 1.0), (sprite, 1.0, 2.0)],
+        (40, 30),
+        10,
+    )
+
+    assert compositor.active_indices(0.5) == [0]
+    assert compositor.active_indices(1.0) == [1]
+    assert compositor.active_indices(2.999) == [2]
+    assert compositor.active_indices(3.0) == []
+    assert compositor.active_indices(-1.0) == []
+
+
+def test_active_indices_finds_long_overlapping_caption():
+    sprite = make_sprite()
+    compositor = CaptionCompositor(
+        [(sprite, 0.0, 10.0)] + [(sprite, t, t + 0.2) for t in range(1, 9)],
+        (40, 30),
+        10,
+    )
+
+    assert compositor.active_indices(5.1) == [0, 5]
+    assert compositor.active_indices(9.5) == [0]
+
+
+def test_composite_blends_only_bounding_box():
+    compositor = CaptionCompositor(
+        [(make_sprite(), 0.0, 1.0)], (40, 30), 10, fade_duration=0
+    )
+    frame = compositor.composite(black_frame(), 0.5)
+
+    # Sprite is 20px wide centred on a 40px frame -> left = 10
+    assert (frame[12:16, 15:25] == [255, 0, 0]).all()
+    frame[12:16, 15:25] = 0
+    assert not frame.any()
+    layer = compositor._layers[0]
+    assert (layer.x0, layer.y0, layer.x1, layer.y1) == (15, 12, 25, 16)
+
+
+def test_composite_returns_input_frame_when_nothing_active():
+    compositor = CaptionCompositor([(make_sprite(), 1.0, 2.0)], (40, 30), 10)
+    frame = black_frame()
+    frame.setflags(write=False)
+
+    assert compositor.composite(frame, 0.5) is frame
+
+
+def test_composite_fade_in_ramps_alpha():
+    compositor = CaptionCompositor(
+        [(make_sprite(color=(200, 200, 200)), 1.0, 2.0)],
+        (40, 30),
+        10,
+        fade_duration=0.1,
+        fps=20,
+    )
+
+    first = compositor.composite(black_frame(), 1.0)
+    half = compositor.composite(black_frame(), 1.05)
+    full = compositor.composite(black_frame(), 1.1)
+
+    assert first[13, 20, 0] == 0
+    assert half[13, 20, 0] == pytest.approx(100, abs=1)
+    assert full[13, 20, 0] == 200
+
+
+def test_fade_ramp_is_precomputed_per_layer():
+    compositor = CaptionCompositor(
+        [(make_sprite(), 0.0, 1.0)], (40, 30), 10, fade_duration=0.1, fps=30
+    )
+
+    layer = compositor._layers[0]
+    assert len(layer.fade_ramp) == 3
+    inv_alpha, premult = layer.fade_ramp[1]
+    assert inv_alpha[2, 2, 0] == pytest.approx(2 / 3)
+    assert premult[2, 2, 0] == pytest.approx(255 / 3)
+
+
+def test_sprites_are_clipped_to_the_frame():
+    wide = make_sprite(width=100, box=(0, 0, 100, 10))
+    compositor = CaptionCompositor([(wide, 0.0, 1.0)], (40, 30), 25)
+
+    frame = compositor.composite(black_frame(), 0.5)
+
+    layer = compositor._layers[0]
+    assert (layer.x0, layer.y0, layer.x1, layer.y1) == (0, 25, 40, 30)
+    assert (frame[25:, :, 0] == 255).all()
+
+
+def test_identical_sprites_share_one_layer_and_empty_ones_are_dropped():
+    sprite = make_sprite()
+    empty = np.zeros((10, 20, 4), dtype=np.uint8)
+    compositor = CaptionCompositor(
+        [(sprite, 0.0, 1.0), (empty, 1.0, 2.0), (sprite, 2.0, 3.0)], (40, 30), 10
+    )
+
+    assert len(compositor) == 2
+    assert compositor._layers[0] is compositor._layers[1]
@@ -1,97 +1,283 @@
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 from src.buisness.eleven_labs_buisness import ElevenLabsBuisness
-
-
-@patch("src.buisness.eleven_labs_buisness.VideoFileClip")
-@patch("src.buisness.eleven_labs_buisness.tempfile.NamedTemporaryFile")
-@patch("builtins.open", new_callable=mock_open, read_data=b"fake_audio_data")
-@patch("src.buisness.eleven_labs_buisness.os.path.exists")
-@patch("src.buisness.eleven_labs_buisness.os.remove")
-def test_extract_audio_bytes_success(
-    mock_remove, mock_exists, mock_file, mock_tempfile, mock_video
-):
-    mock_exists.return_value = True
-    mock_temp = MagicMock()
-    mock_temp.name = "temp_audio.mp3"
-    mock_tempfile.return_value = mock_temp
-
-    mock_audio = MagicMock()
-    mock_video_instance = MagicMock()
-    mock_video_instance.audio = mock_audio
-    mock_video_instance.duration = 10.5
-    mock_video.return_value = mock_video_instance
-
-    result = ElevenLabsBuisness.extract_audio_bytes_from_video("fake_video.mp4")
-    assert result == b"fake_audio_data"
-    mock_video.assert_called_once_with("fake_video.mp4")
-    mock_audio.write_audiofile.assert_called_once()
-    mock_video_instance.close.assert_called_once()
-    mock_audio.close.assert_called_once()
+from src.services.ffmpeg_service import FfmpegService
 
 
 @patch("os.path.exists")
 def test_extract_audio_file_not_found(mock_exists):
     mock_exists.return_value = False
     with pytest.raises(FileNotFoundError) as excinfo:
-        ElevenLabsBuisness.extract_audio_bytes_from_video("nonexistent.mp4")
+        ElevenLabsBuisness.extract_audio_bytes_ffmpeg("nonexistent.mp4")
     assert "Video file not found" in str(excinfo.value)
 
 
-@patch("src.buisness.eleven_labs_buisness.VideoFileClip")
-@patch("os.path.exists")
-def test_extract_audio_no_audio_track(mock_exists, mock_video):
-    mock_exists.return_value = True
-    mock_video_instance = MagicMock()
-    mock_video_instance.audio = None
-    mock_video.return_value = mock_video_instance
+def _make_clip(path, audio_codec="aac"):
+    args = ["-f", "lavfi", "-i", "color=c=black:size=64x64:rate=10"]
+    if audio_codec:
+        args += ["-f", "lavfi", "-i", "sine=frequency=440", "-c:a", audio_codec]
+    FfmpegService().run(
+        [*args, "-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p", str(path)]
+    )
+    return str(path)
+
+
+def test_extract_audio_ffmpeg_auto_copies_aac_track(tmp_path):
+    video_path = _make_clip(tmp_path / "clip.mp4")
+
+    result = ElevenLabsBuisness.extract_audio_bytes_ffmpeg(video_path)
+
+    # ADTS frame sync word, the track was copied rather than re-encoded
+    assert result[:2] in (b"\xff\xf1", b"\xff\xf9")
+    assert not list(tmp_path.glob("*.aac"))
+
+
+def test_extract_audio_ffmpeg_auto_encodes_other_codecs_to_mp3(tmp_path):
+    video_path = _make_clip(tmp_path / "clip.mkv", audio_codec="libopus")
+
+    result = ElevenLabsBuisness.extract_audio_bytes_ffmpeg(video_path)
+
+    assert result[:3] == b"ID3" or result[0] == 0xFF
+
+
+def test_extract_audio_ffmpeg_opus_is_smaller(tmp_path):
+    video_path = _make_clip(tmp_path / "clip.mp4")
+
+    mp3 = ElevenLabsBuisness.extract_audio_bytes_ffmpeg(video_path, "mp3")
+    opus = ElevenLabsBuisness.extract_audio_bytes_ffmpeg(video_path, "opus")
+
+    assert opus[:4] == b"OggS"
+    assert len(opus) < len(mp3)
+
+
+def test_extract_audio_ffmpeg_no_audio_track(tmp_path):
+    video_path = _make_clip(tmp_path / "silent.mp4", audio_codec=None)
+
     with pytest.raises(ValueError) as excinfo:
-        ElevenLabsBuisness.extract_audio_bytes_from_video("video_no_audio.mp4")
+        ElevenLabsBuisness.extract_audio_bytes_ffmpeg(video_path)
     assert "no audio track" in str(excinfo.value)
-    mock_video_instance.close.assert_called_once()
 
 
-@patch("src.buisness.eleven_labs_buisness.VideoFileClip")
-@patch("src.buisness.eleven_labs_buisness.tempfile.NamedTemporaryFile")
-@patch("os.path.exists")
-@patch("os.remove")
-def test_extract_audio_cleanup_on_error(
-    mock_remove, mock_exists, mock_tempfile, mock_video
-):
-    mock_exists.return_value = True
-    mock_temp = MagicMock()
-    mock_temp.name = "temp_audio.mp3"
-    mock_tempfile.return_value = mock_temp
-    mock_audio = MagicMock()
-    mock_audio.write_audiofile.side_effect = Exception("Write error")
-    mock_video_instance = MagicMock()
-    mock_video_instance.audio = mock_audio
-    mock_video.return_value = mock_video_instance
-    with pytest.raises(Exception):
-        ElevenLabsBuisness.extract_audio_bytes_from_video("video.mp4")
-    mock_video_instance.close.assert_called_once()
-    mock_audio.close.assert_called_once()
-
-
-@patch("src.buisness.eleven_labs_buisness.VideoFileClip")
-@patch("buisness.eleven_labs_buisness.tempfile.NamedTemporaryFile")
-@patch("builtins.open", new_callable=mock_open, read_data=b"test_audio")
-@patch("os.path.exists")
-@patch("os.remove")
-def test_extract_audio_returns_correct_bytes(
-    mock_remove, mock_exists, mock_file, mock_tempfile, mock_video
-):
-    mock_exists.return_value = True
-    mock_temp = MagicMock()
-    mock_temp.name = "temp_audio.mp3"
-    mock_tempfile.return_value = mock_temp
-    mock_audio = MagicMock()
-    mock_video_instance = MagicMock()
-    mock_video_instance.audio = mock_audio
-    mock_video_instance.duration = 5.0
-    mock_video.return_value = mock_video_instance
-    result = ElevenLabsBuisness.extract_audio_bytes_from_video("video.mp4")
-    assert isinstance(result, bytes)
-    assert result == b"test_audio"
+def test_extract_audio_ffmpeg_unknown_format():
+    with pytest.raises(ValueError):
+        ElevenLabsBuisness.extract_audio_bytes_ffmpeg("clip.mp4", "flac")
+
+
+def _bursts(regions, duration, sample_rate=16000):
+    """Quiet noise with 1 kHz tone bursts over the given (start, end) regions."""
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 0.001, int(duration * sample_rate)).astype(np.float32)
+    t = np.arange(len(samples)) / sample_rate
+    for start, end in regions:
+        mask = (t >= start) & (t < end)
+        samples[mask] += 0.3 * np.sin(2 * np.pi * 1000 * t[mask])
+    return samples
+
+
+def test_detect_speech_regions_finds_padded_bursts():
+    samples = _bursts([(1.0, 2.0), (5.0, 5.6)], duration=8.0)
+
+    regions = ElevenLabsBuisness.detect_speech_regions(samples)
+
+    assert len(regions) == 2
+    assert regions[0][0] == pytest.approx(0.8, abs=0.05)
+    assert regions[0][1] == pytest.approx(2.2, abs=0.05)
+    assert regions[1][0] == pytest.approx(4.8, abs=0.05)
+    assert regions[1][1] == pytest.approx(5.8, abs=0.05)
+
+
+def test_detect_speech_regions_ignores_silence_and_rumble():
+    t = np.arange(16000 * 3) / 16000
+    rumble = (0.3 * np.sin(2 * np.pi * 50 * t)).astype(np.float32)
+
+    assert ElevenLabsBuisness.detect_speech_regions(np.zeros(48000, np.float32)) == []
+    assert ElevenLabsBuisness.detect_speech_regions(rumble) == []
+
+
+def test_detect_speech_regions_keeps_clip_that_talks_throughout():
+    samples = _bursts([(0.0, 4.0)], duration=4.0)
+
+    assert ElevenLabsBuisness.detect_speech_regions(samples) == [
+        (0.0, pytest.approx(4.0, abs=0.05))
+    ]
+
+
+def test_condense_regions_and_remap_timestamps():
+    samples = np.arange(16000 * 10, dtype=np.float32)
+
+    condensed, offset_map = ElevenLabsBuisness.condense_regions(
+        samples, [(1.0, 2.0), (6.0, 7.5)]
+    )
+
+    # 1s + 0.25s gap + 1.5s
+    assert len(condensed) == 16000 * 2.75
+    assert offset_map == [(0.0, 1.0, 1.0), (1.25, 6.0, 1.5)]
+    remap = ElevenLabsBuisness.remap_timestamp
+    assert remap(0.5, offset_map) == pytest.approx(1.5)
+    assert remap(1.1, offset_map) == pytest.approx(2.0)
+    assert remap(1.35, offset_map) == pytest.approx(6.1)
+    assert remap(9.0, offset_map) == pytest.approx(7.5)
+
+
+def test_remap_transcription_shifts_words():
+    transcription = MagicMock(
+        language_code="fra",
+        text="a b",
+        words=[
+            MagicMock(text="a", start=0.2, end=0.5, type="word", speaker_id=None),
+            MagicMock(text="b", start=1.3, end=1.6, type="word", speaker_id=None),
+        ],
+    )
+
+    remapped = ElevenLabsBuisness.remap_transcription(
+        transcription, [(0.0, 1.0, 1.0), (1.25, 6.0, 1.5)]
+    )
+
+    assert [(w.start, w.end) for w in remapped.words] == [
+        pytest.approx((1.2, 1.5)),
+        pytest.approx((6.05, 6.35)),
+    ]
+
+
+def test_extract_speech_audio_bytes_skips_clip_without_speech(tmp_path):
+    video_path = str(tmp_path / "silent_audio.mp4")
+    FfmpegService().run(
+        [
+            "-f",
+            "lavfi",
+            "-i",
+            "color=c=black:size=64x64:rate=10",
+            "-f",
+            "lavfi",
+            "-i",
+            "anullsrc=r=44100:cl=mono",
+            "-t",
+            "2",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            video_path,
+        ]
+    )
+
+    assert ElevenLabsBuisness.extract_speech_audio_bytes(video_path) == (None, [])
+
+
+def test_extract_speech_audio_bytes_condenses_speech(tmp_path):
+    video_path = str(tmp_path / "bursts.mp4")
+    FfmpegService().run(
+        [
+            "-f",
+            "lavfi",
+            "-i",
+            "color=c=black:size=64x64:rate=10",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=1000:duration=1",
+            "-filter_complex",
+            "[1:a]adelay=3000,apad[a]",
+            "-map",
+            "0:v",
+            "-map",
+            "[a]",
+            "-t",
+            "8",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            video_path,
+        ]
+    )
+
+    audio_bytes, offset_map = ElevenLabsBuisness.extract_speech_audio_bytes(
+        video_path, "opus"
+    )
+
+    assert audio_bytes[:4] == b"OggS"
+    assert len(offset_map) == 1
+    _, original_start, duration = offset_map[0]
+    assert original_start == pytest.approx(2.8, abs=0.1)
+    assert duration == pytest.approx(1.4, abs=0.1)
+
+
+def test_plan_chunks_cuts_in_silence_with_overlap():
+    # Bursts every second with gaps at x.6-x.0; cuts must land in a gap
+    bursts = [(i, i + 0.6) for i in range(30)]
+    samples = _bursts(bursts, duration=30.0)
+
+    chunks = ElevenLabsBuisness.plan_chunks(samples, 10.0, 1.0)
+
+    assert chunks[0][:3] == (0.0, pytest.approx(chunks[0][3] + 1.0), 0.0)
+    assert chunks[-1][3] == pytest.approx(30.0)
+    for (_, _, _, own_end), (start, _, own_start, _) in zip(chunks, chunks[1:]):
+        assert own_start == own_end
+        assert start == pytest.approx(own_start - 1.0)
+        assert 0.6 <= own_start % 1 <= 0.99
+    assert all(own_end - own_start <= 10.0 for _, _, own_start, own_end in chunks)
+
+
+def test_plan_chunks_keeps_short_audio_whole():
+    assert ElevenLabsBuisness.plan_chunks(np.zeros(16000 * 5), 10.0, 1.0) == [
+        (0.0, 5.0, 0.0, 5.0)
+    ]
+
+
+def test_plan_chunks_with_chunks_of_a_single_frame():
+    samples = _bursts([(0.0, 0.05)], duration=0.2)
+
+    chunks = ElevenLabsBuisness.plan_chunks(samples, 0.04, 0.0)
+
+    assert chunks[-1][3] == pytest.approx(0.2)
+    for _, _, own_start, own_end in chunks:
+        assert 0 < own_end - own_start <= 0.09
+
+
+def test_plan_chunks_rejects_chunks_shorter_than_a_frame():
+    with pytest.raises(ValueError):
+        ElevenLabsBuisness.plan_chunks(np.zeros(16000), 0.01, 0.0)
+
+
+def test_merge_chunk_transcriptions_shifts_and_drops_overlap_duplicates():
+    def words(*items):
+        return MagicMock(
+            language_code="fra",
+            text="",
+            words=[
+                MagicMock(text=t, start=s, end=e, type="word", speaker_id=None)
+                for t, s, e in items
+            ],
+        )
+
+    merged = ElevenLabsBuisness.merge_chunk_transcriptions(
+        [
+            (
+                (0.0, 11.0, 0.0, 10.0),
+                words(("un", 1.0, 1.4), ("deux", 9.7, 10.2), ("trois", 10.5, 10.9)),
+            ),
+            # Starts 1s early: both chunks claim "deux" by a few ms, "trois"
+            # belongs to this one only
+            (
+                (9.0, 20.0, 10.0, 20.0),
+                words(("deux", 0.75, 1.3), ("trois", 1.5, 1.9), ("quatre", 3.0, 3.5)),
+            ),
+        ]
+    )
+
+    assert [(w.text, w.start) for w in merged.words] == [
+        ("un", 1.0),
+        ("deux", 9.7),
+        ("trois", 10.5),
+        ("quatre", 12.0),
+    ]
+    assert merged.text == "un deux trois quatre"
+    assert merged.language_code == "fra"
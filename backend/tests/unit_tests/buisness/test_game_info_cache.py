@@ -0,0 +1,40 @@
+from buisness.game_info_cache import GameInfoCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = GameInfoCache(max_entries=10, ttl_seconds=60, clock=clock)
+    cache.put(509658, {"id": "509658", "name": "Just Chatting"})
+
+    clock.now = 59
+    assert cache.get("509658") == {"id": "509658", "name": "Just Chatting"}
+    clock.now = 60
+    assert cache.get("509658") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+    assert stats["items"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = GameInfoCache(max_entries=2, ttl_seconds=60, clock=FakeClock())
+    cache.put("1", {"id": "1"})
+    cache.put("2", {"id": "2"})
+    cache.get("1")
+    cache.put("3", {"id": "3"})
+
+    assert cache.get("2") is None
+    assert cache.get("1") == {"id": "1"}
+    assert cache.get("3") == {"id": "3"}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hit_rate"] == 0.75
@@ -0,0 +1,43 @@
+from buisness.job_workspace import JobWorkspace
+from config.settings import settings
+
+
+def test_workspaces_are_separate_and_removed_on_exit(tmp_path):
+    with JobWorkspace("clip_a", root=tmp_path, use_tmpfs=False) as a:
+        with JobWorkspace("clip_b", root=tmp_path, use_tmpfs=False) as b:
+            for workspace in (a, b):
+                assert workspace.download_dir.is_dir()
+                assert workspace.caption_temp_dir.is_dir()
+                assert workspace.output_dir.is_dir()
+            (a.download_dir / "clip.mp4").write_bytes(b"a")
+            (b.download_dir / "clip.mp4").write_bytes(b"b")
+            assert (a.download_dir / "clip.mp4").read_bytes() == b"a"
+        assert not b.path.exists()
+        assert a.path.exists()
+    assert not a.path.exists()
+
+
+def test_intermediates_on_tmpfs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_WORKSPACE_TMPFS_DIR", str(tmp_path / "shm"))
+    with JobWorkspace("clip_a", root=tmp_path / "jobs", use_tmpfs=True) as workspace:
+        assert workspace.download_dir.parent == tmp_path / "shm" / "clip_a"
+        assert workspace.output_dir.parent == tmp_path / "jobs" / "clip_a"
+        (workspace.caption_temp_dir / "word0.png").write_bytes(b"")
+    assert not (tmp_path / "shm" / "clip_a").exists()
+    assert not (tmp_path / "jobs" / "clip_a").exists()
+
+
+def test_unwritable_tmpfs_falls_back_to_disk(tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setattr(settings, "JOB_WORKSPACE_TMPFS_DIR", str(blocker / "shm"))
+    workspace = JobWorkspace("clip_a", root=tmp_path, use_tmpfs=True)
+    assert workspace.download_dir.is_relative_to(tmp_path / "clip_a")
+
+
+def test_keep_leaves_files(tmp_path):
+    with JobWorkspace("clip_a", root=tmp_path, use_tmpfs=False, keep=True) as workspace:
+        pass
+    assert workspace.output_dir.is_dir()
+    workspace.cleanup()
+    assert not workspace.path.exists()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from moviepy.editor import VideoFileClip
+
+from buisness.segment_render_buisness import SegmentRenderBuisness
+from buisness.word_sprite_cache import WordSpriteCache
+from services.ffmpeg_service import FfmpegService
+
+
+def test_words_for_segment_shifts_overlapping_words():
+    sprite_timings = [
+        ("a", 0.0, 1.0),
+        ("b", 1.8, 2.4),
+        ("c", 2.5, 3.0),
+        ("d", 4.0, 5.0),
+    ]
+
+    assert SegmentRenderBuisness.words_for_segment(sprite_timings, 2.0, 4.0) == [
+        ("b", pytest.approx(-0.2), pytest.approx(0.4)),
+        ("c", 0.5, 1.0),
+    ]
+
+
+def test_render_parallel_keeps_captions_across_segment_borders(tmp_path):
+    video_path = str(tmp_path / "black.mp4")
+    FfmpegService().run(
+        [
+            "-f",
+            "lavfi",
+            "-i",
+            "color=c=black:size=160x120:rate=25",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=440",
+            "-t",
+            "6",
+            "-g",
+            "25",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            "-shortest",
+            video_path,
+        ]
+    )
+    sprite_cache = WordSpriteCache(cache_dir=tmp_path / "sprites")
+    sprite_cache.put("white", np.full((20, 40, 4), 255, dtype=np.uint8))
+    output_path = str(tmp_path / "out.mp4")
+
+    # 6s over 2 workers gives 2s segments; the caption straddles the 2s cut
+    SegmentRenderBuisness.render_parallel(
+        video_path,
+        [("white", 1.5, 2.5)],
+        output_path,
+        sprite_cache,
+        position_y_ratio=0.5,
+        temp_dir=str(tmp_path / "temp"),
+        workers=2,
+    )
+
+    clip = VideoFileClip(output_path)
+    try:
+        assert clip.duration == pytest.approx(6, abs=0.1)
+        assert clip.audio is not None
+        for t, visible in ((1.2, False), (1.9, True), (2.2, True), (2.8, False)):
+            assert (clip.get_frame(t)[70, 80] > 128).all() == visible, t
+    finally:
+        clip.close()
+    assert not list((tmp_path / "temp").iterdir())
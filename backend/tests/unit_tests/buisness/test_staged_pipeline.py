@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import pytest
+
+from buisness.staged_pipeline import Stage, StagedPipeline
+
+
+def sleep_then(delay, func=lambda item: item):
+    def stage(item):
+        time.sleep(delay)
+        return func(item)
+
+    return stage
+
+
+def pid_of_worker(item):
+    return item, os.getpid()
+
+
+def test_stages_overlap():
+    pipeline = StagedPipeline(
+        [
+            Stage("download", sleep_then(0.1)),
+            Stage("render", sleep_then(0.1)),
+            Stage("upload", sleep_then(0.1)),
+        ],
+        queue_size=2,
+    )
+    started = time.perf_counter()
+    results = pipeline.run(range(6))
+    elapsed = time.perf_counter() - started
+
+    assert results == list(range(6))
+    # One after another it would take 1.8s; pipelined, 6 + 2 steps of 0.1s
+    assert elapsed < 1.3
+    stats = pipeline.stats()
+    assert stats["completed"] == 6
+    assert stats["stages"]["render"]["processed"] == 6
+    assert stats["stages"]["render"]["utilization"] > 0.4
+
+
+def test_bounded_queues_hold_back_fast_stage():
+    produced = []
+    consumed = []
+    ahead = []
+
+    def fast(item):
+        produced.append(item)
+        ahead.append(len(produced) - len(consumed))
+        return item
+
+    def slow(item):
+        time.sleep(0.05)
+        consumed.append(item)
+        return item
+
+    pipeline = StagedPipeline([Stage("fast", fast), Stage("slow", slow)], queue_size=1)
+    assert len(pipeline.run(range(10))) == 10
+    # At most one item queued, one in the slow stage and the one just produced
+    assert max(ahead) <= 3
+    assert pipeline.stats()["stages"]["slow"]["queue_max"] <= 1
+
+
+def test_failed_item_is_dropped_and_reported():
+    errors = []
+    lock = threading.Lock()
+
+    def fail_on_three(item):
+        if item == 3:
+            raise ValueError("bad clip")
+        return item
+
+    def on_error(item, stage_name, error):
+        with lock:
+            errors.append((item, stage_name, str(error)))
+
+    pipeline = StagedPipeline(
+        [Stage("transcribe", fail_on_three, workers=2), Stage("upload", sleep_then(0))],
+        on_error=on_error,
+    )
+    results = pipeline.run(range(5))
+
+    assert sorted(results) == [0, 1, 2, 4]
+    assert errors == [(3, "transcribe", "bad clip")]
+    assert pipeline.stats()["stages"]["transcribe"]["failed"] == 1
+
+
+def test_process_stage_runs_outside_main_process():
+    pipeline = StagedPipeline(
+        [Stage("render", pid_of_worker, workers=2, processes=True)]
+    )
+    results = pipeline.run(range(4))
+
+    assert sorted(item for item, _ in results) == [0, 1, 2, 3]
+    assert all(pid != os.getpid() for _, pid in results)
+
+
+def test_stage_without_workers_is_rejected():
+    with pytest.raises(ValueError):
+        Stage("render", pid_of_worker, workers=0, processes=True)
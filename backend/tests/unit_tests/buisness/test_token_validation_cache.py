@@ -0,0 +1,61 @@
+from buisness.token_validation_cache import TokenValidationCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(clock, **kwargs):
+    options = {"max_entries": 10, "max_ttl_seconds": 3600, "negative_ttl_seconds": 60}
+    options.update(kwargs)
+    return TokenValidationCache(clock=clock, **options)
+
+
+def test_valid_result_lives_until_reported_expiry():
+    clock = FakeClock()
+    cache = make_cache(clock)
+    cache.put("token", {"valid": True, "expires_in": 600})
+
+    clock.now = 200
+    assert cache.get("token") == {"valid": True, "expires_in": 400}
+    clock.now = 600
+    assert cache.get("token") is None
+
+
+def test_valid_result_ttl_is_capped():
+    clock = FakeClock()
+    cache = make_cache(clock)
+    cache.put("token", {"valid": True, "expires_in": 5000})
+
+    clock.now = 3599
+    assert cache.get("token") == {"valid": True, "expires_in": 1401}
+    clock.now = 3600
+    assert cache.get("token") is None
+
+
+def test_invalid_result_is_negatively_cached():
+    clock = FakeClock()
+    cache = make_cache(clock)
+    cache.put("expired", {"valid": False, "expires_in": 0})
+
+    assert cache.get("expired") == {"valid": False, "expires_in": 0}
+    clock.now = 60
+    assert cache.get("expired") is None
+    assert cache.stats()["negative_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_tokens_are_stored_hashed_and_bounded():
+    cache = make_cache(FakeClock(), max_entries=2)
+    for token in ("a", "b", "c"):
+        cache.put(token, {"valid": True, "expires_in": 100})
+
+    assert cache.get("a") is None
+    assert cache.get("c")["valid"]
+    assert "c" not in cache._entries
+    assert cache.make_key("c") in cache._entries
+    assert cache.stats()["items"] == 2
@@ -0,0 +1,109 @@
+import os
+import zlib
+from types import SimpleNamespace
+
+from buisness.transcription_cache import TranscriptionCache
+from models.transcription_model import Transcription
+
+
+def make_response(words):
+    return SimpleNamespace(
+        language_code="fra",
+        text=" ".join(text for text, *_ in words),
+        words=[
+            SimpleNamespace(
+                text=text,
+                start=start,
+                end=end,
+                type="word",
+                speaker_id="speaker_0",
+                logprob=-0.1,
+                characters=None,
+            )
+            for text, start, end in words
+        ],
+    )
+
+
+def test_make_key_depends_on_audio_and_options():
+    key = TranscriptionCache.make_key(b"audio", "scribe_v1", "fr", True, True)
+
+    assert key == TranscriptionCache.make_key(b"audio", "scribe_v1", "fr", True, True)
+    assert key != TranscriptionCache.make_key(b"other", "scribe_v1", "fr", True, True)
+    assert key != TranscriptionCache.make_key(b"audio", "scribe_v2", "fr", True, True)
+    assert key != TranscriptionCache.make_key(b"audio", "scribe_v1", "en", True, True)
+    assert key != TranscriptionCache.make_key(b"audio", "scribe_v1", "fr", False, True)
+    assert key != TranscriptionCache.make_key(b"audio", "scribe_v1", "fr", True, False)
+
+
+def test_put_then_get_round_trips_words(tmp_path):
+    cache = TranscriptionCache(cache_dir=tmp_path)
+    key = TranscriptionCache.make_key(b"audio", "scribe_v1", "fr", True, True)
+
+    assert cache.get(key) is None
+    stored = cache.put(key, make_response([("Salut", 0.12, 0.48), ("à", 0.5, 0.6)]))
+
+    assert isinstance(stored, Transcription)
+    fresh = TranscriptionCache(cache_dir=tmp_path)
+    cached = fresh.get(key)
+    assert cached == stored
+    assert cached.words[1].text == "à"
+    assert cached.words[0].speaker_id == "speaker_0"
+    assert fresh.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_put_drops_words_without_timestamps(tmp_path):
+    cache = TranscriptionCache(cache_dir=tmp_path)
+    key = TranscriptionCache.make_key(b"audio", "scribe_v1", "fr", True, True)
+    response = make_response(
+        [("Salut", None, 0.48), ("à", 0.5, None), ("tous", 0.6, 0.9)]
+    )
+
+    stored = cache.put(key, response)
+
+    assert [word.text for word in stored.words] == ["tous"]
+    assert TranscriptionCache(cache_dir=tmp_path).get(key) == stored
+
+
+def test_entries_are_compressed_rows(tmp_path):
+    cache = TranscriptionCache(cache_dir=tmp_path)
+    words = [(f"mot{i}", i * 0.3, i * 0.3 + 0.25) for i in range(200)]
+    cache.put("ab" * 32, make_response(words))
+
+    raw = cache.path("ab" * 32).read_bytes()
+    payload = zlib.decompress(raw)
+    assert payload.startswith(b'{"v":1,')
+    assert b"logprob" not in payload
+    assert len(raw) < len(payload)
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    words = [(f"mot{i}", float(i), i + 0.5) for i in range(50)]
+    probe = TranscriptionCache(cache_dir=tmp_path / "probe")
+    probe.put("00" * 32, make_response(words))
+    entry_size = probe.path("00" * 32).stat().st_size
+
+    cache = TranscriptionCache(cache_dir=tmp_path / "cache", max_bytes=entry_size * 2)
+    keys = [f"{i:02d}" * 32 for i in range(1, 4)]
+    for age, key in enumerate(keys[:2]):
+        cache.put(key, make_response(words))
+        os.utime(cache.path(key), ns=(age * 10**9, age * 10**9))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[2], make_response(words))
+
+    assert cache.path(keys[0]).exists()
+    assert not cache.path(keys[1]).exists()
+    assert cache.path(keys[2]).exists()
+    assert cache.stats()["evictions"] == 1
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = TranscriptionCache(cache_dir=tmp_path)
+    path = cache.path("cd" * 32)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"not zlib")
+
+    assert cache.get("cd" * 32) is None
+    assert not path.exists()
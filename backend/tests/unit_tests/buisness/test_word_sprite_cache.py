@@ -0,0 +1,190 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import ImageFont
+
+from buisness.subtitles_buisness import SubtitlesBuisness
+from buisness.word_sprite_cache import WordSpriteCache
+
+
+@pytest.fixture
+def font_file(tmp_path):
+    path = tmp_path / "font.ttf"
+    path.write_bytes(b"fake font content")
+    return str(path)
+
+
+def make_sprite(value, width=8, height=4):
+    return np.full((height, width, 4), value, dtype=np.uint8)
+
+
+def test_make_key_depends_on_style(font_file, tmp_path):
+    cache = WordSpriteCache(cache_dir=tmp_path / "cache")
+    base = ("le", font_file, 110, (255, 255, 255, 255), (0, 0, 0, 255), 6, 1280, 130)
+    key = cache.make_key(*base)
+
+    assert key == cache.make_key(
+        "le", font_file, 110, [255] * 4, [0, 0, 0, 255], 6, 1280, 130
+    )
+    assert key != cache.make_key("de", *base[1:])
+    assert key != cache.make_key("le", font_file, 100, *base[3:])
+    assert key != cache.make_key(*base[:5], 4, 1280, 130)
+
+
+def test_make_key_depends_on_font_content(font_file, tmp_path):
+    cache = WordSpriteCache(cache_dir=tmp_path / "cache")
+    args = (110, (255, 255, 255, 255), (0, 0, 0, 255), 6, 1280, 130)
+    key = cache.make_key("le", font_file, *args)
+
+    with open(font_file, "wb") as f:
+        f.write(b"another font, another size")
+
+    assert key != cache.make_key("le", font_file, *args)
+
+
+def test_get_memory_hit_and_miss(tmp_path):
+    cache = WordSpriteCache(cache_dir=tmp_path / "cache")
+    assert cache.get("ab" * 32) is None
+
+    cache.put("ab" * 32, make_sprite(7))
+    sprite = cache.get("ab" * 32)
+
+    assert sprite[0, 0, 0] == 7
+    assert not sprite.flags.writeable
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    WordSpriteCache(cache_dir=tmp_path / "cache").put("cd" * 32, make_sprite(9))
+
+    cache = WordSpriteCache(cache_dir=tmp_path / "cache")
+    sprite = cache.get("cd" * 32)
+
+    assert sprite is not None
+    assert np.array_equal(sprite, make_sprite(9))
+    assert cache.stats()["disk_hits"] == 1
+    # Promoted to the memory tier
+    cache.get("cd" * 32)
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    sprite_bytes = make_sprite(0).nbytes
+    cache = WordSpriteCache(
+        cache_dir=tmp_path / "cache", max_memory_bytes=2 * sprite_bytes
+    )
+    cache.put("a" * 64, make_sprite(1))
+    cache.put("b" * 64, make_sprite(2))
+    cache.get("a" * 64)
+    cache.put("c" * 64, make_sprite(3))
+
+    assert set(cache._memory) == {"a" * 64, "c" * 64}
+    assert cache.stats()["memory_bytes"] == 2 * sprite_bytes
+
+
+def test_render_word_sprite_common_words_come_from_cache(font_file, tmp_path):
+    cache = WordSpriteCache(cache_dir=tmp_path / "cache")
+    font = ImageFont.load_default(size=40)
+    words = ["le", "de", "c'est", "le", "de", "le", "c'est", "de", "le", "de"]
+
+    with patch("buisness.subtitles_buisness._load_font", return_value=font) as load:
+        sprites = [
+            SubtitlesBuisness.render_word_sprite(
+                word, font_file, 40, "white", "black", 2, 200, 60, cache
+            )
+            for word in words
+        ]
+
+    assert load.call_count == 3
+    assert all(sprite.shape == (60, 200, 4) for sprite in sprites)
+    assert sprites[0] is sprites[3]
+    stats = cache.stats()
+    assert stats["misses"] == 3
+    assert stats["memory_hits"] == 7
+
+
+def test_generate_subtitle_images_in_memory_writes_nothing(font_file, tmp_path):
+    cache = WordSpriteCache(cache_dir=tmp_path / "cache")
+    subs = [
+        SimpleNamespace(
+            start=SimpleNamespace(hours=0, minutes=0, seconds=1, milliseconds=0),
+            end=SimpleNamespace(hours=0, minutes=0, seconds=2, milliseconds=0),
+            text="le chat le",
+        )
+    ]
+    temp_dir = tmp_path / "subtitles_temp"
+
+    with patch(
+        "buisness.subtitles_buisness._load_font",
+        return_value=ImageFont.load_default(size=40),
+    ):
+        infos = SubtitlesBuisness.generate_subtitle_images(
+            subs, font_file, 40, "white", "black", 2, str(temp_dir), cache, True
+        )
+
+    assert not temp_dir.exists()
+    assert [start for _, start, _ in infos] == pytest.approx([1.0, 4 / 3, 5 / 3])
+    assert infos[-1][2] == pytest.approx(2.0)
+    assert infos[0][0] is infos[2][0]
+    assert infos[0][0].shape == (130, 1280, 4)
+
+
+def test_word_timings_from_transcription_keep_real_timestamps():
+    words = [
+        SimpleNamespace(text="Salut", start=0.12, end=0.48, type="word"),
+        SimpleNamespace(text=" ", start=0.48, end=0.55, type="spacing"),
+        SimpleNamespace(text="tout", start=0.55, end=0.71, type="word"),
+        SimpleNamespace(text="(rires)", start=0.9, end=1.4, type="audio_event"),
+        SimpleNamespace(text="", start=1.4, end=1.5, type="word"),
+        SimpleNamespace(text="glitch", start=1.5, end=1.5, type="word"),
+    ]
+
+    assert SubtitlesBuisness.get_word_timings_from_transcription(words) == [
+        ("Salut", 0.12, 0.48),
+        ("tout", 0.55, 0.71),
+        ("(rires)", 0.9, 1.4),
+    ]
+
+
+def test_word_timings_from_transcription_skip_words_without_timestamps():
+    words = [
+        SimpleNamespace(text="Salut", start=None, end=0.48, type="word"),
+        SimpleNamespace(text="tout", start=0.55, end=None, type="word"),
+        SimpleNamespace(text="(rires)", start=None, end=None, type="audio_event"),
+        SimpleNamespace(text="monde", start=0.8, end=1.1, type="word"),
+    ]
+
+    assert SubtitlesBuisness.get_word_timings_from_transcription(words) == [
+        ("monde", 0.8, 1.1),
+    ]
+
+
+def test_create_subtitled_video_uses_word_timings_without_srt(font_file, tmp_path):
+    with (
+        patch("buisness.subtitles_buisness.pysrt.open") as open_srt,
+        patch.object(
+            SubtitlesBuisness, "burn_subtitles_with_ass", return_value="out.mp4"
+        ) as burn,
+        patch("os.path.exists", return_value=True),
+    ):
+        SubtitlesBuisness.create_subtitled_video(
+            "in.mp4",
+            None,
+            "out.mp4",
+            font_file,
+            40,
+            "white",
+            "black",
+            2,
+            sprite_cache=WordSpriteCache(cache_dir=tmp_path / "cache"),
+            backend="ass",
+            word_timings=[("Salut", 0.12, 0.48)],
+        )
+
+    open_srt.assert_not_called()
+    assert burn.call_args.args[1] == [("Salut", 0.12, 0.48)]
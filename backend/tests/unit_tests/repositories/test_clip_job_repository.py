@@ -0,0 +1,216 @@
+import sqlite3
+import threading
+
+import pytest
+
+from repositories.clip_job_repository import SCHEMA, ClipJobRepository
+
+
+def helix_clip(clip_id, view_count=1, broadcaster_id="42"):
+    return {
+        "id": clip_id,
+        "broadcaster_id": broadcaster_id,
+        "broadcaster_name": "Streamer",
+        "game_id": "509658",
+        "creator_id": "7",
+        "url": f"https://clips.twitch.tv/{clip_id}",
+        "title": f"Clip {clip_id}",
+        "duration": 30.0,
+        "view_count": view_count,
+        "created_at": "2024-01-01T00:00:00Z",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ClipJobRepository(tmp_path / "clips.db", max_attempts=2)
+    yield store
+    store.close()
+
+
+def test_wal_mode_and_indexed_status_lookup(store):
+    connection = sqlite3.connect(store.path)
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT clip_id FROM clips WHERE status = 'pending'"
+    ).fetchall()
+    assert "idx_clips_status" in str(plan)
+    connection.close()
+
+
+def test_add_clips_skips_known_ones(store):
+    assert store.add_clips([helix_clip("a"), helix_clip("b")]) == 2
+    store.mark_downloaded("a", "/tmp/a.mp4")
+    assert store.add_clips([helix_clip("a"), helix_clip("c")]) == 1
+    assert store.get_clip("a")["status"] == "downloaded"
+    assert store.get_clip("c")["editor_id"] == "7"
+    assert store.get_clip("c")["game_id"] == "509658"
+    assert store.get_clip("c")["broadcaster_name"] == "Streamer"
+    assert store.count_by_status() == {"pending": 2, "downloaded": 1}
+
+
+def test_clip_goes_through_every_state(store):
+    store.add_clips([helix_clip("a")])
+    store.mark_downloaded("a", "/tmp/a.mp4")
+    store.mark_edited("a", "/tmp/a_subtitled.mp4")
+    store.start_publication("a", "worker_a", "youtube")
+    store.finish_publication("a", "worker_a", "youtube", True, platform_video_id="yt1")
+    store.mark_published("a")
+
+    clip = store.get_clip("a")
+    assert clip["status"] == "published"
+    assert clip["edited_path"] == "/tmp/a_subtitled.mp4"
+    assert clip["published_at"] is not None
+    (publication,) = store.get_publications("a")
+    assert publication["post_status"] == "success"
+    assert publication["platform_video_id"] == "yt1"
+    with pytest.raises(ValueError):
+        store.mark_downloaded("a", "/tmp/a.mp4")
+
+
+def test_claim_is_exclusive_most_viewed_first(store):
+    store.add_clips([helix_clip(c, view_count=v) for c, v in zip("abcd", [5, 9, 1, 7])])
+    store.add_clips([helix_clip("e", view_count=99, broadcaster_id="other")])
+
+    first = store.claim("w1", limit=2, broadcaster_id="42")
+    second = store.claim("w2", limit=5, broadcaster_id="42")
+
+    assert [clip["clip_id"] for clip in first] == ["b", "d"]
+    assert [clip["clip_id"] for clip in second] == ["a", "c"]
+    assert store.claim("w3", broadcaster_id="42") == []
+
+
+def test_concurrent_claims_never_share_a_clip(store):
+    store.add_clips([helix_clip(str(i)) for i in range(40)])
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        while clips := store.claim(worker_id, limit=3):
+            with lock:
+                claimed.extend(clip["clip_id"] for clip in clips)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(str(i) for i in range(40))
+
+
+def test_stale_claim_can_be_taken_over(tmp_path):
+    now = [1_000_000.0]
+    store = ClipJobRepository(
+        tmp_path / "clips.db", claim_timeout=60, clock=lambda: now[0]
+    )
+    store.add_clips([helix_clip("a")])
+    assert store.claim("w1")
+    assert store.claim("w2") == []
+    now[0] += 61
+    assert [clip["claimed_by"] for clip in store.claim("w2")] == ["w2"]
+    store.close()
+
+
+def test_failures_count_attempts_then_fail(store):
+    store.add_clips([helix_clip("a")])
+    store.claim("w1")
+    store.mark_downloaded("a", "/tmp/a.mp4")
+
+    assert store.record_failure("a", "render crashed", back_to="pending") == "pending"
+    clip = store.get_clip("a")
+    assert clip["edit_attempts"] == 1
+    assert clip["claimed_by"] is None
+    assert "downloaded: render crashed" in clip["error_log"]
+
+    # Back to pending, the next failures are download ones
+    assert store.record_failure("a", "no network") == "pending"
+    assert store.record_failure("a", "no network") == "failed"
+    assert store.get_clip("a")["download_attempts"] == 2
+    # Failed clips are never claimed again
+    assert store.claim("w1") == []
+
+
+def test_failed_upload_counts_on_publication(store):
+    store.add_clips([helix_clip("a")])
+    store.mark_downloaded("a", "/tmp/a.mp4")
+    store.mark_edited("a", "/tmp/a_subtitled.mp4")
+    store.start_publication("a", "worker_a", "youtube")
+
+    assert store.record_failure("a", "quota exceeded") == "edited"
+    (publication,) = store.get_publications("a")
+    assert publication["post_status"] == "failed"
+    assert publication["post_attempts"] == 1
+
+    store.start_publication("a", "worker_a", "youtube")
+    assert store.get_publications("a")[0]["post_status"] == "pending"
+    assert store.record_failure("a", "quota exceeded") == "failed"
+
+
+def test_failed_upload_without_publication_still_exhausts(store):
+    store.add_clips([helix_clip("a")])
+    store.mark_downloaded("a", "/tmp/a.mp4")
+    store.mark_edited("a", "/tmp/a_subtitled.mp4")
+
+    # The upload stage failed before any post was started
+    assert store.record_failure("a", "file missing") == "edited"
+    assert store.get_clip("a")["upload_attempts"] == 1
+    assert store.get_publications("a") == []
+    assert store.record_failure("a", "file missing") == "failed"
+
+
+def test_blacklist_csv_is_imported_once(store, tmp_path):
+    csv_path = tmp_path / "clip_blacklist.csv"
+    csv_path.write_text("clip_id,url\na,https://clips.twitch.tv/a\nb,\n", "utf-8")
+
+    assert store.import_blacklist_csv(csv_path) == 2
+    csv_path.write_text("clip_id,url\nc,\n", "utf-8")
+    assert store.import_blacklist_csv(csv_path) == 0
+
+    assert store.get_clip("a")["status"] == "published"
+    assert store.get_clip("c") is None
+    # Imported clips are not picked again when Twitch returns them
+    store.add_clips([helix_clip("a"), helix_clip("d")])
+    assert [clip["clip_id"] for clip in store.claim("w1", limit=5)] == ["d"]
+
+
+def test_publish_records_post_and_status_together(store):
+    store.add_clips([helix_clip("a")])
+    store.claim("w1")
+    store.mark_downloaded("a", "/tmp/a.mp4")
+    store.mark_edited("a", "/tmp/a_subtitled.mp4")
+    store.start_publication("a", "worker_a", "youtube")
+    assert store.successful_publication("a", "worker_a", "youtube") is None
+
+    store.publish("a", "worker_a", "youtube", "yt1", "https://youtu.be/yt1")
+
+    assert (
+        store.successful_publication("a", "worker_a", "youtube")["platform_video_id"]
+        == "yt1"
+    )
+    clip = store.get_clip("a")
+    assert clip["status"] == "published"
+    assert clip["claimed_by"] is None
+    # A failure reported after the upload must not send the clip back
+    assert store.record_failure("a", "print failed", back_to="pending") == "published"
+    assert store.claim("w1") == []
+
+
+def test_database_from_older_schema_gets_new_columns(tmp_path):
+    path = tmp_path / "clips.db"
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        SCHEMA.replace("    broadcaster_name TEXT,\n", "")
+        .replace("    game_id TEXT,\n", "")
+        .replace("    upload_attempts INTEGER NOT NULL DEFAULT 0,\n", "")
+    )
+    connection.execute("INSERT INTO clips (clip_id) VALUES ('old')")
+    connection.commit()
+    connection.close()
+
+    store = ClipJobRepository(path)
+    store.add_clips([helix_clip("new")])
+    assert store.get_clip("old")["game_id"] is None
+    assert store.get_clip("old")["upload_attempts"] == 0
+    assert store.get_clip("new")["game_id"] == "509658"
+    store.close()
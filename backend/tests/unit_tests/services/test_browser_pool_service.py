@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from services.browser_pool_service import BrowserPool
+
+
+class FakeScraper:
+    """Stands in for ScrapingService without launching Chrome."""
+
+    instances = []
+
+    def __init__(self, download_dir, profile_dir):
+        self.download_dir = download_dir
+        self.profile_dir = profile_dir
+        self.healthy = True
+        self.memory = 100.0
+        self.closed = False
+        FakeScraper.instances.append(self)
+
+    def is_healthy(self):
+        return self.healthy
+
+    def memory_mb(self):
+        return self.memory
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def make_pool(tmp_path):
+    FakeScraper.instances = []
+    pools = []
+
+    def make(**kwargs):
+        options = {"size": 2, "max_uses": 3, "max_memory_mb": 500}
+        options.update(kwargs)
+        pool = BrowserPool(base_dir=tmp_path, factory=FakeScraper, **options)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_browsers_are_prelaunched_with_their_own_directories(make_pool):
+    pool = make_pool()
+
+    assert len(FakeScraper.instances) == 2
+    profiles = {scraper.profile_dir for scraper in FakeScraper.instances}
+    downloads = {scraper.download_dir for scraper in FakeScraper.instances}
+    assert len(profiles) == 2
+    assert len(downloads) == 2
+    assert pool.stats()["idle"] == 2
+
+
+def test_browser_is_reused_then_recycled_after_max_uses(make_pool):
+    pool = make_pool(size=1)
+    seen = []
+    for _ in range(4):
+        with pool.session() as scraper:
+            seen.append(scraper)
+
+    assert seen[0] is seen[1] is seen[2]
+    assert seen[3] is not seen[0]
+    assert seen[0].closed
+    assert pool.stats()["recycles"]["max_uses"] == 1
+    assert pool.stats()["launches"] == 2
+
+
+def test_recycling_waits_for_the_next_checkout(make_pool):
+    pool = make_pool(size=1, max_uses=1)
+    with pool.session() as scraper:
+        pass
+
+    assert not scraper.closed
+    assert pool.stats()["launches"] == 1
+    with pool.session() as replaced:
+        assert scraper.closed
+        assert replaced is not scraper
+    assert pool.stats()["recycles"]["max_uses"] == 1
+
+
+def test_unhealthy_or_bloated_browsers_are_replaced(make_pool):
+    pool = make_pool(size=1)
+    with pool.session() as scraper:
+        scraper.memory = 900.0
+    with pool.session() as replaced:
+        assert replaced is not scraper
+        replaced.healthy = False
+    with pool.session() as healthy:
+        assert healthy is not replaced
+        assert healthy.is_healthy()
+
+    recycles = pool.stats()["recycles"]
+    assert recycles["memory"] == 1
+    assert recycles["unhealthy"] == 1
+
+
+def test_download_directory_is_emptied_at_checkout(make_pool):
+    pool = make_pool(size=1)
+    with pool.session() as scraper:
+        (scraper.download_dir / "old_clip.mp4").write_bytes(b"old")
+    with pool.session() as scraper:
+        assert list(scraper.download_dir.iterdir()) == []
+
+
+def test_concurrent_checkouts_get_distinct_browsers(make_pool):
+    pool = make_pool(size=2)
+    in_use = []
+    lock = threading.Lock()
+    overlaps = []
+
+    def download():
+        with pool.session() as scraper:
+            with lock:
+                overlaps.append(scraper in in_use)
+                in_use.append(scraper)
+            time.sleep(0.05)
+            with lock:
+                in_use.remove(scraper)
+
+    threads = [threading.Thread(target=download) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == [False] * 6
+    assert pool.stats()["checkouts"] == 6
+
+
+def test_checkout_times_out_when_every_browser_is_busy(make_pool):
+    pool = make_pool(size=1)
+    with pool.session():
+        with pytest.raises(TimeoutError):
+            with pool.session(timeout=0.05):
+                pass
@@ -0,0 +1,191 @@
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from config.settings import settings
+from services.clip_download_service import ClipDownloadService
+from services.twitch_service import TwitchApi
+
+CLIP_BYTES = os.urandom(300_000)
+
+
+class ClipServer:
+    """Stand-in clip CDN serving CLIP_BYTES at /<clip_id>.mp4 with Range support."""
+
+    def __init__(self, drop_first_after=None, short_by=0, delay=0.0):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with lock:
+                    server.requests.append((self.path, self.headers.get("Range")))
+                    first = len(server.requests) == 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    self.serve(first)
+                finally:
+                    with lock:
+                        server.in_flight -= 1
+
+            def serve(self, first):
+                time.sleep(delay)
+                start = 0
+                match = re.match(r"bytes=(\d+)-", self.headers.get("Range") or "")
+                if match:
+                    start = int(match.group(1))
+                    if start >= len(CLIP_BYTES):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(CLIP_BYTES)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header(
+                        "Content-Range",
+                        f"bytes {start}-{len(CLIP_BYTES) - 1}/{len(CLIP_BYTES)}",
+                    )
+                else:
+                    self.send_response(200)
+                body = CLIP_BYTES[start : len(CLIP_BYTES) - short_by]
+                self.send_header("Content-Type", "video/mp4")
+                self.send_header("Content-Length", str(len(CLIP_BYTES) - start))
+                self.end_headers()
+                if first and drop_first_after is not None:
+                    self.wfile.write(body[:drop_first_after])
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+                if short_by:
+                    self.close_connection = True
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def helix_downloads(cdn_url):
+    """Mock Helix answering /clips/downloads with URLs on the stand-in CDN."""
+
+    def handler(request):
+        if str(request.url) == settings.TWITCH_TOKEN_URI:
+            return httpx.Response(200, json={"access_token": "app", "expires_in": 1})
+        clip_id = request.url.params["clip_id"]
+        if clip_id == "missing":
+            return httpx.Response(200, json={"data": []})
+        return httpx.Response(
+            200,
+            json={
+                "data": [
+                    {
+                        "clip_id": clip_id,
+                        "portrait_download_url": f"{cdn_url}/{clip_id}-portrait.mp4",
+                        "landscape_download_url": f"{cdn_url}/{clip_id}.mp4",
+                    }
+                ]
+            },
+        )
+
+    return TwitchApi("id", "secret", transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_download_clips_in_parallel(tmp_path):
+    with ClipServer(delay=0.2) as server:
+        twitch_api = helix_downloads(server.url)
+        downloader = ClipDownloadService(
+            twitch_api, download_dir=tmp_path, max_parallel=2, chunk_size=65536
+        )
+        clip_ids = ["a", "b", "c", "d", "missing"]
+        paths = await downloader.download_clips(
+            (clip_id for clip_id in clip_ids), "editor", "42", "user_token"
+        )
+        await downloader.aclose()
+        await twitch_api.aclose()
+
+    assert paths["missing"] is None
+    for clip_id in "abcd":
+        assert paths[clip_id] == tmp_path / f"{clip_id}.mp4"
+        assert paths[clip_id].read_bytes() == CLIP_BYTES
+    assert sorted(path for path, _ in server.requests) == [
+        f"/{clip_id}-portrait.mp4" for clip_id in "abcd"
+    ]
+    assert server.max_in_flight == 2
+    assert not list(tmp_path.glob("*.part"))
+
+
+@pytest.mark.asyncio
+async def test_dropped_download_resumes_with_range(tmp_path):
+    with ClipServer(drop_first_after=100_000) as server:
+        downloader = ClipDownloadService(None, download_dir=tmp_path)
+        path = await downloader.download_file(f"{server.url}/a.mp4", tmp_path / "a.mp4")
+        await downloader.aclose()
+
+    assert path.read_bytes() == CLIP_BYTES
+    ranges = [clip_range for _, clip_range in server.requests]
+    assert ranges[0] is None
+    # Whatever reached the disk before the drop is not downloaded again
+    resumed_at = int(ranges[1].removeprefix("bytes=").rstrip("-"))
+    assert 0 < resumed_at <= 100_000
+
+
+@pytest.mark.asyncio
+async def test_partial_file_from_previous_run_is_completed(tmp_path):
+    (tmp_path / "a.mp4.part").write_bytes(CLIP_BYTES[:250_000])
+    with ClipServer() as server:
+        downloader = ClipDownloadService(None, download_dir=tmp_path)
+        path = await downloader.download_file(f"{server.url}/a.mp4", tmp_path / "a.mp4")
+        await downloader.aclose()
+
+    assert path.read_bytes() == CLIP_BYTES
+    assert server.requests == [("/a.mp4", "bytes=250000-")]
+
+
+@pytest.mark.asyncio
+async def test_oversized_partial_file_is_downloaded_again(tmp_path):
+    (tmp_path / "a.mp4.part").write_bytes(CLIP_BYTES + b"stale tail")
+    with ClipServer() as server:
+        downloader = ClipDownloadService(None, download_dir=tmp_path)
+        path = await downloader.download_file(f"{server.url}/a.mp4", tmp_path / "a.mp4")
+        await downloader.aclose()
+
+    assert path.read_bytes() == CLIP_BYTES
+    assert server.requests == [
+        ("/a.mp4", f"bytes={len(CLIP_BYTES) + 10}-"),
+        ("/a.mp4", None),
+    ]
+    assert not (tmp_path / "a.mp4.part").exists()
+
+
+@pytest.mark.asyncio
+async def test_truncated_download_fails_size_check(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CLIP_DOWNLOAD_RETRIES", 1)
+    with ClipServer(short_by=10) as server:
+        downloader = ClipDownloadService(None, download_dir=tmp_path)
+        with pytest.raises(RuntimeError):
+            await downloader.download_file(f"{server.url}/a.mp4", tmp_path / "a.mp4")
+        await downloader.aclose()
+
+    assert len(server.requests) == 2
+    assert not (tmp_path / "a.mp4").exists()
@@ -1,5 +1,7 @@
+import time
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 from src.services.eleven_labs_service import ElevenLabsService
@@ -20,7 +22,7 @@ def test_init_no_api_key():
 
 def test_speech_to_text_success():
     with patch(
-        "src.services.eleven_labs_service.ElevenLabsBuisness.extract_audio_bytes_from_video",
+        "src.services.eleven_labs_service.ElevenLabsBuisness.extract_audio_bytes_ffmpeg",
         return_value=b"audio",
     ):
         mock_client = MagicMock()
@@ -37,10 +39,259 @@ def test_speech_to_text_success():
 
 def test_speech_to_text_file_not_found():
     with patch(
-        "services.eleven_labs_service.ElevenLabsBuisness.extract_audio_bytes_from_video",
+        "services.eleven_labs_service.ElevenLabsBuisness.extract_audio_bytes_ffmpeg",
         side_effect=FileNotFoundError("not found"),
     ):
         with patch("services.eleven_labs_service.ElevenLabs", return_value=MagicMock()):
             service = ElevenLabsService("key")
             with pytest.raises(FileNotFoundError):
                 service.speech_to_text("video.mp4", "en")
+
+
+def test_speech_to_text_uses_transcription_cache(tmp_path):
+    from buisness.transcription_cache import TranscriptionCache
+
+    cache = TranscriptionCache(cache_dir=tmp_path)
+    mock_client = MagicMock()
+    mock_client.speech_to_text.convert.return_value = MagicMock(
+        language_code="fra",
+        text="Salut",
+        words=[
+            MagicMock(text="Salut", start=0.1, end=0.4, type="word", speaker_id=None)
+        ],
+    )
+    with patch(
+        "src.services.eleven_labs_service.ElevenLabsBuisness.extract_audio_bytes_ffmpeg",
+        return_value=b"audio",
+    ):
+        with patch(
+            "src.services.eleven_labs_service.ElevenLabs", return_value=mock_client
+        ):
+            service = ElevenLabsService("key", transcription_cache=cache)
+            first = service.speech_to_text("video.mp4", "fr")
+            second = service.speech_to_text("other_worker_copy.mp4", "fr")
+            service.speech_to_text("video.mp4", "en")
+
+    assert mock_client.speech_to_text.convert.call_count == 2
+    assert second == first
+    assert second.words[0].text == "Salut"
+    assert cache.stats()["hits"] == 1
+
+
+def test_speech_to_text_without_speech_skips_api():
+    mock_client = MagicMock()
+    with patch(
+        "src.services.eleven_labs_service.ElevenLabsBuisness.extract_speech_audio_bytes",
+        return_value=(None, []),
+    ):
+        with patch(
+            "src.services.eleven_labs_service.ElevenLabs", return_value=mock_client
+        ):
+            service = ElevenLabsService("key")
+            result = service.speech_to_text("video.mp4", "fr", trim_silence=True)
+
+    assert result.words == []
+    mock_client.speech_to_text.convert.assert_not_called()
+
+
+def test_speech_to_text_trimmed_words_are_shifted_back():
+    mock_client = MagicMock()
+    mock_client.speech_to_text.convert.return_value = MagicMock(
+        language_code="fra",
+        text="Salut",
+        words=[
+            MagicMock(text="Salut", start=0.1, end=0.4, type="word", speaker_id=None)
+        ],
+    )
+    with patch(
+        "src.services.eleven_labs_service.ElevenLabsBuisness.extract_speech_audio_bytes",
+        return_value=(b"audio", [(0.0, 12.0, 1.0)]),
+    ):
+        with patch(
+            "src.services.eleven_labs_service.ElevenLabs", return_value=mock_client
+        ):
+            service = ElevenLabsService("key")
+            result = service.speech_to_text("video.mp4", "fr", trim_silence=True)
+
+    assert (result.words[0].start, result.words[0].end) == pytest.approx((12.1, 12.4))
+
+
+class StandInSttServer:
+    """
+    Local stand-in for the speech-to-text endpoint.
+
+    Every burst of sound in the uploaded audio comes back as one word, after
+    a fixed delay, and the peak number of concurrent requests is recorded.
+    """
+
+    def __init__(self, delay=0.3):
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        from buisness.eleven_labs_buisness import ElevenLabsBuisness
+        from services.ffmpeg_service import FfmpegService
+
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                boundary = self.headers["Content-Type"].split("boundary=")[1]
+                audio = next(
+                    part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+                    for part in body.split(b"--" + boundary.encode())
+                    if b'name="file"' in part
+                )
+                with lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    pcm = FfmpegService().run(
+                        [
+                            "-i",
+                            "pipe:0",
+                            "-ac",
+                            "1",
+                            "-ar",
+                            "16000",
+                            "-f",
+                            "s16le",
+                            "-",
+                        ],
+                        input_bytes=audio,
+                    )
+                    samples = np.frombuffer(pcm, "<i2").astype(np.float32) / 32768.0
+                    regions = ElevenLabsBuisness.detect_speech_regions(samples)
+                    time.sleep(delay)
+                finally:
+                    with lock:
+                        server.in_flight -= 1
+
+                payload = json.dumps(
+                    {
+                        "language_code": "fra",
+                        "language_probability": 1.0,
+                        "text": " ".join("mot" for _ in regions),
+                        "words": [
+                            {
+                                "text": "mot",
+                                "start": start,
+                                "end": end,
+                                "type": "word",
+                                "logprob": 0.0,
+                            }
+                            for start, end in regions
+                        ],
+                    }
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_speech_to_text_chunked_against_stand_in_server(tmp_path):
+    from services.ffmpeg_service import FfmpegService
+
+    # One 0.5s beep every 3s over 30s
+    video_path = str(tmp_path / "vod.mp4")
+    FfmpegService().run(
+        [
+            "-f",
+            "lavfi",
+            "-i",
+            "color=c=black:size=64x64:rate=5",
+            "-f",
+            "lavfi",
+            "-i",
+            "aevalsrc='0.3*sin(2*PI*1000*t)*lt(mod(t,3),0.5)':s=16000",
+            "-t",
+            "30",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            video_path,
+        ]
+    )
+
+    with StandInSttServer(delay=0.3) as server:
+        service = ElevenLabsService("key", base_url=server.base_url)
+        result = service.speech_to_text_chunked(
+            video_path, "fr", chunk_seconds=8, overlap_seconds=1, max_workers=4
+        )
+
+    assert server.requests >= 4
+    assert server.max_in_flight > 1
+    # Every beep exactly once, on the source timeline (starts include padding)
+    assert [word.start for word in result.words] == [
+        pytest.approx(max(index * 3 - 0.2, 0), abs=0.1) for index in range(10)
+    ]
+
+
+def test_speech_to_text_chunked_video_without_audio(tmp_path):
+    from services.ffmpeg_service import FfmpegService
+
+    video_path = str(tmp_path / "silent.mp4")
+    FfmpegService().run(
+        [
+            "-f",
+            "lavfi",
+            "-i",
+            "color=c=black:size=64x64:rate=5",
+            "-t",
+            "1",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            video_path,
+        ]
+    )
+
+    with patch("src.services.eleven_labs_service.ElevenLabs", return_value=MagicMock()):
+        service = ElevenLabsService("key")
+        with pytest.raises(ValueError, match="no audio track"):
+            service.speech_to_text_chunked(video_path, "fr")
+
+
+def test_speech_to_text_chunked_keeps_other_ffmpeg_errors(tmp_path):
+    video_path = tmp_path / "clip.mp4"
+    video_path.write_bytes(b"")
+
+    with (
+        patch("src.services.eleven_labs_service.ElevenLabs", return_value=MagicMock()),
+        patch("src.services.eleven_labs_service.FfmpegService") as ffmpeg,
+        patch(
+            "src.services.eleven_labs_service.ElevenLabsBuisness.decode_pcm",
+            side_effect=RuntimeError("ffmpeg failed: Invalid data found"),
+        ),
+    ):
+        ffmpeg.return_value.audio_codec.return_value = "aac"
+        service = ElevenLabsService("key")
+        with pytest.raises(RuntimeError, match="Invalid data found"):
+            service.speech_to_text_chunked(str(video_path), "fr")
@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import services.file_watch_service as file_watch_service
+from services.file_watch_service import DownloadWatcher
+
+
+def fake_chrome_download(directory, name="clip.mp4", delay=0.3, renamed_at=None):
+    """Write name.crdownload in steps, then rename it like Chrome does."""
+
+    def run():
+        partial = directory / f"{name}.crdownload"
+        with open(partial, "wb") as f:
+            for _ in range(3):
+                f.write(os.urandom(1024))
+                f.flush()
+                time.sleep(delay / 3)
+        os.rename(partial, directory / name)
+        if renamed_at is not None:
+            renamed_at.append(time.monotonic())
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux")
+def test_download_is_reported_on_rename(tmp_path):
+    renamed_at = []
+    with DownloadWatcher(tmp_path) as watcher:
+        assert watcher.uses_inotify
+        thread = fake_chrome_download(tmp_path, renamed_at=renamed_at)
+        path = watcher.wait(timeout=5)
+        seen_at = time.monotonic()
+    thread.join()
+
+    assert path == tmp_path / "clip.mp4"
+    # Woken by the event, not by the once-a-second rescan
+    assert seen_at - renamed_at[0] < 0.2
+
+
+def test_polling_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_watch_service, "_load_inotify", lambda: None)
+    with DownloadWatcher(tmp_path) as watcher:
+        assert not watcher.uses_inotify
+        thread = fake_chrome_download(tmp_path)
+        assert watcher.wait(timeout=5) == tmp_path / "clip.mp4"
+    thread.join()
+
+
+def test_existing_files_are_ignored(tmp_path):
+    (tmp_path / "old.mp4").write_bytes(b"old")
+    with DownloadWatcher(tmp_path) as watcher:
+        with pytest.raises(TimeoutError):
+            watcher.wait(timeout=0.3)
+        thread = fake_chrome_download(tmp_path, name="new.mp4", delay=0.1)
+        assert watcher.wait(timeout=5) == tmp_path / "new.mp4"
+    thread.join()
+
+
+def test_unfinished_download_times_out(tmp_path):
+    with DownloadWatcher(tmp_path) as watcher:
+        (tmp_path / "done.mp4").write_bytes(b"done")
+        (tmp_path / "other.mp4.crdownload").write_bytes(b"partial")
+        with pytest.raises(TimeoutError):
+            watcher.wait(timeout=0.3)
@@ -1,8 +1,13 @@
+import os
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.services.scraping_service import ScrapingService
+from src.services.scraping_service import (
+    BLOCKED_URL_PATTERNS,
+    ScrapingService,
+    blocked_url_patterns,
+)
 
 
 def test_init_success(monkeypatch):
@@ -61,3 +66,138 @@ def test_context_manager(monkeypatch):
             with patch("pathlib.Path.mkdir"):
                 with ScrapingService() as service:
                     assert hasattr(service, "driver")
+
+
+def test_init_with_session_directories(tmp_path):
+    with patch("src.services.scraping_service.Chrome"):
+        with patch("src.services.scraping_service.ChromeOptions") as mock_options:
+            service = ScrapingService(
+                download_dir=tmp_path / "downloads",
+                profile_dir=str(tmp_path / "profile"),
+            )
+
+    options = mock_options.return_value
+    options.add_argument.assert_any_call(f"--user-data-dir={tmp_path / 'profile'}")
+    prefs = options.add_experimental_option.call_args.args[1]
+    assert prefs["download.default_directory"] == str(tmp_path / "downloads")
+    assert service.download_dir == tmp_path / "downloads"
+
+
+def blocked_urls_calls(driver):
+    return [
+        c.args[1]["urls"]
+        for c in driver.execute_cdp_cmd.call_args_list
+        if c.args[0] == "Network.setBlockedURLs"
+    ]
+
+
+def test_init_blocks_heavy_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "src.services.scraping_service.settings.SCRAPING_EXTRA_BLOCKED_URL_PATTERNS",
+        ["*ads.example.com*"],
+    )
+    monkeypatch.setattr(
+        "src.services.scraping_service.settings.SCRAPING_UNBLOCKED_URL_PATTERNS",
+        ["*.woff*"],
+    )
+    with patch("src.services.scraping_service.Chrome") as mock_chrome:
+        with patch("src.services.scraping_service.ChromeOptions"):
+            service = ScrapingService(download_dir=tmp_path, block_requests=True)
+
+    driver = mock_chrome.return_value
+    driver.execute_cdp_cmd.assert_any_call("Network.enable", {})
+    (patterns,) = blocked_urls_calls(driver)
+    assert {"*.m3u8*", "*.png*", "*spade.twitch.tv*", "*ads.example.com*"} <= set(
+        patterns
+    )
+    assert "*.woff*" not in patterns
+    assert service.blocked_url_patterns == patterns
+
+
+def test_unblocked_entries_matching_no_pattern_are_reported(monkeypatch):
+    monkeypatch.setattr(
+        "src.services.scraping_service.settings.SCRAPING_UNBLOCKED_URL_PATTERNS",
+        ["*.woff", "*fonts.gstatic.com/*"],
+    )
+    with patch("src.services.scraping_service.logger") as mock_logger:
+        patterns = blocked_url_patterns()
+
+    # Entries are matched against block patterns, not URLs: nothing lifted
+    assert "*.woff*" in patterns
+    assert mock_logger.warning.call_count == 2
+
+
+def test_init_without_request_blocking(tmp_path):
+    with patch("src.services.scraping_service.Chrome") as mock_chrome:
+        with patch("src.services.scraping_service.ChromeOptions"):
+            service = ScrapingService(download_dir=tmp_path, block_requests=False)
+
+    mock_chrome.return_value.execute_cdp_cmd.assert_not_called()
+    assert service.blocked_url_patterns == []
+
+
+def test_download_clip_lifts_block_for_link_and_records_timings(tmp_path):
+    download_url = "https://production.assets.clips.twitchcdn.net/v2/a.mp4?sig=x"
+    with patch("src.services.scraping_service.Chrome") as mock_chrome:
+        with patch("src.services.scraping_service.ChromeOptions"):
+            service = ScrapingService(download_dir=tmp_path, block_requests=True)
+    driver = mock_chrome.return_value
+    patterns = service.blocked_url_patterns
+
+    link = MagicMock()
+    link.get_attribute.return_value = download_url
+    with (
+        patch("src.services.scraping_service.WebDriverWait") as mock_wait,
+        patch("src.services.scraping_service.DownloadWatcher") as mock_watcher,
+    ):
+        mock_wait.return_value.until.return_value = link
+        mock_watcher.return_value.wait.return_value = tmp_path / "a.mp4"
+        path = service.download_clip("https://clips.twitch.tv/a")
+
+    assert path == tmp_path / "a.mp4"
+    # Unblocked for the click, then blocked again for the next page
+    _, during, after = blocked_urls_calls(driver)
+    assert "*.mp4*" in patterns and "*.mp4*" not in during
+    assert after == patterns == service.blocked_url_patterns
+    timings = service.last_timings
+    assert list(timings) == ["page_load", "menu", "link_found", "file_done"]
+    assert all(b >= a for a, b in zip(timings.values(), list(timings.values())[1:]))
+
+
+def test_download_clip_lifts_media_blocks_when_link_has_no_url(tmp_path):
+    with patch("src.services.scraping_service.Chrome") as mock_chrome:
+        with patch("src.services.scraping_service.ChromeOptions"):
+            service = ScrapingService(download_dir=tmp_path, block_requests=True)
+    driver = mock_chrome.return_value
+    driver.execute_script.return_value = None
+    patterns = service.blocked_url_patterns
+
+    link = MagicMock()
+    link.get_attribute.side_effect = lambda name: (
+        "<a></a>" if name == "outerHTML" else None
+    )
+    link.get_property.return_value = None
+    with (
+        patch("src.services.scraping_service.WebDriverWait") as mock_wait,
+        patch("src.services.scraping_service.DownloadWatcher") as mock_watcher,
+    ):
+        mock_wait.return_value.until.return_value = link
+        mock_watcher.return_value.wait.return_value = tmp_path / "a.mp4"
+        service.download_clip("https://clips.twitch.tv/a")
+
+    _, during, after = blocked_urls_calls(driver)
+    assert not set(BLOCKED_URL_PATTERNS["media"]) & set(during)
+    assert "*.png*" in during
+    assert after == patterns
+
+
+def test_default_profile_is_private_and_removed_on_close(tmp_path):
+    with patch("src.services.scraping_service.Chrome"):
+        with patch("src.services.scraping_service.ChromeOptions"):
+            first = ScrapingService(download_dir=tmp_path)
+            second = ScrapingService(download_dir=tmp_path)
+
+    assert first._own_profile_dir != second._own_profile_dir
+    first.close()
+    second.close()
+    assert not os.path.exists(first._own_profile_dir)
@@ -1,34 +1,136 @@
-from unittest.mock import AsyncMock, Mock, patch
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock
 
+import httpx
 import pytest
 
-from services.twitch_service import TwitchApi
+from buisness.app_token_cache import AppTokenCache
+from buisness.broadcaster_id_cache import BroadcasterIdCache
+from buisness.game_info_cache import GameInfoCache
+from buisness.token_validation_cache import TokenValidationCache
+from config.settings import settings
+from services.twitch_service import TOKEN_EXPIRY_MARGIN, RateLimiter, TwitchApi
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "TWITCH_RETRY_BACKOFF", 0.01)
+
+
+def mock_transport(handler):
+    """Transport answering the app token request, other requests go to handler."""
+
+    async def dispatch(request):
+        if str(request.url) == settings.TWITCH_TOKEN_URI:
+            return httpx.Response(
+                200, json={"access_token": "app_token", "expires_in": 5184000}
+            )
+        response = handler(request)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+    return {"transport": httpx.MockTransport(dispatch)}
 
 
 @pytest.mark.asyncio
-@patch("services.twitch_service.httpx.AsyncClient")
-async def test_get_access_token_success(mock_async_client):
-    # Configure le mock de la réponse HTTP
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "access_token": "token123",
-        "expires_in": 5184000,
-    }
+async def test_get_access_token_success():
+    requests = []
 
-    # Configure le context manager async
-    mock_client_instance = Mock()
-    mock_client_instance.post = AsyncMock(return_value=mock_response)
-    mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            200, json={"access_token": "token123", "expires_in": 5184000}
+        )
 
-    # Instancie et teste
-    api = TwitchApi("client_id", "client_secret")
+    api = TwitchApi(
+        "client_id", "client_secret", transport=httpx.MockTransport(handler)
+    )
     token = await api.get_access_token()
+    # Still valid, no second request
+    await api.get_access_token()
 
-    # Assertions
     assert token == "token123"
     assert api._access_token == "token123"
     assert api._token_expiry is not None
+    assert len(requests) == 1
+    assert b"grant_type=client_credentials" in requests[0].content
+    await api.aclose()
+
+
+def token_endpoint(delay=0.0):
+    """Token endpoint issuing token1, token2, ... after delay seconds."""
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(delay)
+        return httpx.Response(
+            200,
+            json={"access_token": f"token{len(requests)}", "expires_in": 5184000},
+        )
+
+    return httpx.MockTransport(handler), requests
+
+
+@pytest.mark.asyncio
+async def test_concurrent_token_requests_share_one_refresh():
+    transport, requests = token_endpoint(delay=0.1)
+    cache = AppTokenCache()
+    apis = [
+        TwitchApi("id", "secret", transport=transport, app_token_cache=cache)
+        for _ in range(5)
+    ]
+
+    tokens = await asyncio.gather(*(api.get_access_token() for api in apis * 10))
+
+    assert set(tokens) == {"token1"}
+    assert len(requests) == 1
+    assert cache.stats()["refreshes"] == 1
+    for api in apis:
+        await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_app_token_is_shared_through_the_cache_file(tmp_path):
+    path = tmp_path / "app_token.json"
+    transport, requests = token_endpoint()
+
+    first = TwitchApi(
+        "id", "secret", transport=transport, app_token_cache=AppTokenCache(path)
+    )
+    assert await first.get_access_token() == "token1"
+    # Another process only has the file
+    second = TwitchApi(
+        "id", "secret", transport=transport, app_token_cache=AppTokenCache(path)
+    )
+    assert await second.get_access_token() == "token1"
+
+    assert len(requests) == 1
+    assert path.stat().st_mode & 0o777 == 0o600
+    await first.aclose()
+    await second.aclose()
+
+
+@pytest.mark.asyncio
+async def test_app_token_is_refreshed_in_the_background_before_expiry():
+    transport, requests = token_endpoint()
+    cache = AppTokenCache()
+    # Past the background refresh point, still before the deadline
+    cache.put("id", "old_token", time.time() + TOKEN_EXPIRY_MARGIN + 600)
+    api = TwitchApi("id", "secret", transport=transport, app_token_cache=cache)
+
+    assert await api.get_access_token() == "old_token"
+    await api._background_refresh
+
+    assert len(requests) == 1
+    assert await api.get_access_token() == "token1"
+    assert cache.get("id")[0] == "token1"
+    await api.aclose()
 
 
 @pytest.mark.asyncio
@@ -44,66 +146,303 @@ async def test_get_headers():
     assert headers["Authorization"] == "Bearer token123"
 
 
-@patch("services.twitch_service.requests.post")
-@patch.dict("os.environ", {"BASE_URL": "http://test"})
-@patch("services.twitch_service.requests.get")
-def test_get_broadcaster_id_success(mock_get, mock_post):
-    mock_post.return_value.status_code = 200
-    mock_post.return_value.json.return_value = {"access_token": "token123"}
-    mock_get.return_value.status_code = 200
-    mock_get.return_value.json.return_value = {"data": [{"id": "broadcaster123"}]}
-    api = TwitchApi("id", "secret")
+def test_get_broadcaster_id_success():
+    def handler(request):
+        assert request.url.params["login"] == "user"
+        return httpx.Response(
+            200, json={"data": [{"id": "broadcaster123", "login": "user"}]}
+        )
+
+    api = TwitchApi("id", "secret", **mock_transport(handler))
     result = api.get_broadcaster_id("user")
     assert result == "broadcaster123"
+    api.close()
 
 
-@patch("services.twitch_service.requests.post")
-@patch.dict("os.environ", {"BASE_URL": "http://test"})
-@patch("services.twitch_service.requests.get")
-def test_get_broadcaster_id_not_found(mock_get, mock_post):
-    mock_post.return_value.status_code = 200
-    mock_post.return_value.json.return_value = {"access_token": "token123"}
-    mock_get.return_value.status_code = 200
-    mock_get.return_value.json.return_value = {"data": []}
-    api = TwitchApi("id", "secret")
+@pytest.mark.asyncio
+async def test_aget_broadcaster_ids_batches_and_persists(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        logins = request.url.params.get_list("login")
+        return httpx.Response(
+            200,
+            json={
+                "data": [
+                    {"id": login.removeprefix("user"), "login": login}
+                    for login in logins
+                    if login != "user13"
+                ]
+            },
+        )
+
+    cache_path = tmp_path / "broadcaster_ids.json"
+    api = TwitchApi(
+        "id",
+        "secret",
+        broadcaster_id_cache=BroadcasterIdCache(cache_path),
+        **mock_transport(handler),
+    )
+    logins = [f"User{i}" for i in range(230)] + ["user1", ""]
+    ids, unresolved = await api.aget_broadcaster_ids(logins)
+
+    assert len(ids) == 229
+    assert ids["user1"] == "1"
+    assert unresolved == ["user13"]
+    assert sorted(len(r.url.params.get_list("login")) for r in requests) == [
+        30,
+        100,
+        100,
+    ]
+    await api.aclose()
+
+    # A new process reads the IDs back from disk
+    requests.clear()
+    api = TwitchApi(
+        "id",
+        "secret",
+        broadcaster_id_cache=BroadcasterIdCache(cache_path),
+        **mock_transport(handler),
+    )
+    ids, unresolved = await api.aget_broadcaster_ids(["user5", "USER200", "user13"])
+    assert ids == {"user5": "5", "user200": "200"}
+    assert unresolved == ["user13"]
+    assert [r.url.params.get_list("login") for r in requests] == [["user13"]]
+    assert api.broadcaster_id_cache.stats()["hits"] == 2
+    await api.aclose()
+
+
+def test_get_broadcaster_id_not_found():
+    api = TwitchApi(
+        "id",
+        "secret",
+        **mock_transport(lambda r: httpx.Response(200, json={"data": []})),
+    )
     result = api.get_broadcaster_id("user")
     assert result is None
 
 
-@patch("services.twitch_service.requests.post")
-@patch.dict("os.environ", {"BASE_URL": "http://test"})
-@patch("services.twitch_service.requests.get")
-def test_get_broadcaster_clips_success(mock_get, mock_post):
-    mock_post.return_value.status_code = 200
-    mock_post.return_value.json.return_value = {"access_token": "token123"}
-    mock_get.return_value.status_code = 200
-    mock_get.return_value.json.return_value = {
-        "data": [{"id": "clip1"}, {"id": "clip2"}]
-    }
-    api = TwitchApi("id", "secret")
+@pytest.mark.parametrize("username", ["", None])
+def test_get_broadcaster_id_empty_username_returns_none(username):
+    requests = []
+    api = TwitchApi(
+        "id",
+        "secret",
+        **mock_transport(lambda r: requests.append(r) or httpx.Response(500)),
+    )
+    assert api.get_broadcaster_id(username) is None
+    assert not [r for r in requests if "/users" in str(r.url)]
+
+
+def test_get_broadcaster_id_http_error_returns_none():
+    api = TwitchApi(
+        "id", "secret", **mock_transport(lambda r: httpx.Response(500, json={}))
+    )
+    assert api.get_broadcaster_id("user") is None
+
+
+def test_get_broadcaster_clips_success():
+    def handler(request):
+        assert request.url.params["broadcaster_id"] == "broadcaster123"
+        return httpx.Response(200, json={"data": [{"id": "clip1"}, {"id": "clip2"}]})
+
+    api = TwitchApi("id", "secret", **mock_transport(handler))
     result = api.get_broadcaster_clips("broadcaster123")
     assert isinstance(result, list)
+    assert len(result) == 2
+
+
+def clip_pages(total, page_size):
+    """Handler serving total clips by descending view count, page_size per page."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        offset = int(request.url.params.get("after", 0))
+        first = min(int(request.url.params["first"]), page_size)
+        data = [
+            {"id": f"clip{i}", "view_count": total - i}
+            for i in range(offset, min(offset + first, total))
+        ]
+        pagination = {"cursor": str(offset + first)} if offset + first < total else {}
+        return httpx.Response(200, json={"data": data, "pagination": pagination})
+
+    return handler, requests
+
+
+@pytest.mark.asyncio
+async def test_aiter_broadcaster_clips_follows_cursor():
+    handler, requests = clip_pages(total=250, page_size=100)
+    api = TwitchApi("id", "secret", **mock_transport(handler))
+
+    clips = [clip async for clip in api.aiter_broadcaster_clips("42")]
+
+    assert [clip["id"] for clip in clips] == [f"clip{i}" for i in range(250)]
+    assert [r.url.params.get("after") for r in requests] == [None, "100", "200"]
+    assert "started_at" in requests[0].url.params
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aiter_broadcaster_clips_keeps_caller_filters():
+    handler, requests = clip_pages(total=5, page_size=100)
+    api = TwitchApi("id", "secret", **mock_transport(handler))
+
+    clips = [c async for c in api.aiter_broadcaster_clips("42", filters={"first": 2})]
+
+    assert len(clips) == 5
+    assert [r.url.params["first"] for r in requests] == ["2", "2", "2"]
+    assert requests[0].url.params["ended_at"]
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aiter_broadcaster_clips_early_stop():
+    handler, requests = clip_pages(total=1000, page_size=100)
+    api = TwitchApi("id", "secret", **mock_transport(handler))
+
+    # view_count of clip i is 1000 - i
+    clips = [c async for c in api.aiter_broadcaster_clips("42", min_view_count=850)]
+    assert len(clips) == 151
+    assert len(requests) == 2
+
+    requests.clear()
+    clips = await api.aget_broadcaster_clips("42", max_clips=30)
+    assert len(clips) == 30
+    assert len(requests) == 1
+    assert requests[0].url.params["first"] == "30"
+    await api.aclose()
 
 
-@patch("services.twitch_service.requests.get")
-def test_download_broadcaster_clips_success(mock_get):
+def test_get_broadcaster_clips_error_returns_empty_list():
+    handler, _ = clip_pages(total=300, page_size=100)
+
+    def failing_second_page(request):
+        if "after" in request.url.params:
+            return httpx.Response(503)
+        return handler(request)
+
+    api = TwitchApi("id", "secret", **mock_transport(failing_second_page))
+    assert api.get_broadcaster_clips("42") == []
+    api.close()
+
+
+@pytest.mark.asyncio
+async def test_helix_429_is_retried_after_reset():
+    responses = [
+        httpx.Response(
+            429,
+            headers={
+                "Ratelimit-Limit": "800",
+                "Ratelimit-Remaining": "0",
+                "Ratelimit-Reset": str(int(time.time())),
+            },
+        ),
+        httpx.Response(
+            200,
+            headers={"Ratelimit-Remaining": "799"},
+            json={"data": [{"id": "clip1"}]},
+        ),
+    ]
+    api = TwitchApi("id", "secret", **mock_transport(lambda r: responses.pop(0)))
+
+    assert await api.aget_broadcaster_clips("42") == [{"id": "clip1"}]
+    stats = api.rate_limit_stats()
+    assert stats["rate_limited"] == 1
+    assert stats["retries"] == 1
+    assert stats["remaining"] == 799
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_helix_5xx_gives_up_after_max_retries():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(502)
+
+    api = TwitchApi("id", "secret", **mock_transport(handler))
+    assert await api.aget_game_info("1") is None
+    assert len(requests) == 1 + settings.TWITCH_MAX_RETRIES
+    assert api.rate_limit_stats()["rate_limited"] == 0
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_paces_concurrent_requests():
+    api = TwitchApi(
+        "id",
+        "secret",
+        **mock_transport(lambda r: httpx.Response(200, json={"data": []})),
+    )
+    # 10 points per half second: the second half of the burst must queue
+    api.rate_limiter = RateLimiter(points=10, period=0.5)
+    started = time.perf_counter()
+    await asyncio.gather(*(api.aget_game_info(str(i)) for i in range(20)))
+    elapsed = time.perf_counter() - started
+
+    stats = api.rate_limit_stats()
+    assert stats["requests"] == 20
+    assert stats["throttled"] == 10
+    assert 0.45 <= stats["max_wait"] <= 0.55
+    assert elapsed >= 0.45
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_blocks_until_reset_when_exhausted(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    limiter = RateLimiter(points=800)
+    limiter.update(
+        {
+            "Ratelimit-Limit": "800",
+            "Ratelimit-Remaining": "0",
+            "Ratelimit-Reset": str(int(time.time()) + 3),
+        }
+    )
+    wait = await limiter.acquire()
+
+    assert 2 <= wait <= 3
+    assert sleeps == [wait]
+    assert limiter.stats()["remaining"] == 0
+
+
+def test_download_broadcaster_clips_success():
     """Test successful clip download with all parameters."""
-    # Arrange
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "data": [
-            {"id": "clip123", "url": "https://twitch.tv/clip123", "title": "Epic Play"},
-            {
-                "id": "clip456",
-                "url": "https://twitch.tv/clip456",
-                "title": "Great Moment",
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={
+                "data": [
+                    {
+                        "id": "clip123",
+                        "url": "https://twitch.tv/clip123",
+                        "title": "Epic Play",
+                    },
+                    {
+                        "id": "clip456",
+                        "url": "https://twitch.tv/clip456",
+                        "title": "Great Moment",
+                    },
+                ]
             },
-        ]
-    }
-    mock_get.return_value = mock_response
+        )
 
-    api = TwitchApi(client_id="test_client_id", client_secret="test_secret")
+    api = TwitchApi(
+        client_id="test_client_id",
+        client_secret="test_secret",
+        **mock_transport(handler),
+    )
 
     # Act
     result = api.download_broadcaster_clips(
@@ -119,12 +458,178 @@ def test_download_broadcaster_clips_success(mock_get):
     assert result[1]["title"] == "Great Moment"
 
     # Verify the request was made correctly
-    mock_get.assert_called_once()
-    call_args = mock_get.call_args
-
-    assert call_args.kwargs["headers"]["Client-Id"] == "test_client_id"
-    assert call_args.kwargs["headers"]["Authorization"] == "Bearer user_token_abc"
-    assert call_args.kwargs["params"]["broadcaster_id"] == "broadcaster456"
-    assert call_args.kwargs["params"]["editor_id"] == "editor123"
-    assert call_args.kwargs["params"]["clip_id"] == "clip789"
-    assert call_args.kwargs["timeout"] == 10
+    assert len(requests) == 1
+    request = requests[0]
+    assert request.headers["Client-Id"] == "test_client_id"
+    assert request.headers["Authorization"] == "Bearer user_token_abc"
+    assert request.url.params["broadcaster_id"] == "broadcaster456"
+    assert request.url.params["editor_id"] == "editor123"
+    assert request.url.params["clip_id"] == "clip789"
+
+
+def test_get_game_info_uses_app_token():
+    def handler(request):
+        assert request.headers["Authorization"] == "Bearer app_token"
+        return httpx.Response(200, json={"data": [{"id": "1", "name": "Chess"}]})
+
+    api = TwitchApi("id", "secret", **mock_transport(handler))
+    assert api.get_game_info("1") == {"id": "1", "name": "Chess"}
+    api.close()
+
+
+@pytest.mark.asyncio
+async def test_aget_games_info_batches_and_caches():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        ids = request.url.params.get_list("id")
+        return httpx.Response(
+            200, json={"data": [{"id": i, "name": f"game{i}"} for i in ids if i != "0"]}
+        )
+
+    api = TwitchApi(
+        "id", "secret", game_info_cache=GameInfoCache(), **mock_transport(handler)
+    )
+    game_ids = [str(i) for i in range(250)] + ["1", None]
+    games = await api.aget_games_info(game_ids)
+
+    assert len(games) == 249
+    assert games["1"] == {"id": "1", "name": "game1"}
+    assert sorted(len(r.url.params.get_list("id")) for r in requests) == [50, 100, 100]
+
+    requests.clear()
+    assert await api.aget_game_info(7) == {"id": "7", "name": "game7"}
+    assert await api.aget_game_info("0") is None
+    # Only the unknown game goes back to Twitch
+    assert [r.url.params.get_list("id") for r in requests] == [["0"]]
+    assert api.game_info_cache.stats()["hits"] == 1
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_methods_share_the_app_token():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        assert request.headers["Authorization"] == "Bearer app_token"
+        if request.url.path.endswith("/users"):
+            return httpx.Response(200, json={"data": [{"id": "42", "login": "user"}]})
+        return httpx.Response(200, json={"data": [{"id": "clip1"}]})
+
+    api = TwitchApi("id", "secret", **mock_transport(handler))
+    broadcaster_id, clips = await asyncio.gather(
+        api.aget_broadcaster_id("user"), api.aget_broadcaster_clips("42")
+    )
+    assert broadcaster_id == "42"
+    assert clips == [{"id": "clip1"}]
+    assert api.connection_stats()["api.twitch.tv"]["requests"] == 2
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_ais_token_valid():
+    async def handler(request):
+        assert request.headers["Authorization"] == "OAuth user_token"
+        return httpx.Response(200, json={"expires_in": 3600})
+
+    api = TwitchApi("id", "secret", **mock_transport(handler))
+    assert await api.ais_token_valid("user_token") == {
+        "valid": True,
+        "expires_in": 3600,
+    }
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_ais_token_valid_uses_validation_cache():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers["Authorization"] == "OAuth expired":
+            return httpx.Response(401)
+        if request.headers["Authorization"] == "OAuth flaky":
+            return httpx.Response(503, json={"status": 503})
+        return httpx.Response(200, json={"expires_in": 3600})
+
+    api = TwitchApi(
+        "id",
+        "secret",
+        token_validation_cache=TokenValidationCache(),
+        **mock_transport(handler),
+    )
+    for _ in range(3):
+        assert (await api.ais_token_valid("good"))["valid"]
+        assert await api.ais_token_valid("expired") == {
+            "valid": False,
+            "expires_in": 0,
+        }
+        # Errors are neither reported valid nor cached
+        assert await api.ais_token_valid("flaky") is None
+
+    assert len(requests) == 5
+    stats = api.token_validation_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["negative_hits"] == 2
+    await api.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sync_wrappers_work_inside_a_running_loop():
+    """Scripts calling the sync API from async code get their own loop."""
+    api = TwitchApi(
+        "id",
+        "secret",
+        **mock_transport(
+            lambda r: httpx.Response(200, json={"data": [{"id": "7", "login": "user"}]})
+        ),
+    )
+    assert api.get_broadcaster_id("user") == "7"
+    assert await api.aget_broadcaster_id("user") == "7"
+    await api.aclose()
+    assert api._sync_loop is None
+
+
+def test_is_token_valid_expired():
+    api = TwitchApi("id", "secret", **mock_transport(lambda r: httpx.Response(401)))
+    assert api.is_token_valid("token") == {"valid": False, "expires_in": 0}
+
+
+def test_connections_are_reused_across_calls():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = b'{"data": [{"id": "42", "login": "user"}]}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        api = TwitchApi("id", "secret")
+        api._access_token = "app_token"
+        api._token_expiry = datetime.now() + timedelta(days=1)
+        api.BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+        for _ in range(5):
+            assert api.get_broadcaster_id("user") == "42"
+        api.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    stats = api.connection_stats()["127.0.0.1"]
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+    assert stats["reuse_ratio"] == 0.8
+    assert stats["http_versions"] == {"HTTP/1.1": 5}